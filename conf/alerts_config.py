@@ -1,10 +1,31 @@
 # alerts_config.py
 import yaml
 import os
+import threading
+import time
+import logging
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
 
 # 告警配置路径
 ALERTS_YAML = "conf/alerts.yaml"
 
+# 两次检查文件 mtime 的最小间隔（秒）
+MTIME_CHECK_INTERVAL = 1.0
+
+url_check_alerts_config_parse_total = Counter(
+    "url_check_alerts_config_parse_total",
+    "Total number of alerts.yaml parses",
+    ["result"],
+)
+
+url_check_alerts_config_reload_total = Counter(
+    "url_check_alerts_config_reload_total",
+    "Total number of alerts.yaml reloads by trigger",
+    ["trigger"],
+)
+
 
 def load_alerts_config():
     """加载告警配置"""
@@ -15,13 +36,93 @@ def load_alerts_config():
         return yaml.safe_load(f)
 
 
+class AlertConfigCache:
+    """
+    告警配置缓存
+
+    功能：
+        - 只在首次访问、文件 mtime 变化或热重载时解析 alerts.yaml
+        - 按告警名称建立索引，查询为一次字典查找
+        - 解析失败时保留上一次成功加载的配置
+    """
+
+    def __init__(self, path=ALERTS_YAML, check_interval=MTIME_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._by_name = {}
+        self._source = None  # (绝对路径, mtime)
+        self._last_check = None
+
+    def _stat(self):
+        abs_path = os.path.abspath(self.path)
+        try:
+            return abs_path, os.stat(abs_path).st_mtime_ns
+        except OSError:
+            return abs_path, None
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if (
+            self._last_check is not None
+            and now - self._last_check < self.check_interval
+            and self._source is not None
+            and self._source[0] == os.path.abspath(self.path)
+        ):
+            return
+        with self._lock:
+            self._last_check = now
+            source = self._stat()
+            if source == self._source:
+                return
+            self._load(source, trigger="mtime" if self._source else "initial")
+
+    def _load(self, source, trigger):
+        abs_path, mtime = source
+        if mtime is None:
+            by_name = {}
+        else:
+            try:
+                with open(abs_path, "r", encoding="utf-8") as f:
+                    data = yaml.safe_load(f) or {}
+                url_check_alerts_config_parse_total.labels(result="ok").inc()
+            except Exception as e:
+                url_check_alerts_config_parse_total.labels(result="error").inc()
+                logger.error(f"告警配置解析失败 {abs_path}: {e}")
+                self._source = source
+                return False
+            by_name = {
+                alert.get("name"): alert
+                for alert in data.get("alerts") or []
+                if isinstance(alert, dict) and alert.get("name")
+            }
+        self._by_name = by_name
+        self._source = source
+        url_check_alerts_config_reload_total.labels(trigger=trigger).inc()
+        return True
+
+    def reload(self, trigger="watcher"):
+        """强制重新解析（供热重载监听器调用）"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            return self._load(self._stat(), trigger=trigger)
+
+    def get(self, alert_name):
+        self._maybe_reload()
+        return self._by_name.get(alert_name)
+
+
+alert_config_cache = AlertConfigCache()
+
+
+def reload_alerts_config():
+    """重新加载告警配置"""
+    return alert_config_cache.reload()
+
+
 def get_alert_config(alert_name):
     """获取指定告警类型的配置"""
-    config = load_alerts_config()
-    for alert in config.get("alerts", []):
-        if alert.get("name") == alert_name:
-            return alert
-    return None
+    return alert_config_cache.get(alert_name)
 
 
 def is_alert_enabled(alert_name):
@@ -95,6 +196,3 @@ def get_alert_type_info(alert_name):
     """获取告警类型信息"""
     return ALERT_TYPE_MAP.get(alert_name, {})
 
-
-# 加载配置
-alerts_config = load_alerts_config()
@@ -108,13 +108,17 @@ access_token = _env_str("URL_CHECK_DINGDING_ACCESS_TOKEN", "")
 # 告警日志配置
 # =============================================================================
 # alert_log_enabled: 是否启用独立告警日志
-#   True:  启用，写入 logs/alert.log（JSON 格式）
+#   True:  启用，写入 logs/alert_YYYY-MM-DD.log（JSON 格式，后台线程批量写入）
 #   False: 禁用
 #
 # alert_log_retention_days: 日志保留天数
 #   0:   不限制
 #   30:  保留 30 天
 #
+# alert_log_queue_size: 写入队列容量，队列满时丢弃新日志
+# alert_log_buffer_lines: 缓冲条数，攒满立即写入文件
+# alert_log_flush_seconds: 最长刷新间隔（秒），缓冲未满也按此间隔写入
+#
 # 日志格式（JSON）：
 # {
 #   "timestamp": "2024-01-01 00:00:00",
@@ -127,6 +131,22 @@ access_token = _env_str("URL_CHECK_DINGDING_ACCESS_TOKEN", "")
 # =============================================================================
 alert_log_enabled = _env_bool("URL_CHECK_ALERT_LOG_ENABLED", True)
 alert_log_retention_days = _env_int("URL_CHECK_ALERT_LOG_RETENTION_DAYS", 30)
+alert_log_queue_size = _env_int("URL_CHECK_ALERT_LOG_QUEUE_SIZE", 10000)
+alert_log_buffer_lines = _env_int("URL_CHECK_ALERT_LOG_BUFFER_LINES", 100)
+alert_log_flush_seconds = _env_int("URL_CHECK_ALERT_LOG_FLUSH_SECONDS", 1)
+
+# =============================================================================
+# 运行日志配置
+# =============================================================================
+# log_level: 日志级别（DEBUG/INFO/WARNING/ERROR），DEBUG 时输出每次检查的判定明细
+# log_success_sample: 成功检查结果每个任务每 N 次输出 1 次
+#   1: 全部输出
+#   0: 不输出（失败结果与告警状态变化始终输出）
+# log_body_max_chars: 日志中响应正文的最大字符数
+# =============================================================================
+log_level = _env_str("URL_CHECK_LOG_LEVEL", "INFO").upper()
+log_success_sample = _env_int("URL_CHECK_LOG_SUCCESS_SAMPLE", 100)
+log_body_max_chars = _env_int("URL_CHECK_LOG_BODY_MAX_CHARS", 200)
 
 # =============================================================================
 # 定时汇总报告配置
@@ -154,6 +174,160 @@ report_dingding_enabled = _env_bool("URL_CHECK_REPORT_DINGDING_ENABLED", True)
 report_mail_enabled = _env_bool("URL_CHECK_REPORT_MAIL_ENABLED", False)
 strict_config = _env_bool("URL_CHECK_STRICT_CONFIG", False)
 
+# =============================================================================
+# 检查引擎配置
+# =============================================================================
+# check_engine: 检查执行引擎
+#   thread:  每个检查占用一个调度线程执行（默认，兼容旧版）
+#   asyncio: 所有检查在单个事件循环上并发执行（需要 aiohttp），适合数千 URL
+#
+# async_max_inflight: asyncio 引擎最大在途请求数
+# async_result_workers: asyncio 引擎处理检查结果（状态持久化、告警）的线程数
+# =============================================================================
+check_engine = _env_str("URL_CHECK_ENGINE", "thread").lower()
+async_max_inflight = _env_int("URL_CHECK_ASYNC_MAX_INFLIGHT", 1000)
+async_result_workers = _env_int("URL_CHECK_ASYNC_RESULT_WORKERS", 4)
+
+# =============================================================================
+# 调度线程池配置
+# =============================================================================
+# pool_autosize: 按 Little 定律（到达率 x 检查耗时 P95）自动调整线程数（默认开启）
+#   排队等待变长时扩容，空闲时缩容；关闭后固定为 pool_min
+# pool_min / pool_max: 线程数上下限
+# pool_resize_seconds: 调整周期（秒）
+# job_max_instances: 同一检查任务允许同时执行的实例数，超过时本次触发被跳过
+# =============================================================================
+pool_autosize = _env_bool("URL_CHECK_POOL_AUTOSIZE", True)
+pool_min = _env_int("URL_CHECK_POOL_MIN", 5)
+pool_max = _env_int("URL_CHECK_POOL_MAX", 50)
+pool_resize_seconds = _env_int("URL_CHECK_POOL_RESIZE_SECONDS", 30)
+job_max_instances = _env_int("URL_CHECK_JOB_MAX_INSTANCES", 10)
+
+# =============================================================================
+# 检查重试配置
+# =============================================================================
+# 任务的 retry.count / retry.delay 决定重试次数与首次重试间隔，之后每次翻倍并带随机抖动
+# 重试注册为一次性延迟执行，不占用工作线程
+#
+# retry_max_delay_seconds: 单次重试等待上限（秒）
+# =============================================================================
+retry_max_delay_seconds = _env_int("URL_CHECK_RETRY_MAX_DELAY_SECONDS", 60)
+
+# =============================================================================
+# HTTP 连接池配置（线程引擎）
+# =============================================================================
+# 每个代理一个会话（直连共用一个），同一主机的检查复用 keep-alive 连接
+#
+# http_pool_hosts: 每个会话缓存的主机连接池数量，超出时淘汰最久未用的主机
+#   目标主机数超过该值时连接池会被反复淘汰，每次检查都要重新握手
+# http_pool_maxsize: 每个主机保留的 keep-alive 连接数
+# http_idle_seconds: 主机连接池空闲多久后关闭回收（秒，0 不回收）
+# =============================================================================
+http_pool_hosts = _env_int("URL_CHECK_HTTP_POOL_HOSTS", 200)
+http_pool_maxsize = _env_int("URL_CHECK_HTTP_POOL_MAXSIZE", 10)
+http_idle_seconds = _env_int("URL_CHECK_HTTP_IDLE_SECONDS", 300)
+
+# =============================================================================
+# DNS 缓存配置
+# =============================================================================
+# dns_cache_enabled: 进程内缓存域名解析结果，并发解析同一主机时只查询一次（默认开启）
+# dns_cache_ttl: 缓存秒数（应不大于实际记录 TTL）
+# dns_cache_max_ttl: 安装 dnspython 时由 dnspython 解析，按应答中的记录 TTL 缓存，该值为上限
+# dns_negative_ttl: 解析失败结果缓存秒数（0 不缓存）
+# =============================================================================
+dns_cache_enabled = _env_bool("URL_CHECK_DNS_CACHE_ENABLED", True)
+dns_cache_ttl = _env_int("URL_CHECK_DNS_CACHE_TTL", 30)
+dns_cache_max_ttl = _env_int("URL_CHECK_DNS_CACHE_MAX_TTL", 300)
+dns_negative_ttl = _env_int("URL_CHECK_DNS_NEGATIVE_TTL", 5)
+
+# =============================================================================
+# SSL 证书检查配置
+# =============================================================================
+# ssl_cert_cache_ttl: 证书到期时间按 host:port 缓存的秒数
+#   证书优先从检查连接上读取；读取不到时才使用缓存或单独建连
+#   0: 不缓存
+# =============================================================================
+ssl_cert_cache_ttl = _env_int("URL_CHECK_SSL_CERT_CACHE_TTL", 3600)
+
+# =============================================================================
+# 响应正文配置
+# =============================================================================
+# max_response_size: 响应正文默认读取上限（字节），任务未配置 max_response_size 时生效
+#   正文分块读取，超过上限立即停止并跳过内容解析
+#   0: 不限制（默认）
+#
+# http_contents_metric: 是否把响应正文（前 500 字符）作为 url_check_http_contents 标签暴露
+#   False: 不暴露（默认；正文放在标签里会显著增大 /metrics 输出与 Prometheus 内存）
+#   True:  暴露，仅对未配置 math_str 的任务生效（供 PromQL 正则匹配）
+# =============================================================================
+max_response_size = _env_int("URL_CHECK_MAX_RESPONSE_SIZE", 0)
+http_contents_metric = _env_bool("URL_CHECK_HTTP_CONTENTS_METRIC", False)
+
+# =============================================================================
+# 告警通知发送配置
+# =============================================================================
+# notify_async: 告警通知是否异步发送
+#   true:  检查线程只入队，由后台线程发送钉钉/邮件（默认）
+#   false: 在检查线程内同步发送（旧版行为）
+#
+# notify_queue_size: 通知队列容量，队列满时丢弃新通知
+# notify_max_retries: 发送失败后的最大重试次数
+# notify_retry_base_seconds: 首次重试等待秒数，之后每次翻倍（上限 300 秒）
+# =============================================================================
+notify_async = _env_bool("URL_CHECK_NOTIFY_ASYNC", True)
+notify_queue_size = _env_int("URL_CHECK_NOTIFY_QUEUE_SIZE", 1000)
+notify_max_retries = _env_int("URL_CHECK_NOTIFY_MAX_RETRIES", 3)
+notify_retry_base_seconds = _env_int("URL_CHECK_NOTIFY_RETRY_BASE_SECONDS", 2)
+
+# =============================================================================
+# 调度器 Leader 选举配置
+# =============================================================================
+# leader_election: 多进程/多副本时保证只有一个调度器运行检查
+#   file: 本机文件锁，适用于 gunicorn 多 worker（默认）
+#   k8s:  Kubernetes Lease，适用于多副本部署（需要 k8s/rbac.yaml）
+#   off:  不选举，每个进程都运行调度器（旧版行为）
+#
+# leader_lock_file: file 模式的锁文件路径
+# leader_lease_name: k8s 模式的 Lease 名称
+# leader_lease_seconds: Lease 有效期，leader 失联超过该时间后由 standby 接管
+# leader_retry_seconds: 续约/抢占间隔
+#
+# leader_forward_port: leader 进程的转发端口，standby 把任务操作与进程内统计请求转发到这里
+#   file 模式监听 127.0.0.1；k8s 模式监听 0.0.0.0，并通过 Lease 注解公布 POD_IP:端口
+#   0: 不转发，standby 直接返回 409
+# leader_forward_timeout: 转发超时（秒）
+# =============================================================================
+leader_election = _env_str("URL_CHECK_LEADER_ELECTION", "file").lower()
+leader_lock_file = _env_str("URL_CHECK_LEADER_LOCK_FILE", "data/scheduler.lock")
+leader_lease_name = _env_str("URL_CHECK_LEADER_LEASE_NAME", "url-check-scheduler")
+leader_lease_seconds = _env_int("URL_CHECK_LEADER_LEASE_SECONDS", 15)
+leader_retry_seconds = _env_int("URL_CHECK_LEADER_RETRY_SECONDS", 5)
+leader_forward_port = _env_int("URL_CHECK_LEADER_FORWARD_PORT", 4001)
+leader_forward_timeout = _env_int("URL_CHECK_LEADER_FORWARD_TIMEOUT", 10)
+
+# =============================================================================
+# 任务分片配置
+# =============================================================================
+# shard_count: 分片总数，>1 时每个实例按一致性哈希（任务名）只调度一部分任务
+# shard_index: 本实例分片序号（0 起）
+#   -1: 从主机名末尾序号推导（StatefulSet Pod 名 url-check-2 -> 2）
+#
+# 分片数变化时只有约 1/N 的任务迁移；Leader 选举按分片独立进行
+# =============================================================================
+shard_count = _env_int("URL_CHECK_SHARD_COUNT", 1)
+shard_index = _env_int("URL_CHECK_SHARD_INDEX", -1)
+
+# =============================================================================
+# 调度打散配置
+# =============================================================================
+# schedule_spread: 按任务名哈希把触发时刻固定错开到周期内（默认开启）
+#   关闭后所有任务从加载时刻开始计时，同周期任务会在同一秒触发
+#
+# schedule_jitter_seconds: 每次触发额外的随机抖动上限（秒，0 不抖动，上限为半个周期）
+# =============================================================================
+schedule_spread = _env_bool("URL_CHECK_SCHEDULE_SPREAD", True)
+schedule_jitter_seconds = _env_int("URL_CHECK_SCHEDULE_JITTER_SECONDS", 0)
+
 
 def _masked(value):
     if not value:
@@ -1,9 +1,24 @@
 def post_fork(worker, log):
-    """Initialize scheduler in worker process after fork."""
+    """Initialize scheduler in worker process after fork.
+
+    Only the worker elected as leader (URL_CHECK_LEADER_ELECTION) runs checks;
+    the others serve the HTTP API and take over if the leader exits.
+    """
     import sys
 
     sys.path.insert(0, "/home/appuser")
     from url_check import _init_scheduler
+    from view import leader
 
     _init_scheduler(force=True)
-    print(f"Scheduler reinitialized in worker {worker.pid}")
+    print(f"Scheduler initialized in worker {worker.pid}, role={leader.role()}")
+
+
+def child_exit(server, worker):
+    """Drop metrics of exited workers in prometheus multiprocess mode."""
+    import os
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -5,15 +5,35 @@ import sys
 
 sys.path.insert(0, "/home/appuser")
 
+from view import check_log, leader
 from view.make_check_instan import load_config
 
 
 def main():
-    lt = load_config()
-    lt.loading_task()
-    print("Scheduler started in separate process")
     import time
 
+    check_log.configure()
+    state = {}
+
+    def start():
+        lt = load_config()
+        lt.loading_task()
+        state["scheduler"] = lt
+        print("Scheduler started in separate process")
+
+    def stop():
+        lt = state.pop("scheduler", None)
+        if lt is not None:
+            lt.shut_sched()
+        print("Scheduler stopped: leadership lost")
+
+    # 与 web worker 参与同一选举，保证全局只有一个调度器在运行检查
+    if leader.election_mode() == "off":
+        start()
+    else:
+        leader.start_election(on_started_leading=start, on_stopped_leading=stop)
+        print(f"Scheduler runner role={leader.role()}")
+
     while True:
         time.sleep(60)
 
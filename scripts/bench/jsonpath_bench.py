@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-check JSON validation cost.
+
+Compares the old per-check `jsonpath_ng.parse(expr)` flow with the
+precompiled matcher that tasks now carry (see compile_json_path).
+
+Usage:
+    python3 scripts/bench/jsonpath_bench.py [--iterations 5000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from jsonpath_ng import parse
+
+from view.checke_control import cherker, compile_json_path
+
+CONTENT = json.dumps(
+    {
+        "status": {"indicator": "none", "description": "All Systems Operational"},
+        "page": {"id": "kctbh9vrtdwd", "name": "GitHub"},
+        "components": [{"id": i, "status": "operational"} for i in range(20)],
+    }
+)
+EXPRESSIONS = ["$.status.indicator", "$.components[3].status", "$.page.name"]
+
+
+def _parse_per_check(expr):
+    # 旧实现：每次检查都重新解析表达式
+    data = json.loads(CONTENT)
+    return parse(expr).find(data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    checker = cherker(method="get")
+    checker.task_name = "bench-jsonpath"
+
+    print(f"{'expression':28} {'parse/check (us)':>18} {'compiled (us)':>15} {'speedup':>8}")
+    for expr in EXPRESSIONS:
+        matcher = compile_json_path(expr)
+        before = timeit.timeit(lambda: _parse_per_check(expr), number=args.iterations)
+        after = timeit.timeit(
+            lambda: checker.validate_json(
+                CONTENT,
+                expect_json=True,
+                json_path_expr=expr,
+                json_path_value="x",
+                json_path_matcher=matcher,
+            ),
+            number=args.iterations,
+        )
+        before_us = before / args.iterations * 1e6
+        after_us = after / args.iterations * 1e6
+        print(f"{expr:28} {before_us:18.1f} {after_us:15.1f} {before_us / after_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""Load test: end-to-end probe pipeline throughput.
+
+Starts a local fake HTTP/HTTPS server farm (separate processes, configurable
+latency / error rate / body size), generates N synthetic tasks and runs them
+through the real `load_config` -> scheduler -> run_probe/async engine ->
+`cherker.make_data` path. Each task count runs in a fresh child process so
+CPU/RSS numbers are not polluted by the previous run.
+
+Reported per task count:
+    checks/sec (completed make_data calls), expected checks/sec,
+    scheduling lag percentiles (actual job start vs scheduled fire time),
+    CPU seconds / CPU% and RSS of the probe process.
+
+Usage:
+    python3 scripts/bench/load_test.py --tasks 100,1000,10000 --duration 60
+    python3 scripts/bench/load_test.py --tasks 1000 --engine asyncio \\
+        --latency-ms 200 --error-rate 0.05 --https-ratio 0.5 --output bench.json
+    python3 scripts/bench/load_test.py --tasks 1000 --compare bench.json
+"""
+
+import argparse
+import datetime
+import http.server
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+# =============================================================================
+# 模拟目标服务
+# =============================================================================
+
+
+def _make_handler(latency_ms, jitter_ms, error_rate, body):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            if random.random() < error_rate:
+                payload, code = b"error", 503
+            else:
+                payload, code = body, 200
+            self.send_response(code)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _respond
+        do_POST = _respond
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _serve(port, tls_files, latency_ms, jitter_ms, error_rate, body_size):
+    body = (b"ok " + b"x" * max(body_size - 3, 0))[:max(body_size, 2)]
+    handler = _make_handler(latency_ms, jitter_ms, error_rate, body)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    # 客户端超时断开等异常不打印堆栈
+    server.handle_error = lambda request, client_address: None
+    if tls_files:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*tls_files)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.serve_forever()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _make_cert(workdir):
+    cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "30", "-subj", "/CN=127.0.0.1",
+            "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def start_farm(args, workdir):
+    """启动模拟服务进程，返回 (进程列表, http 端口, https 端口, 证书路径)"""
+    procs, http_ports, https_ports, cert = [], [], [], None
+    tls_files = None
+    if args.https_ratio > 0:
+        tls_files = _make_cert(workdir)
+        cert = tls_files[0]
+    for tls in [None] * args.servers + ([tls_files] * args.servers if tls_files else []):
+        port = _free_port()
+        p = multiprocessing.Process(
+            target=_serve,
+            args=(port, tls, args.latency_ms, args.jitter_ms, args.error_rate, args.body_size),
+            daemon=True,
+        )
+        p.start()
+        procs.append(p)
+        (https_ports if tls else http_ports).append(port)
+
+    deadline = time.time() + 10
+    for port in http_ports + https_ports:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError(f"模拟服务启动失败: {port}")
+                time.sleep(0.05)
+    return procs, http_ports, https_ports, cert
+
+
+# =============================================================================
+# 单次压测（子进程）
+# =============================================================================
+
+
+def _tasks_yaml(n, args, http_ports, https_ports):
+    rnd = random.Random(42)
+    tasks = []
+    for i in range(n):
+        use_https = https_ports and rnd.random() < args.https_ratio
+        port = rnd.choice(https_ports if use_https else http_ports)
+        scheme = "https" if use_https else "http"
+        tasks.append(
+            {
+                "name": f"bench-{i:05d}",
+                "method": "post" if args.post_ratio and rnd.random() < args.post_ratio else "get",
+                "url": f"{scheme}://127.0.0.1:{port}/t/{i}",
+                "timeout": args.timeout,
+                "interval": args.interval,
+                "payload": "ping",
+                "threshold": {"stat_code": 200, "math_str": "ok", "delay": 1000},
+                "ssl": {"verify": True, "warning_days": 0},
+            }
+        )
+    return {"tasks": tasks}
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return round(values[k], 2)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return None
+
+
+def run_worker(args):
+    """在当前进程中运行一次压测，结果以 JSON 输出到 stdout"""
+    import yaml
+
+    # 检查过程的打印输出丢弃，stdout 只保留结果 JSON
+    result_out = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    workdir = args.workdir
+    os.chdir(workdir)
+    os.makedirs("conf", exist_ok=True)
+    shutil.copy(ROOT / "conf" / "alerts.yaml", "conf/alerts.yaml")
+    tasks_file = os.path.join(workdir, "conf", "tasks.yaml")
+    ports = json.loads(args.ports)
+    with open(tasks_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump(
+            _tasks_yaml(args.tasks_n, args, ports["http"], ports["https"]), f
+        )
+
+    from conf import config
+
+    config.tasks_yaml = tasks_file
+    config.enable_dingding = False
+    config.enable_mail = False
+    config.check_engine = args.engine
+
+    from view import checke_control
+    from view.make_check_instan import load_config
+
+    completed = [0]
+    lags = []
+    lock = threading.Lock()
+    original_make_data = checke_control.cherker.make_data
+
+    def counting_make_data(self, data_dict):
+        try:
+            return original_make_data(self, data_dict)
+        finally:
+            with lock:
+                completed[0] += 1
+
+    checke_control.cherker.make_data = counting_make_data
+
+    def timed(func, start_ts, interval):
+        def wrapper(*a, **kw):
+            # 打散后的触发时刻满足 (t - start) % interval == 0
+            lag = (time.time() - start_ts) % interval
+            with lock:
+                lags.append(lag * 1000)
+            return func(*a, **kw)
+
+        return wrapper
+
+    lt = load_config()
+    t0 = time.time()
+    lt.loading_task()
+    for job in lt.sched.get_jobs():
+        job.modify(func=timed(job.func, job.trigger.start_date.timestamp(), args.interval))
+    load_seconds = time.time() - t0
+
+    # 预热一个周期（首次建连、TLS 握手、证书缓存），之后开始计数
+    time.sleep(min(args.interval, args.duration / 2))
+    with lock:
+        completed[0] = 0
+        lags.clear()
+    cpu0, wall0 = time.process_time(), time.time()
+    time.sleep(args.duration)
+    cpu1, wall1 = time.process_time(), time.time()
+    with lock:
+        checks = completed[0]
+        lag_values = list(lags)
+    lt.sched.shutdown(wait=False)
+
+    elapsed = wall1 - wall0
+    result = {
+        "tasks": args.tasks_n,
+        "engine": args.engine,
+        "duration_seconds": round(elapsed, 2),
+        "load_seconds": round(load_seconds, 3),
+        "checks": checks,
+        "checks_per_sec": round(checks / elapsed, 2),
+        "expected_checks_per_sec": round(args.tasks_n / args.interval, 2),
+        "lag_ms": {
+            "p50": _percentile(lag_values, 50),
+            "p90": _percentile(lag_values, 90),
+            "p99": _percentile(lag_values, 99),
+            "max": round(max(lag_values), 2) if lag_values else None,
+        },
+        "cpu_seconds": round(cpu1 - cpu0, 2),
+        "cpu_percent": round(100.0 * (cpu1 - cpu0) / elapsed, 1),
+        "rss_mb": _rss_mb(),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+    }
+    result_out.write(json.dumps(result) + "\n")
+    result_out.flush()
+    os._exit(0)
+
+
+# =============================================================================
+# 汇总与对比
+# =============================================================================
+
+
+def _version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _print_table(results, baseline=None):
+    base = {r["tasks"]: r for r in (baseline or {}).get("results", [])}
+    print(
+        f"{'tasks':>6} {'checks/s':>9} {'expect/s':>9} {'lag p50':>8} {'lag p99':>8} "
+        f"{'cpu%':>6} {'rss MB':>7}" + ("  vs baseline" if base else "")
+    )
+    for r in results:
+        line = (
+            f"{r['tasks']:>6} {r['checks_per_sec']:>9} {r['expected_checks_per_sec']:>9} "
+            f"{r['lag_ms']['p50']!s:>8} {r['lag_ms']['p99']!s:>8} "
+            f"{r['cpu_percent']:>6} {r['rss_mb']!s:>7}"
+        )
+        old = base.get(r["tasks"])
+        if old:
+            def _ratio(new, prev):
+                return f"{new / prev:.2f}x" if new and prev else "-"
+
+            line += "  checks/s {} lag_p99 {} cpu {} rss {}".format(
+                _ratio(r["checks_per_sec"], old["checks_per_sec"]),
+                _ratio(r["lag_ms"]["p99"], old["lag_ms"]["p99"]),
+                _ratio(r["cpu_seconds"], old["cpu_seconds"]),
+                _ratio(r["rss_mb"], old["rss_mb"]),
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", default="100,1000,10000", help="逗号分隔的任务数列表")
+    parser.add_argument("--duration", type=float, default=60, help="每档计数时长（秒，不含预热）")
+    parser.add_argument("--interval", type=int, default=10, help="任务调度间隔（秒）")
+    parser.add_argument("--timeout", type=int, default=5, help="任务请求超时（秒）")
+    parser.add_argument("--engine", choices=["thread", "asyncio"], default="thread")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--body-size", type=int, default=1024)
+    parser.add_argument("--https-ratio", type=float, default=0.0, help="HTTPS 任务比例")
+    parser.add_argument("--post-ratio", type=float, default=0.0, help="POST 任务比例")
+    parser.add_argument("--servers", type=int, default=4, help="模拟服务进程数（HTTP/HTTPS 各）")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="对比的历史结果 JSON")
+    # 内部参数：子进程执行单档压测
+    parser.add_argument("--_worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--tasks-n", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--ports", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._worker:
+        run_worker(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="url-check-bench-")
+    procs, http_ports, https_ports, cert = start_farm(args, workdir)
+    env = dict(os.environ)
+    if cert:
+        # 自签证书加入信任，走 verify=True 的完整证书路径
+        env["REQUESTS_CA_BUNDLE"] = cert
+        env["SSL_CERT_FILE"] = cert
+    ports = json.dumps({"http": http_ports, "https": https_ports})
+
+    results = []
+    try:
+        for n in [int(x) for x in args.tasks.split(",") if x.strip()]:
+            run_dir = os.path.join(workdir, f"run-{n}")
+            os.makedirs(run_dir)
+            cmd = [
+                sys.executable, os.path.abspath(__file__), "--_worker",
+                "--tasks-n", str(n), "--workdir", run_dir, "--ports", ports,
+            ]
+            for name in (
+                "duration", "interval", "timeout", "engine", "https_ratio", "post_ratio",
+            ):
+                cmd += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+            print(f"running {n} tasks ({args.engine}) ...", file=sys.stderr)
+            proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+            if proc.returncode != 0 or not lines:
+                print(proc.stderr[-2000:], file=sys.stderr)
+                raise SystemExit(f"{n} 任务压测失败")
+            results.append(json.loads(lines[-1]))
+    finally:
+        for p in procs:
+            p.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "version": _version(),
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "params": {
+            k: getattr(args, k)
+            for k in (
+                "duration", "interval", "timeout", "engine", "latency_ms", "jitter_ms",
+                "error_rate", "body_size", "https_ratio", "post_ratio", "servers",
+            )
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: task object memory and per-check preparation cost.
+
+Compares the old per-method task classes (instance __dict__, proxy resolved
+and result dict assembled on every check) with the compiled ProbeSpec.
+
+Usage:
+    python3 scripts/bench/probe_spec_mem.py [--tasks 10000] [--proxy]
+"""
+
+import argparse
+import datetime
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from conf import config
+from view.checke_control import compile_json_path
+from view.http_sessions import get_session
+from view.probe_spec import ProbeSpec
+
+
+class LegacyTask:
+    # 旧实现 get_method/post_method 的字段布局
+    def __init__(self, task):
+        retry = task.get("retry") or {}
+        ssl_conf = task.get("ssl") or {}
+        self.task_name = task["name"]
+        self.url = task["url"]
+        self.header = task.get("headers")
+        self.payload = task.get("payload")
+        self.timeout = task.get("timeout", 10)
+        self.cookies = task.get("cookies")
+        self.threshold = task.get("threshold")
+        self.max_response_size = task.get("max_response_size")
+        self.retry_count = retry.get("count", 0)
+        self.retry_delay = retry.get("delay", 1)
+        self.proxy = task.get("proxy")
+        self.ssl_verify = ssl_conf.get("verify", True)
+        self.ssl_warning_days = ssl_conf.get("warning_days", 30)
+        self.expect_json = task.get("expect_json", False)
+        self.json_path = task.get("json_path")
+        self.json_path_value = task.get("json_path_value")
+        self.json_path_matcher = compile_json_path(self.json_path)
+        self.deadline = task.get("deadline")
+
+    def prepare(self, stat_code, resp_time, contents):
+        # 旧实现每次检查：重新解析代理、构建 proxies 与结果字典
+        now_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        proxy = self.proxy
+        if proxy:
+            proxy = proxy.replace("__HOST__", getattr(config, "HOST_IP", "host.docker.internal"))
+        proxies = {"http": proxy, "https": proxy} if proxy else None
+        data = {
+            "url_name": self.task_name,
+            "url": self.url,
+            "stat_code": stat_code,
+            "timeout": 0,
+            "resp_time": resp_time,
+            "contents": contents,
+            "time": now_time,
+            "threshold": self.threshold,
+            "expect_json": self.expect_json,
+            "json_path": self.json_path,
+            "json_path_value": self.json_path_value,
+            "json_path_matcher": self.json_path_matcher,
+            "ssl_expiry_days": None,
+            "ssl_warning_days": self.ssl_warning_days,
+        }
+        return proxies, data
+
+
+def _spec_prepare(spec, stat_code, resp_time, contents):
+    # 代理配置在按代理复用的会话上（view/http_sessions.py）
+    now_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return get_session(spec.proxy), spec.result_data(stat_code, resp_time, contents, now_time, None)
+
+
+def _make_tasks(count, proxy):
+    tasks = []
+    for i in range(count):
+        task = {
+            "name": f"task-{i}",
+            "url": f"https://service-{i % 50}.example.com/health/{i}",
+            "method": "get" if i % 2 else "post",
+            "headers": {"User-Agent": "url-check"},
+            "threshold": {"stat_code": 200, "delay": 500},
+            "retry": {"count": 1, "delay": 1},
+        }
+        if proxy:
+            task["proxy"] = "http://__HOST__:3128"
+        tasks.append(task)
+    return tasks
+
+
+def _retained(build, tasks):
+    tracemalloc.start()
+    objs = build(tasks)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objs, current
+
+
+def _per_check_bytes(fn, n=1000):
+    # 保留每次检查准备出的对象，统计平均新分配的字节数
+    tracemalloc.start()
+    kept = [fn() for _ in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--proxy", action="store_true", help="所有任务配置 __HOST__ 代理")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    legacy, legacy_bytes = _retained(
+        lambda ts: [LegacyTask(t) for t in ts], _make_tasks(args.tasks, args.proxy)
+    )
+    specs, spec_bytes = _retained(
+        lambda ts: [ProbeSpec.from_task(t) for t in ts], _make_tasks(args.tasks, args.proxy)
+    )
+
+    print(f"tasks: {args.tasks}  proxy: {args.proxy}")
+    print(f"{'':24} {'legacy':>12} {'ProbeSpec':>12}")
+    print(f"{'retained (KiB)':24} {legacy_bytes / 1024:12.1f} {spec_bytes / 1024:12.1f}")
+    print(
+        f"{'per task (bytes)':24} {legacy_bytes / args.tasks:12.1f} {spec_bytes / args.tasks:12.1f}"
+    )
+
+    old, new = legacy[0], specs[0]
+    old_alloc = _per_check_bytes(lambda: old.prepare(200, 12.5, "ok"))
+    new_alloc = _per_check_bytes(lambda: _spec_prepare(new, 200, 12.5, "ok"))
+    print(f"{'per-check alloc (bytes)':24} {old_alloc:12.1f} {new_alloc:12.1f}")
+
+    old_t = timeit.timeit(lambda: old.prepare(200, 12.5, "ok"), number=args.iterations)
+    new_t = timeit.timeit(lambda: _spec_prepare(new, 200, 12.5, "ok"), number=args.iterations)
+    print(
+        f"{'per-check prep (us)':24} {old_t / args.iterations * 1e6:12.2f} "
+        f"{new_t / args.iterations * 1e6:12.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: memory and cost of the per-task rolling aggregates.
+
+Registers N tasks, feeds each one a day's worth of checks, and reports the
+retained memory (which must not grow with the number of checks) plus the
+time to summarise every task's 5m/1h/24h windows, as the summary report does.
+
+Usage:
+    python3 scripts/bench/rollup_mem.py [--tasks 10000] [--checks 288]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from view.task_rollup import RollupRegistry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--checks", type=int, default=288, help="checks per task, spread over 24h")
+    args = parser.parse_args()
+
+    names = [f"bench-task-{i}" for i in range(args.tasks)]
+    tracemalloc.start()
+    registry = RollupRegistry()
+    for name in names:
+        registry.register(name, interval=60)
+    after_register = tracemalloc.get_traced_memory()[0]
+
+    start = time.time()
+    step = 86400 / args.checks
+    for k in range(args.checks):
+        now = start + k * step
+        for i, name in enumerate(names):
+            registry.record_check(name, failed=(i + k) % 50 == 0, latency_ms=(i + k) % 700, now=now)
+    after_checks = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    began = time.perf_counter()
+    end = start + 86400
+    for _, rollup in registry.snapshot():
+        rollup.window_stats(end)
+    summarise = time.perf_counter() - began
+
+    print(f"tasks={args.tasks} checks/task={args.checks}")
+    print(f"retained after register: {after_register / 1024:.0f} KiB "
+          f"({after_register / args.tasks:.0f} B/task)")
+    print(f"retained after checks:   {after_checks / 1024:.0f} KiB "
+          f"(+{(after_checks - after_register) / 1024:.0f} KiB)")
+    print(f"summarise all windows:   {summarise * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
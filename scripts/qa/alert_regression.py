@@ -17,7 +17,9 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from conf import config
+from view import alert_log
 from view.checke_control import cherker
+from view.state_store import state_store
 
 
 def _log_file() -> Path:
@@ -47,9 +49,7 @@ def _new_entries(path: Path, start: int):
 
 
 def _cleanup_state(task_name: str):
-    p = Path("data") / f"{task_name}.pkl"
-    if p.exists():
-        p.unlink()
+    state_store.remove(task_name)
 
 
 def _make_payload(
@@ -119,6 +119,7 @@ def main():
         )
     )
 
+    alert_log.flush()
     rows = _new_entries(log_path, before)
 
     bad_status = [
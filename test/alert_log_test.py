@@ -0,0 +1,69 @@
+import json
+import time
+
+from view.alert_log import AlertLogWriter
+
+
+def _entry(day, n):
+    return {"timestamp": f"{day} 10:00:0{n}", "type": "故障", "task_name": "t", "message": str(n)}
+
+
+def _lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_alert_log_buffers_and_rotates(tmp_path):
+    writer = AlertLogWriter(str(tmp_path), retention_days=0, buffer_lines=3, flush_seconds=60)
+    day1 = tmp_path / "alert_2026-03-01.log"
+    day2 = tmp_path / "alert_2026-03-02.log"
+
+    writer.write(_entry("2026-03-01", 1))
+    writer.write(_entry("2026-03-01", 2))
+    time.sleep(0.1)
+    # 缓冲未满且未到刷新间隔，不写文件
+    assert _lines(day1) == []
+
+    writer.write(_entry("2026-03-01", 3))
+    deadline = time.monotonic() + 2
+    while len(_lines(day1)) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [x["message"] for x in _lines(day1)] == ["1", "2", "3"]
+
+    # 日期变化时切换文件，句柄保持打开
+    writer.write(_entry("2026-03-02", 4))
+    assert writer.flush(timeout=2)
+    assert [x["message"] for x in _lines(day2)] == ["4"]
+    assert writer._file_day == "2026-03-02" and not writer._file.closed
+
+
+def test_alert_log_cleanup_keeps_recent_files(tmp_path):
+    (tmp_path / "alert_2000-01-01.log").write_text("old\n")
+    (tmp_path / "alert_notes.log").write_text("keep\n")
+    writer = AlertLogWriter(str(tmp_path), retention_days=7)
+    writer.write({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "message": "x"})
+    assert writer.flush(timeout=2)
+    writer.cleanup()
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ["alert_{}.log".format(time.strftime("%Y-%m-%d")), "alert_notes.log"]
+
+
+def test_cleanup_runs_without_new_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr("view.alert_log.CLEANUP_INTERVAL_SECONDS", 0.2)
+    (tmp_path / "alert_2000-01-01.log").write_text("old\n")
+    writer = AlertLogWriter(str(tmp_path), retention_days=7)
+    # 没有任何日志写入、没有打开的文件：启动后立即清理
+    writer.start()
+    deadline = time.monotonic() + 2
+    while (tmp_path / "alert_2000-01-01.log").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not (tmp_path / "alert_2000-01-01.log").exists()
+
+    # 空闲时按清理周期醒来，不会一直阻塞在队列上
+    (tmp_path / "alert_2000-01-02.log").write_text("old\n")
+    deadline = time.monotonic() + 2
+    while (tmp_path / "alert_2000-01-02.log").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not (tmp_path / "alert_2000-01-02.log").exists()
+    assert writer._file is None
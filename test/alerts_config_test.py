@@ -0,0 +1,25 @@
+import os
+
+from conf.alerts_config import AlertConfigCache, url_check_alerts_config_parse_total
+
+
+def _parses():
+    return url_check_alerts_config_parse_total.labels(result="ok")._value.get()
+
+
+def test_alerts_yaml_parsed_once_until_mtime_changes(tmp_path):
+    path = tmp_path / "alerts.yaml"
+    path.write_text("alerts:\n  - name: timeout\n    enabled: true\n", encoding="utf-8")
+    cache = AlertConfigCache(str(path), check_interval=0)
+
+    before = _parses()
+    for _ in range(10):
+        assert cache.get("timeout")["enabled"] is True
+    assert cache.get("delay") is None
+    assert _parses() - before == 1
+
+    path.write_text("alerts:\n  - name: timeout\n    enabled: false\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get("timeout")["enabled"] is False
+    assert _parses() - before == 2
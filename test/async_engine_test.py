@@ -0,0 +1,75 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(2)
+        status = 503 if self.path == "/bad" else 200
+        body = b'{"status": "ok"}'
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run_checks(monkeypatch, tasks):
+    from view import async_engine
+    from view.probe_spec import ProbeSpec
+
+    results = {}
+    done = threading.Event()
+
+    def _make_data(self, data):
+        results[data["url_name"]] = data
+        if len(results) == len(tasks):
+            done.set()
+
+    monkeypatch.setattr("view.checke_control.cherker.make_data", _make_data)
+
+    engine = async_engine.AsyncCheckEngine(max_inflight=10, result_workers=1)
+    engine.start()
+    for name, url, deadline in tasks:
+        spec = ProbeSpec.from_task(
+            {"name": name, "url": url, "timeout": 5, "deadline": deadline}
+        )
+        engine.submit(spec, "get")
+    assert done.wait(10)
+    return results
+
+
+def test_async_engine_builds_make_data_payload(monkeypatch):
+    server = _serve()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    results = _run_checks(
+        monkeypatch,
+        [
+            ("unit-async-ok", base + "/ok", None),
+            ("unit-async-bad", base + "/bad", None),
+            ("unit-async-slow", base + "/slow", 0.5),
+        ],
+    )
+    server.shutdown()
+
+    ok = results["unit-async-ok"]
+    assert ok["stat_code"] == 200
+    assert ok["timeout"] == 0
+    assert ok["contents"] == '{"status": "ok"}'
+    assert ok["resp_time"] > 0
+
+    bad = results["unit-async-bad"]
+    assert bad["stat_code"] == 503
+    assert bad["resp_time"] == 0
+
+    assert results["unit-async-slow"]["timeout"] == 1
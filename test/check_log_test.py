@@ -0,0 +1,31 @@
+import logging
+
+from view import check_log
+
+
+def test_success_sampled_failures_and_state_changes_logged(monkeypatch, caplog):
+    monkeypatch.setattr(check_log, "_sampler", check_log.SuccessSampler(3))
+    caplog.set_level(logging.INFO, logger="url_check.check")
+
+    for _ in range(6):
+        check_log.log_result("t", "get", [], 200, 12.5, "ok", "2026-03-01 10:00:00")
+    check_log.log_result("t", "get", ["status_code"], 503, 0, "x" * 500, "2026-03-01 10:00:01")
+    check_log.log_result("t", "get", [], 200, 12.5, "ok", "2026-03-01 10:00:02")
+    check_log.log_state_change("t", {"code_warm": 0, "timeout_warm": 0}, {"code_warm": 1, "timeout_warm": 0})
+
+    messages = [(r.levelname, r.getMessage()) for r in caplog.records]
+    # 每 3 次成功输出 1 次；失败后第一次成功必输出
+    assert messages == [
+        ("INFO", "检查成功"),
+        ("INFO", "检查成功"),
+        ("WARNING", "检查失败"),
+        ("INFO", "检查成功"),
+        ("WARNING", "告警状态变化"),
+    ]
+    failed = caplog.records[2]
+    assert failed.fields["reasons"] == "status_code"
+    assert failed.fields["body"].endswith("...(500 chars)")
+    assert caplog.records[-1].fields["changes"] == "code_warm:0->1"
+
+    line = check_log.StructuredFormatter("%(message)s").format(failed)
+    assert line.startswith("检查失败 task=t method=get code=503 delay_ms=0")
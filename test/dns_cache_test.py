@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from view import dns_cache, http_sessions
+
+
+@pytest.fixture
+def fake_dns(monkeypatch):
+    real = socket.getaddrinfo
+    calls = []
+
+    def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        if dns_cache.is_ip(host):
+            return real(host, port, family, type, proto, flags)
+        calls.append(host)
+        time.sleep(0.05)
+        if host.startswith("bad."):
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(dns_cache, "dns", None)
+    monkeypatch.setattr(dns_cache, "HOSTS_PATH", "/nonexistent/hosts")
+    return calls
+
+
+class _Answer:
+    """dnspython Answer 的最小替身：可迭代的记录与 rrset.ttl"""
+
+    def __init__(self, addresses, ttl):
+        self._records = [SimpleNamespace(address=address) for address in addresses]
+        self.rrset = SimpleNamespace(ttl=ttl)
+
+    def __iter__(self):
+        return iter(self._records)
+
+
+def test_dnspython_answer_gives_addresses_and_ttl_in_one_query(fake_dns, monkeypatch):
+    queries = []
+
+    def resolve(host, rdtype, **kwargs):
+        queries.append((host, rdtype))
+        if host.startswith("hosts-only."):
+            raise LookupError("NXDOMAIN")
+        return _Answer(["127.0.0.1", "127.0.0.2"], ttl=7)
+
+    monkeypatch.setattr(dns_cache, "dns", SimpleNamespace(resolver=SimpleNamespace(resolve=resolve)))
+    cache = dns_cache.DnsCache(ttl=60, max_ttl=300)
+    infos = cache.resolve("svc.test", 80)
+    assert [info[4] for info in infos] == [("127.0.0.1", 80), ("127.0.0.2", 80)]
+    assert queries == [("svc.test", "A")] and fake_dns == []
+    # 按应答中的记录 TTL 缓存
+    expires_at = cache._entries[("svc.test", 80, socket.AF_UNSPEC)][0]
+    assert 0 < expires_at - time.monotonic() <= 7
+
+    # dnspython 解析失败时回退 getaddrinfo，使用固定 TTL
+    cache.resolve("hosts-only.test", 80)
+    assert fake_dns == ["hosts-only.test"]
+    expires_at = cache._entries[("hosts-only.test", 80, socket.AF_UNSPEC)][0]
+    assert expires_at - time.monotonic() > 50
+
+
+def test_concurrent_lookups_share_one_query_and_failures_are_cached(fake_dns):
+    cache = dns_cache.DnsCache(ttl=60, negative_ttl=60)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.resolve("svc.test", 80)))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fake_dns == ["svc.test"]
+    assert len(results) == 10 and results[0][0][4] == ("127.0.0.1", 80)
+
+    cache.resolve("svc.test", 80)
+    assert fake_dns == ["svc.test"]
+    cache.invalidate("svc.test")
+    cache.resolve("svc.test", 80)
+    assert fake_dns == ["svc.test", "svc.test"]
+
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("bad.test", 80)
+    assert fake_dns.count("bad.test") == 1
+
+
+def test_requests_use_cache_and_keep_original_host_header(fake_dns):
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append(self.headers.get("Host"))
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    registry = http_sessions.SessionRegistry(idle_seconds=0)
+    dns_cache.get_cache().clear()
+    try:
+        session = registry.get()
+        for _ in range(3):
+            # 每次新建连接，验证建连走缓存
+            assert session.get(f"http://svc.test:{port}/", timeout=5,
+                               headers={"Connection": "close"}).text == "ok"
+    finally:
+        registry.close()
+        server.shutdown()
+        dns_cache.get_cache().clear()
+
+    assert fake_dns == ["svc.test"]
+    assert seen == [f"svc.test:{port}"] * 3
+
+
+def test_hosts_file_wins_over_dnspython(fake_dns, monkeypatch, tmp_path):
+    hosts = tmp_path / "hosts"
+    hosts.write_text("127.0.0.1 localhost\n127.0.0.9 svc.test alias.test  # hostAliases\n")
+    monkeypatch.setattr(dns_cache, "HOSTS_PATH", str(hosts))
+    queries = []
+
+    def resolve(host, rdtype, **kwargs):
+        queries.append(host)
+        return _Answer(["10.0.0.1"], ttl=7)
+
+    monkeypatch.setattr(dns_cache, "dns", SimpleNamespace(resolver=SimpleNamespace(resolve=resolve)))
+    cache = dns_cache.DnsCache(ttl=60, max_ttl=300)
+    # hosts 文件中的主机不走 DNS，结果与系统解析器一致
+    assert [info[4] for info in cache.resolve("ALIAS.test", 80)] == [("127.0.0.9", 80)]
+    assert [info[4] for info in cache.resolve("localhost", 80)] == [("127.0.0.1", 80)]
+    assert queries == [] and fake_dns == []
+    assert [info[4] for info in cache.resolve("other.test", 80)] == [("10.0.0.1", 80)]
+    assert queries == ["other.test"]
@@ -0,0 +1,84 @@
+import datetime
+import json
+
+import pytest
+
+from view import history_query
+from view.state_store import TaskStateStore
+
+
+def _record(moment, code=200, delay=50, **flags):
+    record = {
+        "time": moment.strftime("%Y-%m-%d %H:%M:%S"),
+        "code": code,
+        "delay": delay,
+        "stat_code": 0,
+        "timeout": 0,
+    }
+    record.update(flags)
+    return record
+
+
+def test_history_range_uses_index_and_downsamples(monkeypatch, tmp_path):
+    store = TaskStateStore(str(tmp_path))
+    base = datetime.datetime(2026, 3, 1, 10, 0, 0)
+    clock = {"now": base.timestamp()}
+    monkeypatch.setattr("view.state_store.time.time", lambda: clock["now"])
+
+    for i in range(10):
+        moment = base + datetime.timedelta(minutes=i)
+        clock["now"] = moment.timestamp()
+        failed = {"stat_code": 1} if i == 6 else {}
+        store.append_record("t", "2026-03-01", _record(moment, delay=10 * (i + 1), **failed))
+        store.append_record("t", "2026-03-01", _record(moment + datetime.timedelta(seconds=30), delay=500))
+
+    start = base + datetime.timedelta(minutes=5)
+    end = base + datetime.timedelta(minutes=8)
+    # 索引定位到 start 所在分钟，之前的记录不再读取
+    offset = store.seek_offset("t", "2026-03-01", start.timestamp())
+    assert offset > 0
+    assert next(store.iter_records("t", "2026-03-01", offset))["time"] == "2026-03-01 10:05:00"
+
+    raw = list(history_query.iter_range("t", start, end, store))
+    assert [r["time"][-5:] for r in raw] == ["05:00", "05:30", "06:00", "06:30", "07:00", "07:30"]
+
+    buckets = list(history_query.iter_history("t", start, end, "1m", store))
+    assert [b["time"] for b in buckets] == [
+        "2026-03-01 10:05:00",
+        "2026-03-01 10:06:00",
+        "2026-03-01 10:07:00",
+    ]
+    assert (buckets[1]["checks"], buckets[1]["failures"]) == (2, 1)
+    latency = buckets[1]["latency_ms"]
+    assert (latency["min"], latency["avg"], latency["max"]) == (70, 285, 500)
+    assert 300 < latency["p95"] <= 500
+
+    lines = list(history_query.stream_history("t", start, end, "5m", store))
+    assert len(lines) == 1
+    assert json.loads(lines[0])["checks"] == 6
+
+
+def test_history_validate_rejects_bad_queries():
+    start = datetime.datetime(2026, 3, 1)
+    end = start + datetime.timedelta(days=30)
+    history_query.validate("t", start, end, "1h")
+    with pytest.raises(ValueError):
+        history_query.validate("t", start, end, "10s")
+    with pytest.raises(ValueError):
+        history_query.validate("t", end, start, "raw")
+    with pytest.raises(ValueError):
+        history_query.validate("t", start, end, "1m")
+    with pytest.raises(ValueError):
+        history_query.validate("..", start, end, "raw")
+
+
+def test_out_of_range_times_are_rejected_as_bad_request():
+    for value in ("1e20", "-1e20", "nan", "inf"):
+        with pytest.raises(ValueError):
+            history_query.parse_time(value)
+
+    from url_check import app
+
+    client = app.test_client()
+    for query in ("end=1e20", "start=inf", "end=nan", "end=0001-01-01 00:00:00"):
+        assert client.get(f"/history/unit-history?{query}").status_code == 400
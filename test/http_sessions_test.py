@@ -0,0 +1,92 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from view import http_sessions
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def _value(metric, **labels):
+    return metric.labels(**labels)._value.get()
+
+
+def test_connections_are_reused_counted_and_reaped():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    registry = http_sessions.SessionRegistry(pool_hosts=5, pool_maxsize=2, idle_seconds=0)
+    requests_before = _value(http_sessions.url_check_http_requests_total, host="127.0.0.1")
+    new_before = _value(http_sessions.url_check_http_new_connections_total, host="127.0.0.1")
+    try:
+        session = registry.get()
+        for _ in range(5):
+            assert session.get(url, timeout=5).text == "ok"
+
+        # 5 次请求只建立 1 个连接
+        assert _value(http_sessions.url_check_http_requests_total, host="127.0.0.1") == (
+            requests_before + 5
+        )
+        assert _value(http_sessions.url_check_http_new_connections_total, host="127.0.0.1") == (
+            new_before + 1
+        )
+
+        proxied = registry.get("http://10.0.0.9:7890")
+        assert proxied is not session and proxied.proxies["https"] == "http://10.0.0.9:7890"
+        assert registry.get("http://10.0.0.9:7890") is proxied
+
+        # 空闲连接池被关闭，代理会话被移除，直连会话保留
+        assert registry.reap() == 1
+        assert registry.get() is session
+        assert registry.get("http://10.0.0.9:7890") is not proxied
+    finally:
+        registry.close()
+        server.shutdown()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    paths = []
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_task_proxy_wins_over_environment(monkeypatch):
+    from view.probe_spec import ProbeSpec, _request
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ProxyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # 环境变量中的代理不可达，请求只有走任务代理才能成功
+    monkeypatch.setenv("HTTP_PROXY", "http://127.0.0.1:1")
+    monkeypatch.setenv("HTTPS_PROXY", "http://127.0.0.1:1")
+    try:
+        spec = ProbeSpec.from_task(
+            {
+                "name": "unit-proxy-env",
+                "url": "http://probe.invalid/health",
+                "proxy": f"http://127.0.0.1:{server.server_address[1]}",
+            }
+        )
+        data = _request(spec, 5)
+        assert data["stat_code"] == 200
+        assert _ProxyHandler.paths == ["http://probe.invalid/health"]
+    finally:
+        server.shutdown()
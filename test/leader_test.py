@@ -0,0 +1,141 @@
+import datetime
+
+from view.leader import FileLeaderLock, K8sLeaseLock, LeaderElector
+
+
+def test_only_one_elector_leads_and_standby_takes_over(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    events = []
+
+    first = LeaderElector(
+        FileLeaderLock(path),
+        on_started_leading=lambda: events.append("first-start"),
+        on_stopped_leading=lambda: events.append("first-stop"),
+    )
+    second = LeaderElector(
+        FileLeaderLock(path),
+        on_started_leading=lambda: events.append("second-start"),
+    )
+
+    first._attempt()
+    second._attempt()
+    assert first.is_leader() and not second.is_leader()
+
+    first.stop()
+    second._attempt()
+    assert second.is_leader()
+    assert events == ["first-start", "first-stop", "second-start"]
+    second.stop()
+
+
+class _Resp:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class _FakeSession:
+    def __init__(self, lease):
+        self.lease = lease
+        self.puts = []
+
+    def get(self, url, **kwargs):
+        return _Resp(200, self.lease)
+
+    def put(self, url, json=None, **kwargs):
+        self.puts.append(json)
+        return _Resp(200, json)
+
+
+def test_lease_taken_over_only_after_expiry():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    lease = {
+        "metadata": {"name": "url-check-scheduler", "resourceVersion": "7"},
+        "spec": {
+            "holderIdentity": "pod-a-1",
+            "leaseDurationSeconds": 15,
+            "renewTime": K8sLeaseLock._format_time(now),
+            "leaseTransitions": 2,
+        },
+    }
+    lock = K8sLeaseLock(
+        "url-check-scheduler", namespace="ns", identity="pod-b-1", advertise="10.0.0.2:4001"
+    )
+    lock.session = _FakeSession(lease)
+    assert lock.try_acquire() is False
+    assert lock.session.puts == []
+
+    lease["spec"]["renewTime"] = K8sLeaseLock._format_time(
+        now - datetime.timedelta(seconds=60)
+    )
+    assert lock.try_acquire() is True
+    spec = lock.session.puts[-1]["spec"]
+    assert spec["holderIdentity"] == "pod-b-1"
+    assert spec["leaseTransitions"] == 3
+    assert lock.session.puts[-1]["metadata"]["resourceVersion"] == "7"
+    # 抢占成功后在 Lease 注解中公布本实例的转发地址
+    annotations = lock.session.puts[-1]["metadata"]["annotations"]
+    assert annotations["url-check/leader-address"] == "10.0.0.2:4001"
+    assert lock.leader_address == "10.0.0.2:4001"
+
+
+def test_standby_forwards_to_leader_address(monkeypatch):
+    from flask import Flask, request
+
+    from view import leader, leader_forward
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    lease = {
+        "metadata": {
+            "name": "url-check-scheduler",
+            "resourceVersion": "3",
+            "annotations": {leader.ADDRESS_ANNOTATION: ""},
+        },
+        "spec": {
+            "holderIdentity": "pod-a-1",
+            "leaseDurationSeconds": 15,
+            "renewTime": K8sLeaseLock._format_time(now),
+        },
+    }
+    leader_app = Flask("leader")
+
+    @leader_app.route("/tasks/<name>/stats")
+    def stats(name):
+        return {"task": name, "forwarded": request.headers.get(leader_forward.FORWARD_HEADER)}
+
+    server = leader_forward.ForwardServer()
+    assert server.start(leader_app, "127.0.0.1", 0)
+    try:
+        address = "127.0.0.1:{}".format(server._server.server_port)
+        lease["metadata"]["annotations"][leader.ADDRESS_ANNOTATION] = address
+        lock = K8sLeaseLock("url-check-scheduler", namespace="ns", identity="pod-b-1")
+        lock.session = _FakeSession(lease)
+        assert lock.try_acquire() is False
+        assert lock.leader_address == address
+
+        class _Elector:
+            pass
+
+        elector = _Elector()
+        elector.lock = lock
+        monkeypatch.setattr(leader, "election_mode", lambda: "k8s")
+        monkeypatch.setattr(leader, "get_elector", lambda: elector)
+
+        standby_app = Flask("standby")
+        with standby_app.test_request_context("/tasks/demo/stats"):
+            body, status, _ = leader_forward.forward(request)
+            assert status == 200 and b'"forwarded":"1"' in body.replace(b" ", b"")
+        # 已转发的请求不再转发，避免循环
+        with standby_app.test_request_context(
+            "/tasks/demo/stats", headers={leader_forward.FORWARD_HEADER: "1"}
+        ):
+            assert leader_forward.forward(request) is None
+    finally:
+        server.stop()
@@ -0,0 +1,43 @@
+import threading
+
+from view.notify_dispatcher import NotificationDispatcher
+
+
+def test_failed_send_is_retried_in_background():
+    calls = []
+
+    def flaky(subject, msg):
+        calls.append(subject)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    dispatcher = NotificationDispatcher(
+        max_queue=10, max_retries=2, retry_base=0.01, senders={"dingding": flaky}
+    )
+    assert dispatcher.enqueue("dingding", "subject", "msg")
+    assert dispatcher.flush(timeout=5)
+    assert calls == ["subject", "subject"]
+
+
+def test_enqueue_does_not_block_and_drops_when_full():
+    release = threading.Event()
+    started = threading.Event()
+    sent = []
+
+    def slow(subject, msg):
+        started.set()
+        release.wait(5)
+        sent.append(subject)
+
+    dispatcher = NotificationDispatcher(
+        max_queue=1, max_retries=0, senders={"mail": slow}
+    )
+    assert dispatcher.enqueue("mail", "a", "msg")
+    assert started.wait(5)
+    # 发送线程阻塞时：第 1 条入队成功，第 2 条因队列满被丢弃
+    assert dispatcher.enqueue("mail", "b", "msg")
+    assert not dispatcher.enqueue("mail", "c", "msg")
+
+    release.set()
+    assert dispatcher.flush(timeout=5)
+    assert sent == ["a", "b"]
@@ -0,0 +1,89 @@
+import datetime
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from view.checke_control import cherker
+from view.probe_spec import ProbeSpec, run_probe
+from view.state_store import TaskStateStore
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(0.1)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_phases_recorded_and_zero_on_reused_connection(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    results = []
+    monkeypatch.setattr(
+        "view.checke_control.cherker.make_data", lambda self, data: results.append(data)
+    )
+    spec = ProbeSpec.from_task(
+        {"name": "unit-phases", "url": f"http://127.0.0.1:{server.server_address[1]}/"}
+    )
+    try:
+        run_probe(spec)
+        run_probe(spec)
+    finally:
+        server.shutdown()
+
+    first, second = results[0]["phases"], results[1]["phases"]
+    assert set(first) == {"dns", "connect", "tls", "ttfb", "download"}
+    assert first["ttfb"] >= 90 and first["tls"] == 0
+    assert second["ttfb"] >= 90
+    assert second["dns"] == second["connect"] == 0
+
+    with pytest.raises(ValueError):
+        ProbeSpec.from_task(
+            {"name": "unit-phases-bad", "url": "http://x", "threshold": {"delay_phase": "total"}}
+        )
+
+
+def test_tls_phase_rejected_for_asyncio_engine(monkeypatch):
+    task = {"name": "unit-phases-tls", "url": "https://x", "threshold": {"delay_phase": "tls"}}
+    assert ProbeSpec.from_task(dict(task)).threshold["delay_phase"] == "tls"
+    # asyncio 引擎不记录 tls 阶段，加载时直接报错而不是静默回退为总耗时
+    monkeypatch.setattr("conf.config.check_engine", "asyncio", raising=False)
+    with pytest.raises(ValueError, match="tls"):
+        ProbeSpec.from_task(task)
+
+
+def test_delay_alert_compares_configured_phase(monkeypatch, tmp_path):
+    monkeypatch.setattr("view.checke_control.state_store", TaskStateStore(str(tmp_path)))
+    monkeypatch.setattr("view.checke_control.STATE_DIR", str(tmp_path))
+    monkeypatch.setattr("conf.config.enable_alerts", False, raising=False)
+
+    def payload(ttfb):
+        return {
+            "url_name": "unit-delay-phase",
+            "url": "http://x",
+            "stat_code": 200,
+            "timeout": 0,
+            "resp_time": 900,
+            "contents": "",
+            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "threshold": {"stat_code": 200, "delay": 500, "delay_phase": "ttfb"},
+            "phases": {"dns": 0.0, "connect": 0.0, "tls": 0.0, "ttfb": ttfb, "download": 1.0},
+        }
+
+    ck = cherker(method="get")
+    ck.make_data(payload(100))
+    # 总耗时超过阈值，但 TTFB 正常，不告警
+    assert ck.delay == 0
+    ck = cherker(method="get")
+    ck.make_data(payload(700))
+    assert ck.delay == 1
+    assert ck.message["stat_delay"].startswith("- 阶段: ttfb\n- 期望: <500ms\n- 实际: 700ms")
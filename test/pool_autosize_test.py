@@ -0,0 +1,54 @@
+import threading
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from view.pool_autosize import AdaptiveThreadPoolExecutor
+
+
+def _noop():
+    pass
+
+
+def test_pool_is_sized_by_littles_law_within_bounds():
+    executor = AdaptiveThreadPoolExecutor(min_workers=2, max_limit=8, resize_seconds=0)
+    sched = BackgroundScheduler(executors={"default": executor})
+    sched.start(paused=True)
+    try:
+        for i in range(20):
+            sched.add_job(_noop, "interval", seconds=2, id=f"unit-pool-{i}")
+        # 10 次/秒 x 默认 1 秒耗时 x 1.25 余量
+        assert executor.arrival_rate() == 10
+        assert executor.recommended_size() == 13
+        assert executor.target_size() == 8
+
+        for _ in range(30):
+            executor._observe(0.0, 0.1)
+        assert executor.recommended_size() == 2
+        # 缩容不低于上个窗口观察到的并发
+        executor.resize(8)
+        executor._peak_busy = 5
+        assert executor.target_size() == 5
+    finally:
+        sched.shutdown(wait=False)
+
+
+def test_resize_swaps_pool_in_both_directions():
+    executor = AdaptiveThreadPoolExecutor(min_workers=2, max_limit=8, resize_seconds=0)
+    release = threading.Event()
+    small = executor._pool
+    futures = [small.submit(release.wait, 5) for _ in range(2)]
+
+    # 扩容：旧线程池占满时，新线程池立即可用
+    executor.resize(6)
+    pool = executor._pool
+    assert pool is not small and executor.max_workers == 6
+    assert pool.submit(lambda: "ok").result(timeout=5) == "ok"
+    futures += [pool.submit(release.wait, 5) for _ in range(6)]
+
+    executor.resize(3)
+    assert executor._pool is not pool and executor.max_workers == 3
+    assert executor._pool.submit(lambda: "ok").result(timeout=5) == "ok"
+    # 旧线程池中已提交的任务照常执行完
+    release.set()
+    assert all(f.result(timeout=5) for f in futures)
+    executor.shutdown()
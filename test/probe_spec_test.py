@@ -0,0 +1,72 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from view.probe_spec import ProbeSpec, run_probe
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self, body):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._reply(b"ok")
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._reply(b"put:" + self.rfile.read(length))
+
+    def log_message(self, *args):
+        pass
+
+
+def test_spec_is_compiled_once_and_immutable(monkeypatch):
+    monkeypatch.setattr("conf.config.HOST_IP", "10.0.0.9", raising=False)
+    spec = ProbeSpec.from_task(
+        {"name": "unit-spec", "method": "POST", "url": "http://x", "proxy": "http://__HOST__:7890"}
+    )
+    assert spec.method == "post"
+    assert spec.proxy == "http://10.0.0.9:7890"
+    assert spec.threshold == {"stat_code": 200}
+    assert not hasattr(spec, "__dict__")
+    with pytest.raises(AttributeError):
+        spec.url = "http://y"
+
+    with pytest.raises(ValueError):
+        ProbeSpec.from_task({"name": "unit-spec-bad", "method": "patch", "url": "http://x"})
+    with pytest.raises(ValueError):
+        ProbeSpec.from_task(
+            {"name": "unit-spec-head", "method": "head", "url": "http://x",
+             "threshold": {"math_str": "ok"}}
+        )
+
+
+def test_head_and_put_share_the_executor(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    results = {}
+    monkeypatch.setattr(
+        "view.checke_control.cherker.make_data",
+        lambda self, data: results.setdefault(data["url_name"], (self.method, data)),
+    )
+    try:
+        run_probe(ProbeSpec.from_task({"name": "unit-head", "method": "head", "url": base}))
+        run_probe(
+            ProbeSpec.from_task(
+                {"name": "unit-put", "method": "put", "url": base, "payload": "v1",
+                 "threshold": {"math_str": "put:v1"}}
+            )
+        )
+    finally:
+        server.shutdown()
+
+    method, data = results["unit-head"]
+    assert method == "head" and data["stat_code"] == 200 and data["contents"] == ""
+    method, data = results["unit-put"]
+    assert method == "put" and data["contents"] == "put:v1"
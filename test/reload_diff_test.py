@@ -0,0 +1,54 @@
+import yaml
+
+from view.make_check_instan import load_config, url_check_config_reload_tasks
+
+
+def _write(path, tasks):
+    path.write_text(yaml.safe_dump({"tasks": tasks}), encoding="utf-8")
+
+
+def _task(name, **extra):
+    return dict({"name": name, "url": f"http://{name}.local/", "interval": 3600}, **extra)
+
+
+def test_reload_only_touches_changed_tasks(monkeypatch, tmp_path):
+    tasks_yaml = tmp_path / "tasks.yaml"
+    _write(tasks_yaml, [_task("unit-keep"), _task("unit-edit"), _task("unit-drop")])
+    monkeypatch.setattr("conf.config.tasks_yaml", str(tasks_yaml))
+
+    lt = load_config()
+    lt.loading_task()
+    try:
+        kept = lt.sched.get_job("unit-keep")
+        kept_run, kept_spec = kept.next_run_time, kept.args[0]
+
+        # 字段顺序变化不算修改
+        _write(
+            tasks_yaml,
+            [
+                {"interval": 3600, "url": "http://unit-keep.local/", "name": "unit-keep"},
+                _task("unit-edit", timeout=3),
+                _task("unit-new"),
+            ],
+        )
+        assert lt.safe_reload_config() is True
+
+        assert sorted(lt.get_jobs()) == ["unit-edit", "unit-keep", "unit-new"]
+        kept = lt.sched.get_job("unit-keep")
+        assert kept.args[0] is kept_spec and kept.next_run_time == kept_run
+        assert lt.sched.get_job("unit-edit").args[0].timeout == 3
+        counts = {
+            change: url_check_config_reload_tasks.labels(change=change)._value.get()
+            for change in ("added", "changed", "removed", "unchanged")
+        }
+        assert counts == {"added": 1, "changed": 1, "removed": 1, "unchanged": 1}
+
+        # 修改后编译失败时保留旧任务
+        _write(
+            tasks_yaml,
+            [_task("unit-keep"), _task("unit-edit", method="patch"), _task("unit-new")],
+        )
+        lt.safe_reload_config()
+        assert lt.sched.get_job("unit-edit").args[0].timeout == 3
+    finally:
+        lt.shut_sched()
@@ -67,4 +67,21 @@ def test_state_dir_created_on_first_run(monkeypatch, tmp_path):
     checker.make_data(_payload(task_name, code=200, timeout=0, content="ok"))
 
     assert (tmp_path / "data").exists()
-    assert (tmp_path / "data" / f"{task_name}.pkl").exists()
+    assert (tmp_path / "data" / f"{task_name}.state.json").exists()
+    assert len(list((tmp_path / "data" / task_name).glob("*.log"))) == 1
+
+
+def test_invalid_json_path_rejected_at_load():
+    import pytest
+    from view.make_check_instan import load_config
+
+    lt = load_config()
+    bad = {"name": "unit-bad-jsonpath", "url": "https://example.local", "json_path": "$[[["}
+    with pytest.raises(ValueError):
+        lt.add_task(bad)
+    assert lt.sched.get_job("unit-bad-jsonpath") is None
+
+    good = dict(bad, name="unit-good-jsonpath", json_path="$.status")
+    lt.add_task(good)
+    job = lt.sched.get_job("unit-good-jsonpath")
+    assert job.args[0].json_path_matcher is not None
@@ -0,0 +1,70 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from view import http_sessions
+from view.response_body import BodyReader, effective_max_size, read_response_body
+
+
+def test_keyword_split_across_chunks_stops_reading():
+    reader = BodyReader(max_size=1024, math_str="healthy", stop_on_match=True)
+    assert reader.feed(b"status: heal") is False
+    assert reader.feed(b"thy; rest") is True
+    assert reader.matched
+    assert "healthy" in reader.text()
+    assert reader.feed(b"never read") is True
+    assert reader.bytes_read == len(b"status: healthy; rest")
+
+
+def test_oversize_body_is_dropped():
+    declared = BodyReader(max_size=10, content_length="4096")
+    assert declared.done and declared.text() == ""
+    assert declared.bytes_read == 0
+
+    streamed = BodyReader(max_size=10)
+    assert streamed.feed(b"12345678") is False
+    assert streamed.feed(b"90abc") is True
+    assert streamed.oversize and streamed.text() == ""
+
+
+class _BodyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = b"status: healthy" + b"." * (100 * 1024)
+    peers = []
+
+    def do_GET(self):
+        self.peers.append(self.client_address)
+        size = int(self.path.strip("/"))
+        self.send_response(200)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        self.wfile.write(self.body[:size])
+
+    def log_message(self, *args):
+        pass
+
+
+def test_small_remainder_is_drained_so_connection_is_reused():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BodyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    registry = http_sessions.SessionRegistry(idle_seconds=0)
+    threshold = {"math_str": "healthy"}
+    try:
+        session = registry.get()
+        for size in (40 * 1024, 40 * 1024, 100 * 1024, 40 * 1024):
+            r = session.get(f"{base}/{size}", stream=True, timeout=5)
+            assert "healthy" in read_response_body(r, "unit-drain", "get", threshold=threshold)
+        first, second, third, fourth = _BodyHandler.peers
+        # 剩余正文不超过上限：读完丢弃，下一次请求复用连接
+        assert first == second == third
+        # 剩余正文过大：直接关闭连接，下一次请求新建连接
+        assert fourth != third
+    finally:
+        registry.close()
+        server.shutdown()
+
+
+def test_default_size_is_unlimited(monkeypatch):
+    monkeypatch.delattr("conf.config.max_response_size", raising=False)
+    assert effective_max_size(None) is None
+    assert effective_max_size(2048) == 2048
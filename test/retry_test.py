@@ -0,0 +1,86 @@
+import socket
+import time
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from view import retry
+from view.probe_spec import ProbeSpec, run_probe
+
+
+def _spec(**task):
+    return ProbeSpec.from_task({"name": "unit-retry", "url": "http://x", **task})
+
+
+def test_backoff_is_exponential_and_bounded_by_deadline():
+    spec = _spec(timeout=1, retry={"count": 3, "delay": 1})
+    assert retry.task_deadline(spec) == 1 * 4 + (1 + 2 + 4)
+    for attempt, (low, high) in enumerate([(0.5, 1), (1, 2), (2, 4)]):
+        assert low <= retry.next_delay(spec, attempt, 0) <= high
+    assert retry.next_delay(spec, 3, 0) is None
+
+    tight = _spec(timeout=4, deadline=5, retry={"count": 3, "delay": 1})
+    assert retry.next_delay(tight, 0, 1) is None
+
+
+def test_retry_is_rescheduled_instead_of_sleeping(monkeypatch):
+    # 已关闭的端口：连接立即被拒绝
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    results = []
+    monkeypatch.setattr(
+        "view.checke_control.cherker.make_data", lambda self, data: results.append(data)
+    )
+    monkeypatch.setattr(retry, "_scheduler", None)
+    sched = BackgroundScheduler()
+    retry.bind_scheduler(sched)
+    sched.start()
+    try:
+        spec = _spec(url=f"http://127.0.0.1:{port}/", timeout=1, retry={"count": 2, "delay": 0.2})
+        start = time.monotonic()
+        run_probe(spec)
+        # 首次失败后立即返回，重试注册在 retry jobstore 中
+        assert time.monotonic() - start < 0.15
+        assert results == []
+        assert len(sched.get_jobs(jobstore=retry.RETRY_JOBSTORE)) == 1
+
+        deadline = time.monotonic() + 5
+        while not results and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        sched.shutdown(wait=False)
+
+    assert len(results) == 1 and results[0]["timeout"] == 1
+
+
+def test_retry_longer_than_interval_still_reports_failure(monkeypatch):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    results = []
+    monkeypatch.setattr(
+        "view.checke_control.cherker.make_data", lambda self, data: results.append(data)
+    )
+    monkeypatch.setattr(retry, "_scheduler", None)
+    sched = BackgroundScheduler()
+    retry.bind_scheduler(sched)
+    sched.start()
+    try:
+        # 重试等待 0.5~1 秒，长于 0.2 秒的调度间隔：后续调度不能覆盖之前检查的重试
+        spec = _spec(url=f"http://127.0.0.1:{port}/", timeout=0.5, retry={"count": 1, "delay": 1})
+        sched.add_job(run_probe, "interval", seconds=0.2, args=[spec], id="unit-retry")
+        deadline = time.monotonic() + 5
+        while not results and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert results and results[0]["timeout"] == 1
+
+        # 删除任务时取消它所有检查的待执行重试
+        sched.pause_job("unit-retry")
+        retry.cancel_retry(sched, "unit-retry")
+        assert sched.get_jobs(jobstore=retry.RETRY_JOBSTORE) == []
+    finally:
+        sched.shutdown(wait=False)
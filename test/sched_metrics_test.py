@@ -0,0 +1,77 @@
+import threading
+import time
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from prometheus_client import REGISTRY
+
+from view import retry, sched_metrics
+from view.checke_control import remove_task_metrics
+
+
+def _value(metric, **labels):
+    return metric.labels(**labels)._value.get() if labels else metric._value.get()
+
+
+def test_pool_saturation_and_skips_are_exported():
+    release = threading.Event()
+    sched = BackgroundScheduler(
+        executors={"default": sched_metrics.InstrumentedThreadPoolExecutor(max_workers=1)},
+        job_defaults={"max_instances": 1, "coalesce": False},
+    )
+    sched_metrics.attach_listeners(sched)
+    sched.start()
+    try:
+        sched.add_job(release.wait, "interval", seconds=0.2, args=[3], id="unit-sat-slow")
+        sched.add_job(lambda: None, "interval", seconds=0.2, id="unit-sat-fast")
+        time.sleep(1.0)
+
+        # 慢任务占满唯一线程：忙碌线程为 1，快任务排队，慢任务后续触发因 max_instances 被跳过
+        assert _value(sched_metrics.url_check_scheduler_executor_busy_threads) == 1
+        assert _value(sched_metrics.url_check_scheduler_executor_queued_jobs) >= 1
+        assert _value(
+            sched_metrics.url_check_scheduler_max_instances_total, task_name="unit-sat-slow"
+        ) >= 1
+    finally:
+        release.set()
+        sched.shutdown(wait=True)
+
+    assert _value(sched_metrics.url_check_scheduler_executor_busy_threads) == 0
+    assert _value(sched_metrics.url_check_scheduler_executor_queued_jobs) == 0
+    samples = sched_metrics.url_check_scheduler_queue_wait_seconds.collect()[0].samples
+    assert any(s.name.endswith("_count") and s.value > 0 for s in samples)
+
+
+def test_submission_path_is_left_to_apscheduler():
+    # 只包装底层线程池，投递逻辑（含上游的线程池异常恢复）沿用 APScheduler
+    assert "_do_submit_job" not in vars(sched_metrics.InstrumentedThreadPoolExecutor)
+    executor = sched_metrics.InstrumentedThreadPoolExecutor(max_workers=1)
+    try:
+        assert executor._pool.submit(lambda: "ok").result(timeout=5) == "ok"
+    finally:
+        executor.shutdown()
+
+
+def test_retry_jobs_are_labeled_with_the_task_name():
+    assert sched_metrics.task_label(retry.retry_job_id("unit-retry-label", 12.5)) == (
+        "unit-retry-label"
+    )
+    sched = BackgroundScheduler(
+        executors={"default": sched_metrics.InstrumentedThreadPoolExecutor(max_workers=1)}
+    )
+    sched.start()
+    try:
+        done = threading.Event()
+        sched.add_job(done.set, id=retry.retry_job_id("unit-retry-label", 12.5))
+        assert done.wait(5)
+        time.sleep(0.1)
+    finally:
+        sched.shutdown(wait=True)
+    labels = {"task_name": "unit-retry-label"}
+    assert REGISTRY.get_sample_value(
+        "url_check_scheduler_job_duration_seconds_count", labels
+    ) == 1
+    # 任务移除时重试产生的序列一并删除
+    remove_task_metrics("unit-retry-label")
+    assert REGISTRY.get_sample_value(
+        "url_check_scheduler_job_duration_seconds_count", labels
+    ) is None
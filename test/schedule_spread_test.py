@@ -0,0 +1,66 @@
+import datetime
+from types import SimpleNamespace
+
+from apscheduler.triggers.interval import IntervalTrigger
+
+from view import schedule_spread
+
+
+def _jobs(names, interval, now):
+    jobs = []
+    for name in names:
+        trigger = IntervalTrigger(
+            seconds=interval,
+            start_date=schedule_spread.start_date_for(name, interval, now=now.timestamp()),
+        )
+        next_run = trigger.get_next_fire_time(None, now.astimezone())
+        jobs.append(SimpleNamespace(trigger=trigger, next_run_time=next_run))
+    return jobs
+
+
+def test_same_interval_tasks_are_spread_deterministically():
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    names = [f"task-{i}" for i in range(120)]
+
+    first = _jobs(names, 60, now)
+    again = _jobs(names, 60, now + datetime.timedelta(seconds=17))
+    # 重新加载后相位不变
+    assert [j.next_run_time.timestamp() % 60 for j in first] == [
+        j.next_run_time.timestamp() % 60 for j in again
+    ]
+
+    profile = schedule_spread.concurrency_profile(first, now=now.astimezone())
+    assert profile["window_seconds"] == 60
+    assert profile["starts"] == 120
+    # 未打散时 120 个任务会在同一秒启动
+    assert profile["max_per_second"] <= 8
+
+
+def test_spread_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(schedule_spread.config, "schedule_spread", False, raising=False)
+    assert schedule_spread.start_date_for("task", 60) is None
+
+
+def test_concurrency_window_is_clamped_and_validated(monkeypatch):
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    jobs = _jobs(["task-a", "task-b"], 60, now)
+    # 传入的窗口同样限制在上限内
+    profile = schedule_spread.concurrency_profile(jobs, window=1000000000, now=now)
+    assert profile["window_seconds"] == schedule_spread.MAX_WINDOW_SECONDS
+    assert profile["starts"] == 2 * 60
+
+    import url_check
+
+    fake = SimpleNamespace(
+        concurrency_profile=lambda window=None: schedule_spread.concurrency_profile(
+            jobs, window=window, now=now
+        )
+    )
+    monkeypatch.setattr(url_check, "_get_scheduler", lambda: fake)
+    client = url_check.app.test_client()
+    for window in (0, -5):
+        resp = client.get(f"/scheduler/concurrency?window={window}")
+        assert resp.status_code == 400
+    resp = client.get("/scheduler/concurrency?window=1000000000")
+    assert resp.status_code == 200
+    assert resp.get_json()["window_seconds"] == schedule_spread.MAX_WINDOW_SECONDS
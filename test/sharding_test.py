@@ -0,0 +1,61 @@
+import logging
+
+from prometheus_client import REGISTRY
+
+from view import sharding
+from view.checke_control import remove_task_metrics, task_metrics, url_check_http_status_code
+from view.retry import url_check_retry_exhausted_total
+from view.sched_metrics import url_check_scheduler_job_missed_total
+from view.sharding import HashRing
+
+
+def test_ring_balances_and_moves_few_tasks_when_scaling():
+    names = [f"task-{i}" for i in range(4000)]
+    ring4 = HashRing(4)
+    ring5 = HashRing(5)
+
+    counts = [0] * 4
+    for name in names:
+        counts[ring4.owner(name)] += 1
+    assert min(counts) > 700 and max(counts) < 1300
+
+    moved = sum(1 for name in names if ring4.owner(name) != ring5.owner(name))
+    # 理想迁移比例为 1/5；取模分片会迁移约 80%
+    assert moved / len(names) < 0.3
+
+
+def test_owns_and_metric_cleanup(monkeypatch):
+    monkeypatch.setattr(sharding.config, "shard_count", 3, raising=False)
+    monkeypatch.setattr(sharding.config, "shard_index", 1, raising=False)
+    tasks = [{"name": f"t{i}"} for i in range(60)]
+    owned = sharding.filter_tasks(tasks)
+    assert 0 < len(owned) < 60
+    assert all(HashRing(3).owner(t["name"]) == 1 for t in owned)
+
+    # 迁出的任务删除所有指标序列（含额外标签与调度器按任务 ID 记录的序列），其他任务保留
+    for name in ("moved-away", "stays"):
+        task_metrics(name, "get")(url_check_http_status_code).set(200)
+        task_metrics(name, "get")(url_check_retry_exhausted_total, reason="count").inc()
+        url_check_scheduler_job_missed_total.labels(task_name=name).inc()
+    assert remove_task_metrics("moved-away") == 3
+    for name, expected in (("moved-away", None), ("stays", 200)):
+        labels = {"task_name": name, "method": "get"}
+        assert REGISTRY.get_sample_value("url_check_http_status_code", labels) == expected
+    assert REGISTRY.get_sample_value(
+        "url_check_retry_exhausted_total", {"task_name": "moved-away", "method": "get", "reason": "count"}
+    ) is None
+    assert REGISTRY.get_sample_value(
+        "url_check_scheduler_job_missed_total", {"task_name": "moved-away"}
+    ) is None
+    remove_task_metrics("stays")
+
+
+def test_off_shard_tasks_log_one_info_summary(monkeypatch, caplog):
+    monkeypatch.setattr(sharding.config, "shard_count", 3, raising=False)
+    monkeypatch.setattr(sharding.config, "shard_index", 0, raising=False)
+    tasks = [{"name": f"t{i}"} for i in range(60)]
+    with caplog.at_level(logging.INFO, logger="view.sharding"):
+        owned = sharding.filter_tasks(tasks)
+    # 不属于本分片的任务不逐个输出，只有一条汇总
+    assert len(caplog.records) == 1
+    assert f"跳过 {60 - len(owned)} 个" in caplog.records[0].getMessage()
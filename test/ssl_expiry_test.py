@@ -0,0 +1,29 @@
+import datetime
+
+from view import ssl_expiry
+
+
+def test_cert_taken_from_connection_then_cached(monkeypatch):
+    ssl_expiry.clear_cert_cache()
+    probes = []
+
+    def _probe(hostname, port, timeout):
+        probes.append((hostname, port))
+        return datetime.datetime.now() + datetime.timedelta(days=10, hours=1)
+
+    monkeypatch.setattr(ssl_expiry, "_probe_not_after", _probe)
+    not_after = datetime.datetime.now() + datetime.timedelta(days=40, hours=1)
+    peer_cert = {"notAfter": not_after.strftime("%b %d %H:%M:%S %Y GMT")}
+
+    url = "https://unit-ssl.example:8443/health"
+    assert ssl_expiry.get_ssl_cert_expiry_days(url, peer_cert=peer_cert) == 40
+    # 连接上拿不到证书时使用 host:port 缓存，不额外建连
+    assert ssl_expiry.get_ssl_cert_expiry_days(url) == 40
+    assert probes == []
+
+    assert ssl_expiry.get_ssl_cert_expiry_days("https://other.example/") == 10
+    assert ssl_expiry.get_ssl_cert_expiry_days("https://other.example/x") == 10
+    assert probes == [("other.example", 443)]
+
+    assert ssl_expiry.get_ssl_cert_expiry_days(url, verify=False) is None
+    assert ssl_expiry.get_ssl_cert_expiry_days("http://plain.example/") is None
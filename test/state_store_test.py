@@ -0,0 +1,40 @@
+import datetime
+import pickle
+
+from view.state_store import TaskStateStore
+
+
+def test_legacy_pickle_migrated_once(tmp_path):
+    legacy = {
+        "alarm": {"code_warm": 1},
+        "alarm_notified": {"code_warm": 1},
+        "last_alert_time": {"status_code": datetime.datetime(2026, 1, 2, 3, 4, 5)},
+        "last_resp_time": 12.5,
+        "2026-01-01": [{"t1": {"time": "2026-01-01 10:00:00", "code": 200}}],
+        "2026-01-02": [{"t1": {"time": "2026-01-02 10:00:00", "code": 500}}],
+    }
+    with open(tmp_path / "t1.pkl", "wb") as f:
+        pickle.dump(legacy, f)
+
+    store = TaskStateStore(str(tmp_path))
+    assert store.exists("t1")
+    assert (tmp_path / "t1.pkl.migrated").exists()
+    assert not (tmp_path / "t1.pkl").exists()
+
+    state = store.load_state("t1")
+    assert state["alarm"] == {"code_warm": 1}
+    assert state["last_alert_time"]["status_code"] == datetime.datetime(
+        2026, 1, 2, 3, 4, 5
+    )
+    assert state["last_check_time"] == "2026-01-02 10:00:00"
+    assert store.days("t1") == ["2026-01-01", "2026-01-02"]
+    assert [r["code"] for r in store.iter_records("t1", "2026-01-02")] == [500]
+
+
+def test_history_purged_when_new_day_starts(tmp_path):
+    store = TaskStateStore(str(tmp_path))
+    for day in ("2026-01-01", "2026-01-02", "2026-01-03"):
+        store.append_record("t2", day, {"time": f"{day} 00:00:00"}, keep_days=2)
+    store.append_record("t2", "2026-01-04", {"time": "2026-01-04 00:00:00"}, keep_days=2)
+
+    assert store.days("t2") == ["2026-01-03", "2026-01-04"]
@@ -0,0 +1,55 @@
+import datetime
+
+from prometheus_client import REGISTRY
+
+from view.checke_control import (
+    cherker,
+    remove_task_metrics,
+    task_metrics,
+    url_check_http_status_code,
+    url_check_task_checks_total,
+)
+from view.state_store import TaskStateStore
+
+
+def _payload(task_name, code, content="hello"):
+    return {
+        "url_name": task_name,
+        "url": "http://x",
+        "stat_code": code,
+        "timeout": 0,
+        "resp_time": 10,
+        "contents": content,
+        "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "threshold": {"stat_code": 200},
+    }
+
+
+def test_cached_children_survive_metric_cleanup(monkeypatch, tmp_path):
+    monkeypatch.setattr("view.checke_control.state_store", TaskStateStore(str(tmp_path)))
+    monkeypatch.setattr("view.checke_control.STATE_DIR", str(tmp_path))
+    monkeypatch.setattr("conf.config.enable_alerts", False, raising=False)
+    task = "unit-cached-metrics"
+    labels = {"task_name": task, "method": "get"}
+
+    metrics = task_metrics(task, "get")
+    assert task_metrics(task, "get") is metrics
+    assert metrics(url_check_http_status_code) is metrics(url_check_http_status_code)
+    assert metrics(url_check_task_checks_total, result="success") is not metrics(
+        url_check_task_checks_total, result="failed"
+    )
+
+    cherker(method="get").make_data(_payload(task, 503))
+    assert REGISTRY.get_sample_value("url_check_http_status_code", labels) == 503
+    # 正文标签默认不暴露
+    assert REGISTRY.get_sample_value("url_check_http_contents_info", {**labels, "body": "hello"}) is None
+
+    # 删除序列后缓存一并丢弃，再次检查重新注册到 registry
+    assert remove_task_metrics(task) >= 1
+    assert REGISTRY.get_sample_value("url_check_http_status_code", labels) is None
+    assert task_metrics(task, "get") is not metrics
+    monkeypatch.setattr("conf.config.http_contents_metric", True, raising=False)
+    cherker(method="get").make_data(_payload(task, 200))
+    assert REGISTRY.get_sample_value("url_check_http_status_code", labels) == 200
+    assert REGISTRY.get_sample_value("url_check_http_contents_info", {**labels, "body": "hello"}) == 1
+    remove_task_metrics(task)
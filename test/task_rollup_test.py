@@ -0,0 +1,99 @@
+import datetime
+
+from view.checke_control import cherker
+from view.make_check_instan import ReportTask
+from view.state_store import TaskStateStore
+from view.task_rollup import RollingWindow, get_registry
+
+
+def _payload(task_name, code):
+    return {
+        "url_name": task_name,
+        "url": "http://x",
+        "stat_code": code,
+        "timeout": 0,
+        "resp_time": 10,
+        "contents": "",
+        "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "threshold": {"stat_code": 200},
+    }
+
+
+def test_report_built_from_rollups(monkeypatch, tmp_path):
+    monkeypatch.setattr("view.checke_control.state_store", TaskStateStore(str(tmp_path)))
+    monkeypatch.setattr("view.checke_control.STATE_DIR", str(tmp_path))
+    monkeypatch.setattr("conf.config.enable_alerts", False, raising=False)
+    registry = get_registry()
+    registry.clear()
+    try:
+        for name in ("unit-ok", "unit-bad", "unit-idle"):
+            registry.register(name, interval=60)
+        for code in (200, 200):
+            cherker(method="get").make_data(_payload("unit-ok", code))
+        for code in (200, 503):
+            cherker(method="get").make_data(_payload("unit-bad", code))
+        # 未登记的任务不计入
+        cherker(method="get").make_data(_payload("unit-unknown", 200))
+
+        rollups = dict(registry.snapshot())
+        assert set(rollups) == {"unit-ok", "unit-bad", "unit-idle"}
+        assert (rollups["unit-bad"].checks, rollups["unit-bad"].failures) == (2, 1)
+
+        _, msg = ReportTask().generate_report()
+        assert "调度任务总数: 3个" in msg
+        assert "累计检查: 4次, 失败: 1次" in msg
+        assert "- unit-bad: 状态码（失败 1/2）" in msg
+        assert "❓ 尚无检查数据: 1个\n- unit-idle" in msg
+        assert "近24小时可用率: 75.00%" in msg
+        assert "📉 近1小时可用率低于100%: 1个\n- unit-bad: 50.00%（错误 1/2，P95 9.5ms）" in msg
+
+        stats = registry.stats("unit-bad")
+        assert stats["windows"]["5m"]["availability"] == 0.5
+        assert registry.stats("unit-unknown") is None
+    finally:
+        registry.clear()
+
+
+def test_rolling_window_expires_old_slots():
+    window = RollingWindow(300, 5)
+    for i in range(100):
+        window.add(1000.0, error=i < 10, latency_ms=40 if i < 90 else 800)
+    summary = window.summary(1000.0)
+    assert (summary["checks"], summary["errors"], summary["availability"]) == (100, 10, 0.9)
+    assert 10 < summary["latency_ms"]["p50"] <= 50
+    assert 500 < summary["latency_ms"]["p95"] <= 1000
+
+    window.add(1200.0, error=False, latency_ms=40)
+    assert window.summary(1200.0)["checks"] == 101
+    # 超过窗口后旧槽不再计入
+    assert window.summary(1400.0)["checks"] == 1
+    assert window.summary(1600.0)["checks"] == 0
+
+
+def test_register_restores_state_after_restart(monkeypatch, tmp_path):
+    store = TaskStateStore(str(tmp_path))
+    checked = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    store.save_state(
+        "unit-restored",
+        {
+            "alarm": {"code_warm": 1, "timeout_warm": 0},
+            "alarm_notified": {"code_warm": 1, "timeout_warm": 0},
+            "last_check_time": checked,
+        },
+    )
+    monkeypatch.setattr("view.task_rollup.state_store", store)
+    registry = get_registry()
+    registry.clear()
+    try:
+        # 模拟重启后重新登记：尚未检查，但状态文件中有最近结果
+        registry.register("unit-restored", interval=60)
+        registry.register("unit-never-run", interval=60)
+        rollups = dict(registry.snapshot())
+        assert rollups["unit-restored"].last_check_time == checked
+        assert rollups["unit-restored"].alarm["code_warm"] == 1
+
+        _, msg = ReportTask().generate_report()
+        assert "- unit-restored: 状态码" in msg
+        assert "❓ 尚无检查数据: 1个\n- unit-never-run" in msg
+    finally:
+        registry.clear()
@@ -9,9 +9,12 @@ URL 健康检查服务
     - 提供 Prometheus 指标暴露
 
 API 端点：
-    - GET /health: 健康检查
+    - GET /health: 健康检查（含 leader/standby 角色）
     - GET /metrics: Prometheus 指标
     - POST /job/opt: 任务操作（列表/添加/删除/暂停/恢复）
+    - GET /history/<task_name>: 检查历史（时间范围 + raw/1m/5m/1h 分辨率，JSON Lines）
+    - GET /scheduler/concurrency: 每秒预计启动的检查数
+    - GET /tasks/<task_name>/stats: 任务 5m/1h/24h 可用率与响应时间分位数
     - POST /sender/mail: 发送邮件（预留）
 
 配置文件：
@@ -36,10 +39,13 @@ API 端点：
 from flask import Flask, request
 from view.mail_server import geturl
 from view.make_check_instan import load_config
+from view import check_log, leader, leader_forward
+from view.task_rollup import get_registry as get_rollups
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST, Counter, Gauge, Info
 
 
 app = Flask(__name__)
+check_log.configure()
 
 service_runtime_info = Info("url_check_service_info", "Service runtime info")
 service_runtime_info.info({"service": "url-check", "port": "4000"})
@@ -61,8 +67,8 @@ scheduler_job_count = Gauge(
 )
 
 
-def _init_scheduler(force=False):
-    """Initialize scheduler and attach it to Flask app context."""
+def _start_scheduler(force=False):
+    """Create the scheduler, load tasks and attach it to Flask app context."""
     existing = getattr(app, "scheduler_instance", None)
     if not force and existing is not None:
         return existing
@@ -82,12 +88,42 @@ def _init_scheduler(force=False):
         add_report_job(lt.sched, interval_hours=config.report_interval_hours)
 
     setattr(app, "scheduler_instance", lt)
+    leader_forward.serve(app)
     scheduler_init_total.labels(result="ok").inc()
     scheduler_up.set(1)
     scheduler_job_count.set(len(lt.get_jobs()))
     return lt
 
 
+def _stop_scheduler():
+    """Stop the scheduler after losing leadership (this process becomes standby)."""
+    scheduler = getattr(app, "scheduler_instance", None)
+    setattr(app, "scheduler_instance", None)
+    leader_forward.shutdown()
+    scheduler_up.set(0)
+    scheduler_job_count.set(0)
+    if scheduler is not None and getattr(scheduler.sched, "running", False):
+        scheduler.shut_sched()
+
+
+def _init_scheduler(force=False):
+    """
+    Initialize scheduler, subject to leader election.
+
+    With URL_CHECK_LEADER_ELECTION=off every process runs its own scheduler.
+    Otherwise only the elected leader runs checks; standby processes return None
+    and take over automatically when the leader goes away.
+    """
+    if leader.election_mode() == "off":
+        return _start_scheduler(force=force)
+
+    leader.start_election(
+        on_started_leading=_start_scheduler,
+        on_stopped_leading=_stop_scheduler,
+    )
+    return getattr(app, "scheduler_instance", None)
+
+
 def _scheduler_snapshot():
     scheduler = getattr(app, "scheduler_instance", None)
     if scheduler is None:
@@ -110,8 +146,21 @@ def _scheduler_snapshot():
     }
 
 
+def _standby_response():
+    """
+    standby 收到只能由 leader 处理的请求：转发给 leader，无法转发时返回 409
+    """
+    forwarded = leader_forward.forward(request)
+    if forwarded is not None:
+        return forwarded
+    return {"role": leader.role(), "error": "当前实例不是调度 leader，且无法转发到 leader"}, 409
+
+
 def _get_scheduler():
-    """Get scheduler instance from app context, creating it lazily if needed."""
+    """Get scheduler instance from app context, creating it lazily if needed.
+
+    Returns None on standby instances (not the elected leader).
+    """
     scheduler = getattr(app, "scheduler_instance", None)
     if scheduler is None:
         scheduler = _init_scheduler()
@@ -158,6 +207,10 @@ def task_opt():
     if request.method == "POST":
         data = request.get_json() or {}
 
+        # standby 实例不运行调度器，任务操作转发给 leader
+        if _get_scheduler() is None:
+            return _standby_response()
+
         # 列出所有任务
         if "list_jobs" in data and data["list_jobs"] == 1:
             job_list = _get_scheduler().get_jobs()
@@ -211,6 +264,77 @@ def task_opt():
     return "{} False".format(data)
 
 
+@app.route("/history/<task_name>")
+def task_history(task_name):
+    """
+    检查历史查询（JSON Lines 流式返回）
+
+    Query:
+        start: 开始时间（epoch 秒或 "YYYY-MM-DD HH:MM:SS"），默认 end 前 1 小时
+        end: 结束时间，默认当前时间
+        resolution: raw（原始记录，默认）/ 1m / 5m / 1h（时间桶：检查数、失败数、
+            响应时间 min/avg/max/p95）
+    """
+    import datetime
+    from flask import Response, stream_with_context
+    from view import history_query
+
+    try:
+        end = request.args.get("end")
+        end = history_query.parse_time(end) if end else datetime.datetime.now()
+        start = request.args.get("start")
+        start = (
+            history_query.parse_time(start) if start else end - datetime.timedelta(hours=1)
+        )
+        resolution = request.args.get("resolution", "raw")
+        history_query.validate(task_name, start, end, resolution)
+    except (ValueError, OverflowError) as e:
+        # OverflowError: 结束时间接近 datetime 下限时无法向前推算默认开始时间
+        return {"error": str(e)}, 400
+    return Response(
+        stream_with_context(
+            history_query.stream_history(task_name, start, end, resolution)
+        ),
+        mimetype="application/x-ndjson",
+    )
+
+
+@app.route("/scheduler/concurrency")
+def scheduler_concurrency():
+    """
+    调度并发视图
+
+    统计未来一段时间内每秒预计启动的检查数，用于确认同周期任务已错开。
+
+    Query:
+        window: 统计窗口（秒），默认取最大任务周期；大于 3600 时按 3600 统计，小于 1 返回 400
+    """
+    scheduler = _get_scheduler()
+    if scheduler is None:
+        return _standby_response()
+    window = request.args.get("window", type=int)
+    if window is not None and window < 1:
+        return {"error": f"window 必须为正整数: {window}"}, 400
+    return scheduler.concurrency_profile(window=window)
+
+
+@app.route("/tasks/<task_name>/stats")
+def task_stats(task_name):
+    """
+    任务滚动统计
+
+    返回进程内累计检查/失败次数，以及 5m/1h/24h 窗口的可用率、错误数、
+    响应时间 P50/P95/P99（毫秒），不读取状态文件。
+    """
+    scheduler = _get_scheduler()
+    if scheduler is None:
+        return _standby_response()
+    stats = get_rollups().stats(task_name)
+    if stats is None:
+        return {"error": f"任务不存在或不属于本分片: {task_name}"}, 404
+    return stats
+
+
 @app.route("/health")
 def health():
     """
@@ -229,6 +353,7 @@ def health():
         "flask": "2.3.3",
         "uv": "0.9.28",
         "scheduler": sched,
+        "role": leader.role(),
     }
 
 
@@ -248,8 +373,17 @@ def metrics():
     Returns:
         Response: Prometheus 格式的指标数据
     """
+    import os
     from flask import Response
 
+    # 多 worker 部署时汇总所有 worker 的指标（standby worker 也能返回 leader 的检查指标）
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
     return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
 
 
@@ -276,7 +410,7 @@ if __name__ == "__main__":
     else:
         from view.hot_reload import start_config_watcher
 
-        start_config_watcher()
+        start_config_watcher(lambda: getattr(app, "scheduler_instance", None))
     app.run(
         host="0.0.0.0",
         port=port,
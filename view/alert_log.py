@@ -0,0 +1,262 @@
+"""
+告警日志异步写入模块
+
+功能：
+    - 检查线程只把日志行放入有界队列，立即返回，不再每条告警打开/关闭一次文件
+    - 后台写入线程缓冲日志行，攒满条数或到达刷新间隔时批量写入
+    - 按日期切换文件（logs/alert_YYYY-MM-DD.log），当天文件句柄保持打开
+    - 过期日志清理在写入线程上按固定周期执行（启动、切换日期时及每小时一次），
+      没有新日志、没有打开的文件时也按时清理
+    - 暴露写入耗时、写入行数、丢弃行数与队列深度指标
+
+配置：
+    URL_CHECK_ALERT_LOG_RETENTION_DAYS: 日志保留天数（0 不清理）
+    URL_CHECK_ALERT_LOG_QUEUE_SIZE: 队列容量，满时丢弃新日志
+    URL_CHECK_ALERT_LOG_BUFFER_LINES: 缓冲条数，攒满立即写入
+    URL_CHECK_ALERT_LOG_FLUSH_SECONDS: 最长刷新间隔（秒）
+"""
+
+import atexit
+import datetime
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from conf import config
+
+logger = logging.getLogger(__name__)
+
+ALERT_LOG_DIR = "logs"
+
+# 过期日志清理周期（秒）
+CLEANUP_INTERVAL_SECONDS = 3600
+
+url_check_alert_log_queue_depth = Gauge(
+    "url_check_alert_log_queue_depth",
+    "Alert log lines waiting to be written (queued + buffered)",
+)
+
+url_check_alert_log_write_seconds = Histogram(
+    "url_check_alert_log_write_seconds",
+    "Alert log batch write latency in seconds",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+
+url_check_alert_log_lines_total = Counter(
+    "url_check_alert_log_lines_total",
+    "Total number of alert log lines written",
+)
+
+url_check_alert_log_dropped_total = Counter(
+    "url_check_alert_log_dropped_total",
+    "Total number of alert log lines dropped",
+    ["reason"],
+)
+
+
+class AlertLogWriter:
+    """
+    告警日志写入器
+
+    属性：
+        log_dir: 日志目录
+        retention_days: 保留天数（0 不清理）
+        buffer_lines: 缓冲条数，攒满立即写入
+        flush_seconds: 最长刷新间隔（秒）
+    """
+
+    def __init__(
+        self,
+        log_dir=ALERT_LOG_DIR,
+        retention_days=30,
+        max_queue=10000,
+        buffer_lines=100,
+        flush_seconds=1.0,
+    ):
+        self.log_dir = log_dir
+        self.retention_days = retention_days
+        self.buffer_lines = max(1, buffer_lines)
+        self.flush_seconds = max(0.01, flush_seconds)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._buffer = []
+        self._file = None
+        self._file_day = None
+        self._next_cleanup = 0.0
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def path(self, day):
+        return os.path.join(self.log_dir, f"alert_{day}.log")
+
+    def depth(self):
+        return self._queue.qsize() + len(self._buffer)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="url-check-alert-log", daemon=True
+                )
+                self._thread.start()
+
+    def write(self, entry):
+        """
+        投递一条日志（检查线程调用，不阻塞）
+
+        Args:
+            entry: 日志字典，timestamp 字段（YYYY-MM-DD HH:MM:SS）决定写入哪天的文件
+
+        Returns:
+            bool: 是否成功入队
+        """
+        self.start()
+        day = str(entry.get("timestamp") or "")[:10] or (
+            datetime.datetime.now().strftime("%Y-%m-%d")
+        )
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        try:
+            self._queue.put_nowait((day, line))
+            return True
+        except queue.Full:
+            url_check_alert_log_dropped_total.labels(reason="queue_full").inc()
+            return False
+
+    def flush(self, timeout=5.0):
+        """把已投递的日志全部写入文件，返回是否在超时前完成"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _open(self, day):
+        if self._file is not None and self._file_day == day:
+            return self._file
+        self._close()
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._file = open(self.path(day), "a", encoding="utf-8")
+        self._file_day = day
+        # 切换日期时顺便清理过期日志
+        self._next_cleanup = 0.0
+        return self._file
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+        self._file_day = None
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        start = time.perf_counter()
+        try:
+            for day, line in lines:
+                self._open(day).write(line)
+            self._file.flush()
+            url_check_alert_log_lines_total.inc(len(lines))
+        except Exception as e:
+            url_check_alert_log_dropped_total.labels(reason="write_error").inc(len(lines))
+            logger.warning(f"写入告警日志失败: {e}")
+            # 下次写入时重新打开文件
+            self._close()
+        finally:
+            url_check_alert_log_write_seconds.observe(time.perf_counter() - start)
+
+    def cleanup(self, now=None):
+        """删除超出保留天数的告警日志（不删除当前打开的文件）"""
+        if self.retention_days <= 0:
+            return
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for log_file in glob.glob(os.path.join(self.log_dir, "alert_*.log")):
+            day = os.path.basename(log_file)[len("alert_") : -len(".log")]
+            try:
+                datetime.datetime.strptime(day, "%Y-%m-%d")
+            except ValueError:
+                continue
+            if day < cutoff and day != self._file_day:
+                try:
+                    os.remove(log_file)
+                    logger.info(f"删除过期告警日志: {log_file}")
+                except OSError as e:
+                    logger.warning(f"清理日志文件失败 {log_file}: {e}")
+
+    def _run(self):
+        deadline = None
+        while True:
+            # 等待新日志的时间不超过下一次刷新与下一次过期清理
+            wakeups = [deadline] if deadline is not None else []
+            if self.retention_days > 0:
+                wakeups.append(self._next_cleanup)
+            timeout = max(0.0, min(wakeups) - time.monotonic()) if wakeups else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                self._write_buffer()
+                deadline = None
+                item.set()
+            elif item is not None:
+                self._buffer.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if deadline is not None and (
+                len(self._buffer) >= self.buffer_lines or time.monotonic() >= deadline
+            ):
+                self._write_buffer()
+                deadline = None
+
+            if self.retention_days > 0 and time.monotonic() >= self._next_cleanup:
+                self._next_cleanup = time.monotonic() + CLEANUP_INTERVAL_SECONDS
+                try:
+                    self.cleanup()
+                except Exception as e:
+                    logger.warning(f"清理告警日志失败: {e}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """获取进程内唯一的告警日志写入器"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AlertLogWriter(
+                retention_days=getattr(config, "alert_log_retention_days", 30),
+                max_queue=getattr(config, "alert_log_queue_size", 10000),
+                buffer_lines=getattr(config, "alert_log_buffer_lines", 100),
+                flush_seconds=getattr(config, "alert_log_flush_seconds", 1),
+            )
+            url_check_alert_log_queue_depth.set_function(_writer.depth)
+            atexit.register(_writer.flush, 2.0)
+    return _writer
+
+
+def write(entry):
+    """投递一条告警日志"""
+    return get_writer().write(entry)
+
+
+def flush(timeout=5.0):
+    """等待已投递的告警日志写入文件"""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
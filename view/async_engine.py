@@ -0,0 +1,350 @@
+"""
+异步检查引擎（asyncio）
+
+功能：
+    - 在单个事件循环上并发执行所有 URL 检查（数千个在途请求）
+    - 调度线程只负责投递任务，立即返回，慢目标不再占用线程池
+    - 每个检查有独立的整体截止时间（deadline），超时按超时结果处理
+    - 重试按指数退避（带抖动）在事件循环上等待，不占用线程（见 view/retry.py）
+    - 域名解析与线程引擎共用进程内 DNS 缓存（见 view/dns_cache.py）
+    - 通过请求追踪记录 dns/connect/ttfb/download 分阶段耗时（见 view/phase_timing.py）
+    - 与线程引擎共用 ProbeSpec 的结果字典（spec.result_data/failure_data），交给 cherker.make_data
+
+启用方式：
+    URL_CHECK_ENGINE=asyncio（需要安装 aiohttp，未安装时自动回退到线程引擎）
+
+线程模型：
+    - 事件循环线程：执行所有 HTTP 请求
+    - 结果处理线程池：执行 cherker.make_data（状态持久化、告警发送等阻塞操作）
+"""
+
+import asyncio
+import datetime
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter, Gauge
+
+from conf import config
+from view.checke_control import (
+    cherker,
+    task_metrics,
+    url_check_ssl_expiry_days,
+    url_check_ssl_verified,
+)
+from view import dns_cache, retry
+from view.phase_timing import PHASES
+from view.response_body import read_response_body_async
+from view.ssl_expiry import get_ssl_cert_expiry_days
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - 可选依赖
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+url_check_async_inflight = Gauge(
+    "url_check_async_inflight",
+    "Current number of in-flight checks on the asyncio engine",
+)
+
+url_check_async_deadline_exceeded_total = Counter(
+    "url_check_async_deadline_exceeded_total",
+    "Total number of asyncio checks aborted by the per-check deadline",
+    ["task_name", "method"],
+)
+
+url_check_async_skipped_total = Counter(
+    "url_check_async_skipped_total",
+    "Total number of asyncio runs skipped because the previous run was still in flight",
+    ["task_name", "method"],
+)
+
+
+def _now_str():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _phases(timing):
+    """追踪回调记录的耗时中取出各阶段（去掉未结束的时间点）"""
+    return {k: v for k, v in timing.items() if k in PHASES}
+
+
+def _peer_cert(resp):
+    """读取本次请求 TLS 连接上的证书，非 TLS 或读取失败返回 None"""
+    try:
+        transport = resp.connection.transport if resp.connection else None
+        ssl_object = transport.get_extra_info("ssl_object") if transport else None
+        return ssl_object.getpeercert() if ssl_object is not None else None
+    except Exception:
+        return None
+
+
+if aiohttp is not None:
+
+    class CachedResolver(aiohttp.abc.AbstractResolver):
+        """aiohttp 解析器：与线程引擎共用进程内 DNS 缓存，未命中时在线程池中解析"""
+
+        async def resolve(self, host, port=0, family=socket.AF_INET):
+            cache = dns_cache.get_cache()
+            infos = cache.cached(host, port, family)
+            if infos is None:
+                loop = asyncio.get_running_loop()
+                try:
+                    infos = await loop.run_in_executor(None, cache.resolve, host, port, family)
+                except socket.gaierror as e:
+                    raise OSError(e.errno, f"DNS 解析失败 {host}: {e}") from e
+            return [
+                {
+                    "hostname": host,
+                    "host": sockaddr[0],
+                    "port": sockaddr[1],
+                    "family": fam,
+                    "proto": proto,
+                    "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+                }
+                for fam, _type, proto, _canonname, sockaddr in infos
+            ]
+
+        async def close(self):
+            pass
+
+    def _phase_trace_config():
+        """
+        按 aiohttp 请求追踪事件记录分阶段耗时
+
+        每次请求通过 trace_request_ctx 传入一个 dict，回调向其中写入时间点与 dns/connect/ttfb。
+        aiohttp 不单独报告 TLS 握手，TLS 计入 connect。
+        """
+
+        async def on_dns_start(session, ctx, params):
+            ctx.trace_request_ctx["dns_start"] = time.perf_counter()
+
+        async def on_dns_end(session, ctx, params):
+            timing = ctx.trace_request_ctx
+            timing["dns"] = (time.perf_counter() - timing.pop("dns_start")) * 1000
+
+        async def on_connect_start(session, ctx, params):
+            ctx.trace_request_ctx["connect_start"] = time.perf_counter()
+
+        async def on_connect_end(session, ctx, params):
+            timing = ctx.trace_request_ctx
+            total = (time.perf_counter() - timing.pop("connect_start")) * 1000
+            timing["connect"] = max(total - timing.get("dns", 0.0), 0.0)
+
+        async def on_headers_sent(session, ctx, params):
+            ctx.trace_request_ctx["sent"] = time.perf_counter()
+
+        async def on_request_end(session, ctx, params):
+            timing = ctx.trace_request_ctx
+            if "sent" in timing:
+                timing["ttfb"] = (time.perf_counter() - timing.pop("sent")) * 1000
+
+        trace = aiohttp.TraceConfig()
+        trace.on_dns_resolvehost_start.append(on_dns_start)
+        trace.on_dns_resolvehost_end.append(on_dns_end)
+        trace.on_connection_create_start.append(on_connect_start)
+        trace.on_connection_create_end.append(on_connect_end)
+        trace.on_request_headers_sent.append(on_headers_sent)
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+
+class AsyncCheckEngine:
+    """
+    asyncio 检查引擎
+
+    属性：
+        max_inflight: 最大在途请求数
+        result_workers: 结果处理线程数
+    """
+
+    def __init__(self, max_inflight=1000, result_workers=4):
+        self.max_inflight = max_inflight
+        self.result_workers = result_workers
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._inflight = set()
+        self._inflight_lock = threading.Lock()
+        self._result_pool = ThreadPoolExecutor(
+            max_workers=result_workers, thread_name_prefix="url-check-result"
+        )
+
+    def start(self):
+        """启动事件循环线程并创建共享 ClientSession"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="url-check-async", daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+        logger.info(f"asyncio 检查引擎已启动, max_inflight={self.max_inflight}")
+
+    async def _setup(self):
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        if dns_cache.enabled():
+            connector = aiohttp.TCPConnector(
+                limit=self.max_inflight, resolver=CachedResolver(), use_dns_cache=False
+            )
+        else:
+            connector = aiohttp.TCPConnector(limit=self.max_inflight, ttl_dns_cache=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector, trace_configs=[_phase_trace_config()]
+        )
+
+    def submit(self, spec, method):
+        """
+        投递一次检查（由调度线程调用，立即返回）
+
+        同一任务上一次检查仍在执行时跳过本次，避免慢目标堆积。
+        """
+        key = (spec.task_name, method)
+        with self._inflight_lock:
+            if key in self._inflight:
+                task_metrics(spec.task_name, method)(url_check_async_skipped_total).inc()
+                return None
+            self._inflight.add(key)
+        return asyncio.run_coroutine_threadsafe(
+            self._run(spec, method), self._loop
+        )
+
+    async def _run(self, spec, method):
+        key = (spec.task_name, method)
+        try:
+            async with self._semaphore:
+                url_check_async_inflight.inc()
+                try:
+                    data = await asyncio.wait_for(
+                        self._probe(spec, method), retry.task_deadline(spec)
+                    )
+                except asyncio.TimeoutError:
+                    task_metrics(spec.task_name, method)(
+                        url_check_async_deadline_exceeded_total
+                    ).inc()
+                    logger.warning(f"{spec.task_name} 超过检查截止时间")
+                    data = spec.failure_data()
+                finally:
+                    url_check_async_inflight.dec()
+
+            ck = cherker(method=method)
+            await self._loop.run_in_executor(self._result_pool, ck.make_data, data)
+        except Exception as e:
+            logger.error(f"{spec.task_name} asyncio 检查异常: {e}")
+        finally:
+            with self._inflight_lock:
+                self._inflight.discard(key)
+
+    async def _probe(self, spec, method):
+        """执行请求（含重试），返回 make_data 所需的 data 字典"""
+        proxy = spec.proxy
+        verify = spec.ssl_verify
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempt = 0
+        while True:
+            now_time = _now_str()
+            try:
+                start = loop.time()
+                # 复用连接时不会触发 dns/connect 事件，保持为 0
+                timing = {"dns": 0.0, "connect": 0.0}
+                async with self._session.request(
+                    method.upper(),
+                    spec.url,
+                    headers=spec.headers,
+                    cookies=spec.cookies,
+                    data=spec.payload,
+                    proxy=proxy,
+                    ssl=None if verify else False,
+                    timeout=aiohttp.ClientTimeout(total=spec.timeout),
+                    trace_request_ctx=timing,
+                ) as resp:
+                    retime = (loop.time() - start) * 1000
+
+                    if resp.status >= 400:
+                        reason = "Client Error" if resp.status < 500 else "Server Error"
+                        error = "{} {}: {} for url: {}".format(
+                            resp.status, reason, resp.reason, resp.url
+                        )
+                        logger.debug("%s HTTP错误: %s %s", spec.task_name, resp.status, error)
+                        return spec.result_data(
+                            resp.status, 0, error, now_time, None, _phases(timing)
+                        )
+
+                    # 只用连接证书或缓存，不在事件循环上做阻塞的独立探测
+                    ssl_expiry_days = get_ssl_cert_expiry_days(
+                        spec.url,
+                        verify=verify,
+                        peer_cert=_peer_cert(resp) if verify else None,
+                        probe=False,
+                    )
+                    metrics = task_metrics(spec.task_name, method)
+                    if ssl_expiry_days is not None:
+                        metrics(url_check_ssl_expiry_days).set(ssl_expiry_days)
+                    metrics(url_check_ssl_verified, verified=str(verify).lower()).inc()
+
+                    download_start = time.perf_counter()
+                    content = await read_response_body_async(
+                        resp,
+                        spec.task_name,
+                        method,
+                        max_response_size=spec.max_response_size,
+                        threshold=spec.threshold,
+                        expect_json=spec.expect_json,
+                    )
+
+                    timing["download"] = (time.perf_counter() - download_start) * 1000
+
+                    return spec.result_data(
+                        resp.status, retime, content, now_time, ssl_expiry_days,
+                        _phases(timing),
+                    )
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                delay = retry.next_delay(spec, attempt, loop.time() - started)
+                if delay is None:
+                    logger.warning(
+                        "%s 第 %d 次请求失败，不再重试: %r", spec.task_name, attempt + 1, e
+                    )
+                    return spec.failure_data()
+                logger.info(
+                    "%s 第 %d 次请求失败，%.1f 秒后重试: %r",
+                    spec.task_name,
+                    attempt + 1,
+                    delay,
+                    e,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    获取进程内唯一的 asyncio 引擎（首次调用时启动）
+
+    Returns:
+        AsyncCheckEngine: 引擎实例；未安装 aiohttp 时返回 None
+    """
+    global _engine
+    if aiohttp is None:
+        return None
+    with _engine_lock:
+        if _engine is None:
+            engine = AsyncCheckEngine(
+                max_inflight=getattr(config, "async_max_inflight", 1000),
+                result_workers=getattr(config, "async_result_workers", 4),
+            )
+            engine.start()
+            _engine = engine
+    return _engine
@@ -0,0 +1,197 @@
+"""
+检查结果日志
+
+功能：
+    - 检查结果通过 logging 输出，不再在每次检查时 print 整个结果字典
+    - 结构化字段（task/method/code/delay_ms/...）只在日志真正输出时才格式化
+    - 响应正文截断到 URL_CHECK_LOG_BODY_MAX_CHARS 个字符
+    - 成功结果按任务采样（每 N 次输出 1 次），失败结果与告警状态变化全部输出
+    - 暴露日志输出字节数与被采样跳过的行数指标
+
+配置：
+    URL_CHECK_LOG_LEVEL: 日志级别（默认 INFO；DEBUG 时输出每次检查的明细）
+    URL_CHECK_LOG_SUCCESS_SAMPLE: 成功结果每 N 次输出 1 次（1 全部输出，0 不输出）
+    URL_CHECK_LOG_BODY_MAX_CHARS: 日志中响应正文的最大字符数
+"""
+
+import json
+import logging
+import sys
+import threading
+
+from prometheus_client import Counter
+
+from conf import config
+
+logger = logging.getLogger("url_check.check")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+url_check_log_bytes_total = Counter(
+    "url_check_log_bytes_total",
+    "Total bytes of log lines emitted",
+    ["level"],
+)
+
+url_check_log_suppressed_total = Counter(
+    "url_check_log_suppressed_total",
+    "Total number of successful check log lines skipped by sampling",
+)
+
+
+class StructuredFormatter(logging.Formatter):
+    """在消息后追加 extra={"fields": {...}} 中的 key=value 字段"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(
+                f"{key}={_field_value(value)}" for key, value in fields.items()
+            )
+        return line
+
+
+def _field_value(value):
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    if isinstance(value, str) and (not value or any(c in value for c in ' "=\n')):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class CountingStreamHandler(logging.StreamHandler):
+    """输出日志并统计字节数（url_check_log_bytes_total）"""
+
+    def format(self, record):
+        line = super().format(record)
+        url_check_log_bytes_total.labels(level=record.levelname).inc(
+            len(line.encode("utf-8", errors="replace")) + 1
+        )
+        return line
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure(level=None):
+    """
+    配置进程日志（只执行一次）
+
+    root logger 没有 handler 时安装带字节统计的结构化输出；
+    已由外部（gunicorn、测试框架）配置时只设置级别。
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+        level = str(level or getattr(config, "log_level", "INFO")).upper()
+        root = logging.getLogger()
+        if not root.handlers:
+            handler = CountingStreamHandler(sys.stdout)
+            handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+            root.addHandler(handler)
+        root.setLevel(getattr(logging, level, logging.INFO))
+
+
+def truncate(text, limit=None):
+    """截断日志中的长文本（响应正文等）"""
+    if limit is None:
+        limit = getattr(config, "log_body_max_chars", 200)
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    if limit <= 0:
+        return ""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...({len(text)} chars)"
+
+
+class SuccessSampler:
+    """按任务采样成功结果：每个任务每 every 次成功输出 1 次（首次必输出）"""
+
+    def __init__(self, every):
+        self.every = every
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def sample(self, task_name):
+        if self.every <= 0:
+            return False
+        if self.every == 1:
+            return True
+        with self._lock:
+            count = self._counts.get(task_name, 0)
+            self._counts[task_name] = (count + 1) % self.every
+        return count == 0
+
+    def reset(self, task_name):
+        """任务失败后重置计数，恢复后的第一次成功必输出"""
+        with self._lock:
+            self._counts.pop(task_name, None)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SuccessSampler(getattr(config, "log_success_sample", 100))
+    return _sampler
+
+
+def log_result(task_name, method, failed_reasons, code, delay_ms, body, time):
+    """
+    输出一次检查结果
+
+    失败结果 WARNING 全部输出；成功结果 INFO 按任务采样，DEBUG 级别时全部输出。
+    """
+    sampler = get_sampler()
+    if failed_reasons:
+        sampler.reset(task_name)
+        level = logging.WARNING
+    elif logger.isEnabledFor(logging.DEBUG) or sampler.sample(task_name):
+        level = logging.INFO
+    else:
+        url_check_log_suppressed_total.inc()
+        return
+    if not logger.isEnabledFor(level):
+        return
+    fields = {
+        "task": task_name,
+        "method": method,
+        "code": code,
+        "delay_ms": delay_ms,
+        "time": time,
+    }
+    if failed_reasons:
+        fields["reasons"] = ",".join(failed_reasons)
+        fields["body"] = truncate(body)
+    logger.log(
+        level,
+        "检查%s",
+        "失败" if failed_reasons else "成功",
+        extra={"fields": fields},
+    )
+
+
+def log_state_change(task_name, previous, current):
+    """告警状态（code_warm/timeout_warm/...）有变化时输出，不采样"""
+    changes = [
+        f"{key}:{previous.get(key, 0)}->{value}"
+        for key, value in current.items()
+        if value != previous.get(key, 0)
+    ]
+    if not changes:
+        return
+    worse = any(value and not previous.get(key, 0) for key, value in current.items())
+    logger.log(
+        logging.WARNING if worse else logging.INFO,
+        "告警状态变化",
+        extra={"fields": {"task": task_name, "changes": ",".join(changes)}},
+    )
@@ -1,31 +1,18 @@
 import os
-import pickle
 import datetime
 import logging
 import ssl
 import json
-import glob
-from datetime import timedelta
+import threading
 from prometheus_client import Counter, Histogram, Gauge, Info
-from view.mail_server import mailconf
-from view.dingding import ding_sender
+from view import alert_log, check_log, phase_timing, sched_metrics
+from view.task_rollup import get_registry as get_rollups
+from view.notify_dispatcher import notify
+from view.state_store import STATE_DIR, state_store
 from conf import config
 
 logger = logging.getLogger(__name__)
 
-# =============================================================================
-# 告警日志配置
-# =============================================================================
-ALERT_LOG_DIR = "logs"
-ALERT_LOG_FILE = os.path.join(ALERT_LOG_DIR, "alert.log")
-STATE_DIR = "data"
-
-
-def _ensure_log_dir():
-    """确保日志目录存在"""
-    if not os.path.exists(ALERT_LOG_DIR):
-        os.makedirs(ALERT_LOG_DIR, exist_ok=True)
-
 
 def _ensure_state_dir():
     """确保运行状态目录存在。"""
@@ -37,63 +24,31 @@ def _ensure_state_dir():
         return False
 
 
-def _load_state_data(datafile):
-    """读取任务状态文件，失败时返回空字典。"""
-    try:
-        with open(datafile, "rb") as f:
-            return pickle.load(f)
-    except Exception as e:
-        logger.warning(f"读取状态文件失败 {datafile}: {e}")
-        return {}
+def _load_state_data(task_name):
+    """读取任务告警状态，失败时返回空字典。"""
+    return state_store.load_state(task_name)
 
 
-def _save_state_data(datafile, payload):
-    """写入任务状态文件，失败时仅记录日志。"""
+def _save_state_data(task_name, payload):
+    """原子写入任务告警状态，失败时仅记录日志。"""
+    get_rollups().record_state(task_name, payload)
     if not _ensure_state_dir():
         return False
-
-    try:
-        with open(datafile, "wb") as f:
-            pickle.dump(payload, f)
-        return True
-    except Exception as e:
-        logger.warning(f"写入状态文件失败 {datafile}: {e}")
-        return False
-
-
-def _get_log_filename():
-    """获取带日期的日志文件名"""
-    _ensure_log_dir()
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    return os.path.join(ALERT_LOG_DIR, f"alert_{today}.log")
+    return state_store.save_state(task_name, payload)
 
 
-def _cleanup_old_logs():
-    """清理过期日志文件"""
-    retention_days = getattr(config, "alert_log_retention_days", 30)
-    if retention_days <= 0:
-        return
-
-    cutoff = datetime.datetime.now() - timedelta(days=retention_days)
-    pattern = os.path.join(ALERT_LOG_DIR, "alert_*.log")
-
-    for log_file in glob.glob(pattern):
-        try:
-            # 从文件名提取日期
-            filename = os.path.basename(log_file)
-            date_str = filename.replace("alert_", "").replace(".log", "")
-            log_date = datetime.datetime.strptime(date_str, "%Y-%m-%d")
-            log_date = log_date.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            if log_date < cutoff:
-                os.remove(log_file)
-                logger.info(f"删除过期告警日志: {log_file}")
-        except Exception as e:
-            logger.warning(f"清理日志文件失败 {log_file}: {e}")
+def _append_history(task_name, time, record):
+    """追加一条检查记录到当天历史分段。"""
+    return state_store.append_record(
+        task_name,
+        time.split()[0],
+        record,
+        keep_days=config.history_datat_day,
+    )
 
 
 def _write_alert_log(alert_type, task_name, message, level="INFO"):
-    """写入告警日志（JSON 格式）
+    """写入告警日志（JSON 格式，由后台线程批量写入）
 
     Args:
         alert_type: 告警类型（故障/恢复）
@@ -104,27 +59,15 @@ def _write_alert_log(alert_type, task_name, message, level="INFO"):
     if not getattr(config, "alert_log_enabled", True):
         return
 
-    try:
-        log_entry = {
+    alert_log.write(
+        {
             "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "level": level,
             "type": alert_type,
             "task_name": task_name,
             "message": message,
         }
-
-        log_file = _get_log_filename()
-
-        # 写入日志（追加模式）
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-
-        # 每分钟清理一次过期日志
-        if datetime.datetime.now().second == 0:
-            _cleanup_old_logs()
-
-    except Exception as e:
-        logger.warning(f"写入告警日志失败: {e}")
+    )
 
 
 # =============================================================================
@@ -206,7 +149,7 @@ url_check_json_path_alert = Gauge(
 url_check_success_total = Counter(
     "url_check_success_total",
     "Total number of successful URL checks",
-    ["task_name", "status_code", "method"],
+    ["task_name", "method", "status_code"],
 )
 
 url_check_response_time_seconds = Histogram(
@@ -259,6 +202,128 @@ url_check_task_failures_total = Counter(
 )
 
 
+# =============================================================================
+# 任务指标子序列缓存
+# =============================================================================
+# 每次检查要更新约 20 个带 task_name/method 标签的指标，.labels() 每次都要校验标签、
+# 构造元组并加锁查表。按 (任务, 方法) 缓存已解析的子序列，检查时只做一次字典查找。
+# 子序列在首次使用时才创建，不会提前暴露从未写入过的序列。
+# 带任务标签的指标统一通过缓存写入，标签按 task_name、method、其他标签的顺序声明，
+# 任务移除时按缓存中记录的标签值逐个 remove（remove_task_metrics）。
+
+
+class TaskMetrics:
+    """单个 (任务, 方法) 的指标子序列缓存"""
+
+    __slots__ = ("task_name", "method", "_children")
+
+    def __init__(self, task_name, method):
+        self.task_name = task_name
+        self.method = method
+        self._children = {}
+
+    def __call__(self, family, **extra):
+        """
+        返回 family 上本任务的子序列
+
+        Args:
+            family: 指标（标签含 task_name、method）
+            extra: 其他标签（如 result/reason/status_code）
+        """
+        key = (family, tuple(extra.items())) if extra else family
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = family.labels(
+                task_name=self.task_name, method=self.method, **extra
+            )
+        return child
+
+    def remove(self):
+        """从指标中删除本缓存创建过的子序列，返回删除的序列数"""
+        removed = 0
+        for key in list(self._children):
+            family, extra = key if isinstance(key, tuple) else (key, ())
+            try:
+                family.remove(self.task_name, self.method, *(value for _, value in extra))
+                removed += 1
+            except KeyError:
+                pass
+        self._children.clear()
+        return removed
+
+
+_task_metrics = {}
+_task_metrics_lock = threading.Lock()
+
+
+def task_metrics(task_name, method):
+    """获取 (任务, 方法) 的指标子序列缓存"""
+    key = (task_name, method)
+    metrics = _task_metrics.get(key)
+    if metrics is None:
+        with _task_metrics_lock:
+            metrics = _task_metrics.setdefault(key, TaskMetrics(task_name, method))
+    return metrics
+
+
+def remove_task_metrics(task_name):
+    """
+    删除某任务在本实例上的所有指标序列，并丢弃其子序列缓存
+
+    任务被删除或迁移到其他分片后，本实例不再更新它的指标；不删除的话两个分片会同时
+    暴露该任务的序列（一个是过期值）。
+
+    Returns:
+        int: 删除的序列数
+    """
+    with _task_metrics_lock:
+        cached = [_task_metrics.pop(key) for key in list(_task_metrics) if key[0] == task_name]
+    removed = sum(metrics.remove() for metrics in cached)
+    # 调度器按任务 ID 记录的指标（只有 task_name 标签）
+    for family in sched_metrics.TASK_FAMILIES:
+        try:
+            family.remove(task_name)
+            removed += 1
+        except KeyError:
+            pass
+    return removed
+
+
+# =============================================================================
+# JSON Path 预编译
+# =============================================================================
+# jsonpath_ng 的解析（ply）远比查找本身昂贵，表达式在任务加载/重载时编译一次，
+# 按表达式缓存，检查时直接复用编译结果。
+_json_path_cache = {}
+
+
+def compile_json_path(json_path_expr):
+    """
+    编译 JSON Path 表达式（按表达式缓存）
+
+    Args:
+        json_path_expr: JSON Path 表达式（如 "$.status"）
+
+    Returns:
+        编译后的 matcher；表达式为空时返回 None
+
+    Raises:
+        ValueError: 表达式非法
+    """
+    if not json_path_expr:
+        return None
+    matcher = _json_path_cache.get(json_path_expr)
+    if matcher is None:
+        from jsonpath_ng import parse
+
+        try:
+            matcher = parse(json_path_expr)
+        except Exception as e:
+            raise ValueError(f"JSON Path 表达式非法: {json_path_expr}, 错误: {e}")
+        _json_path_cache[json_path_expr] = matcher
+    return matcher
+
+
 class cherker:
     def __init__(
         self,
@@ -313,12 +378,18 @@ class cherker:
         self.last_alert_time = {}  # {alert_type: datetime}
         self.last_resp_time = None  # 上次响应时间（毫秒）
         self._prev_resp_time = None  # 发送告警前的响应时间
+        self._delay_value = None  # 本次参与响应时间告警比较的耗时（总耗时或 delay_phase 阶段）
         self._has_http_response = False
         self._json_parse_ok = False
         self._json_path_ok = False
 
     def validate_json(
-        self, content, expect_json=False, json_path_expr=None, json_path_value=None
+        self,
+        content,
+        expect_json=False,
+        json_path_expr=None,
+        json_path_value=None,
+        json_path_matcher=None,
     ):
         """
         JSON 验证方法
@@ -334,6 +405,7 @@ class cherker:
             expect_json: 是否期望 JSON 响应
             json_path_expr: JSON Path 表达式（如 "$.status"）
             json_path_value: 期望的 JSON Path 值（字符串比较）
+            json_path_matcher: 任务加载时预编译的 matcher（为空时按表达式编译并缓存）
 
         Returns:
             tuple: (json_parse_ok, json_path_ok, actual_value)
@@ -346,31 +418,25 @@ class cherker:
         actual_value = None
         json_data = None
 
+        metrics = task_metrics(self.task_name or "", self.method or "")
+
         if not expect_json:
-            url_check_json_valid.labels(
-                task_name=self.task_name or "", method=self.method or ""
-            ).set(0)
+            metrics(url_check_json_valid).set(0)
             return True, True, None
 
         try:
             json_data = json.loads(content)
             json_parse_ok = True
-            url_check_json_valid.labels(
-                task_name=self.task_name or "", method=self.method or ""
-            ).set(1)
+            metrics(url_check_json_valid).set(1)
         except (json.JSONDecodeError, TypeError):
-            url_check_json_valid.labels(
-                task_name=self.task_name or "", method=self.method or ""
-            ).set(0)
+            metrics(url_check_json_valid).set(0)
             return False, False, None
 
         if not json_path_expr:
             return True, True, None
 
         try:
-            from jsonpath_ng import parse
-
-            matcher = parse(json_path_expr)
+            matcher = json_path_matcher or compile_json_path(json_path_expr)
             match = matcher.find(json_data)
             if match:
                 if json_path_value is not None:
@@ -398,9 +464,7 @@ class cherker:
             logger.warning(f"JSON Path 验证失败: {json_path_expr}, 错误: {e}")
             json_path_ok = False
 
-        url_check_json_path_match.labels(
-            task_name=self.task_name or "", method=self.method or ""
-        ).set(1 if json_path_ok else 0)
+        metrics(url_check_json_path_match).set(1 if json_path_ok else 0)
 
         return json_parse_ok, json_path_ok, actual_value
 
@@ -539,6 +603,8 @@ class cherker:
                     if self.message.get("stat_delay")
                     else self.task_name,
                 )
+                if self.message.get("stat_delay", "").startswith("- 阶段: "):
+                    msg = "{}\n{}".format(self.message["stat_delay"].split("\n")[0], msg)
 
         # 静默期检查（故障告警才检查，恢复通知和首次运行不受限制）
         suppress_minutes = config.get_alert_suppress_minutes(alert_name)
@@ -556,13 +622,12 @@ class cherker:
                     )
                     return None
 
-        # 发送钉钉
+        # 发送钉钉/邮件（只投递到通知队列，由后台线程发送，不阻塞检查线程）
         if "dingding" in channels and config.enable_dingding:
-            ding_sender(title=subject, msg=msg)
+            notify("dingding", subject, msg)
 
-        # 发送邮件
         if "mail" in channels and config.enable_mail:
-            mailconf(tos=config.send_to, subject=subject, content=msg)
+            notify("mail", subject, msg)
 
         # 写入独立告警日志（JSON 格式）
         log_level = "WARNING" if not recovery_event else "INFO"
@@ -610,79 +675,61 @@ class cherker:
 
     def _update_alert_state_metrics(self, method):
         """更新判定后告警状态指标（1=告警，0=正常）"""
-        url_check_status_code_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(self.now_alarm.get("code_warm", 0))
-        url_check_timeout_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(self.now_alarm.get("timeout_warm", 0))
-        url_check_content_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(self.now_alarm.get("math_warm", 0))
-        url_check_json_path_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(self.now_alarm.get("json_warm", 0))
-        url_check_ssl_expiry_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(self.now_alarm.get("ssl_warm", 0))
-        url_check_delay_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(self.now_alarm.get("delay_warm", 0))
-
-    def first_run_task(self, status_data, threshold, time, datafile):
+        metrics = task_metrics(self.task_name, method)
+        metrics(url_check_status_code_alert).set(self.now_alarm.get("code_warm", 0))
+        metrics(url_check_timeout_alert).set(self.now_alarm.get("timeout_warm", 0))
+        metrics(url_check_content_alert).set(self.now_alarm.get("math_warm", 0))
+        metrics(url_check_json_path_alert).set(self.now_alarm.get("json_warm", 0))
+        metrics(url_check_ssl_expiry_alert).set(self.now_alarm.get("ssl_warm", 0))
+        metrics(url_check_delay_alert).set(self.now_alarm.get("delay_warm", 0))
+
+    def first_run_task(self, status_data, threshold, time):
         """
         首次运行任务初始化
 
         功能：
             - 第一次检查某 URL 时调用
             - 初始化告警状态（默认都是正常）
-            - 持久化首次检查结果到文件
+            - 持久化首次检查结果（状态文件 + 历史分段）
 
         Args:
             status_data: 检查结果数据字典
             threshold: 配置阈值字典
             time: 检查时间字符串
-            datafile: 持久化文件路径（data/{task_name}.pkl）
         """
         temp_dict = {}
-        self.last_resp_time = status_data[self.task_name].get("delay")
+        self.last_resp_time = self._delay_value
         # 开始设置为0,都是对的，如果出现错误则修改状态码
 
         if status_data[self.task_name]["stat_code"] == 1:
-            print("{} 状态码故障".format(self.task_name))
+            logger.debug("%s 状态码故障", self.task_name)
             self.now_alarm["code_warm"] = 1
 
         if status_data[self.task_name]["timeout"] == 1:
             self.now_alarm["timeout_warm"] = 1
-            print("{} is timeout".format(self.task_name))
+            logger.debug("%s is timeout", self.task_name)
 
         if status_data[self.task_name]["stat_math_str"] == 1:
             self.now_alarm["math_warm"] = 1
-            print("{} 不存在 {}这个字段".format(self.task_name, threshold["math_str"]))
+            logger.debug("%s 不存在 %s这个字段", self.task_name, threshold["math_str"])
 
         if status_data[self.task_name]["stat_delay"] == 1:
             self.now_alarm["delay_warm"] = 1
-            print(
-                "{},第一次运行{}响应时间超过预定设计的阈值，请检查阈值是否合理".format(
-                    self.task_name, status_data[self.task_name]["delay"]
-                )
+            logger.info(
+                "%s,第一次运行%s响应时间超过预定设计的阈值，请检查阈值是否合理",
+                self.task_name,
+                status_data[self.task_name]["delay"],
             )
 
         # 添加 JSON 路径告警处理（修复）
         if status_data[self.task_name].get("json_warm") == 1:
             self.now_alarm["json_warm"] = 1
-            print("{} JSON路径验证失败".format(self.task_name))
+            logger.debug("%s JSON路径验证失败", self.task_name)
 
         # 添加 SSL 证书告警处理
         if status_data[self.task_name].get("ssl_warm") == 1:
             self.now_alarm["ssl_warm"] = 1
-            print("{} SSL证书即将过期".format(self.task_name))
+            logger.debug("%s SSL证书即将过期", self.task_name)
 
         # 根据内容发送消息
         # 首次运行：发送故障告警
@@ -701,17 +748,23 @@ class cherker:
         )
 
         # 录入当前检查的alarm状态信息
+        check_log.log_state_change(self.task_name, {}, self.now_alarm)
         temp_dict["alarm"] = self.now_alarm
         temp_dict["alarm_notified"] = notified_alarm
         temp_dict["last_alert_time"] = self.last_alert_time
         temp_dict["last_resp_time"] = self.last_resp_time
-        print("录入, last_alert_time=", self.last_alert_time, "alarm=", self.now_alarm)
+        temp_dict["last_check_time"] = time
+        logger.debug(
+            "录入 %s, last_alert_time=%s alarm=%s",
+            self.task_name,
+            self.last_alert_time,
+            self.now_alarm,
+        )
         # 录入原始信息
-        temp_dict[time.split()[0]] = [(status_data)]
-        # print(temp_dict)
+        _append_history(self.task_name, time, status_data[self.task_name])
 
-        if _save_state_data(datafile, temp_dict):
-            print("写入完毕")
+        if _save_state_data(self.task_name, temp_dict):
+            logger.debug("%s 写入完毕", self.task_name)
 
     def make_data(self, data_dict):
         """
@@ -736,8 +789,11 @@ class cherker:
         expect_json = data_dict.get("expect_json", False)
         json_path = data_dict.get("json_path")
         json_path_value = data_dict.get("json_path_value")
+        json_path_matcher = data_dict.get("json_path_matcher")
+        phases = data_dict.get("phases")
 
         method = self.method or "unknown"
+        metrics = task_metrics(self.task_name, method)
         json_path_ok = False
         json_parse_ok = False
         actual_value = None
@@ -752,22 +808,21 @@ class cherker:
             rs_time = data_dict["resp_time"]
 
             # HTTP 状态码
-            url_check_http_status_code.labels(
-                task_name=self.task_name, method=method
-            ).set(code)
+            metrics(url_check_http_status_code).set(code)
 
             # 响应时间（毫秒）
-            url_check_http_response_time_ms.labels(
-                task_name=self.task_name, method=method
-            ).observe(rs_time)
+            metrics(url_check_http_response_time_ms).observe(rs_time)
+
+            # 分阶段耗时（dns/connect/tls/ttfb/download）
+            if phases:
+                phase_timing.observe(metrics, phases)
 
             # 响应内容（截断）
-            # 只有未配置 math_str 时才传给 Prometheus（供 Prometheus 正则匹配）
-            if "math_str" not in threshold:
+            # 正文放在标签里会显著增大 /metrics 与 Prometheus 内存，默认关闭；
+            # 开启后只有未配置 math_str 时才传给 Prometheus（供 Prometheus 正则匹配）
+            if getattr(config, "http_contents_metric", False) and "math_str" not in threshold:
                 content_info = content[:500] if content else ""
-                url_check_http_contents.labels(
-                    task_name=self.task_name, method=method
-                ).info({"body": content_info})
+                metrics(url_check_http_contents).info({"body": content_info})
 
             # JSON 解析结果（应用层判断）
             json_parse_ok, json_path_ok, actual_value = self.validate_json(
@@ -775,22 +830,16 @@ class cherker:
                 expect_json=expect_json,
                 json_path_expr=json_path,
                 json_path_value=json_path_value,
+                json_path_matcher=json_path_matcher,
             )
 
-            url_check_json_valid.labels(task_name=self.task_name, method=method).set(
-                1 if json_parse_ok else 0
-            )
-
-            url_check_json_path_match.labels(
-                task_name=self.task_name, method=method
-            ).set(1 if json_path_ok else 0)
+            metrics(url_check_json_valid).set(1 if json_parse_ok else 0)
+            metrics(url_check_json_path_match).set(1 if json_path_ok else 0)
 
             # 关键字匹配结果（应用层判断）
             if "math_str" in threshold:
                 content_match = 1 if threshold["math_str"] in content else 0
-                url_check_content_match.labels(
-                    task_name=self.task_name, method=method
-                ).set(content_match)
+                metrics(url_check_content_match).set(content_match)
 
         else:
             # 超时
@@ -798,21 +847,11 @@ class cherker:
             content = ""
             rs_time = 0
 
-            url_check_http_timeout.labels(task_name=self.task_name, method=method).inc()
-
-            url_check_http_status_code.labels(
-                task_name=self.task_name, method=method
-            ).set(-1)
-
-            url_check_json_valid.labels(task_name=self.task_name, method=method).set(0)
-
-            url_check_json_path_match.labels(
-                task_name=self.task_name, method=method
-            ).set(0)
-
-            url_check_content_match.labels(task_name=self.task_name, method=method).set(
-                0
-            )
+            metrics(url_check_http_timeout).inc()
+            metrics(url_check_http_status_code).set(-1)
+            metrics(url_check_json_valid).set(0)
+            metrics(url_check_json_path_match).set(0)
+            metrics(url_check_content_match).set(0)
 
         self._has_http_response = code >= 0
         self._json_parse_ok = json_parse_ok
@@ -840,14 +879,20 @@ class cherker:
         else:
             self.now_alarm["json_warm"] = 0
 
-        # 响应时间验证
+        # 响应时间验证（配置 delay_phase 时只比较该阶段耗时）
+        delay_phase = threshold.get("delay_phase")
+        if delay_phase and phases and phases.get(delay_phase) is not None:
+            self._delay_value = phases[delay_phase]
+        else:
+            delay_phase = None
+            self._delay_value = rs_time
         if code != -1 and "delay" in threshold:
             delay_val = threshold["delay"]
             if isinstance(delay_val, list):
                 delay_threshold = delay_val[0]
             else:
                 delay_threshold = delay_val
-            self.delay = 0 if rs_time < delay_threshold else 1
+            self.delay = 0 if self._delay_value < delay_threshold else 1
         else:
             self.delay = 0
 
@@ -888,6 +933,8 @@ class cherker:
                 "time": time,
             }
         }
+        if phases:
+            status_data[self.task_name]["phases"] = phase_timing.rounded(phases)
 
         # 告警消息 - 简洁版
         expect_code = threshold.get("stat_code", 200)
@@ -927,9 +974,17 @@ class cherker:
         delay_status = "超限" if self.delay == 1 else "正常"
         self.message["stat_delay"] = (
             "- 期望: <{}ms\n- 实际: {}ms\n- 状态: {}\n- 时间: {}\n- URL: {}".format(
-                expect_delay, round(rs_time, 2), delay_status, time, data_dict["url"]
+                expect_delay,
+                round(self._delay_value, 2),
+                delay_status,
+                time,
+                data_dict["url"],
             )
         )
+        if delay_phase:
+            self.message["stat_delay"] = "- 阶段: {}\n{}".format(
+                delay_phase, self.message["stat_delay"]
+            )
 
         # JSON路径匹配告警消息
         if json_path and json_path_value is not None:
@@ -965,76 +1020,40 @@ class cherker:
 
         # 根据任务分类，才不会出现io 冲突
         _ensure_state_dir()
-        datafile = os.path.join(STATE_DIR, "{}.pkl".format(self.task_name))  # 文件名字
         # 一开始设计状态都是好的，生成一个现在的状态和之前的状态，两个对比，发出故障警告或者恢复警告
-        # 第一次运行的时候没有文件，那么先生成文件并存入数据
+        # 第一次运行的时候没有状态文件，那么先生成文件并存入数据
 
-        if not os.path.exists(datafile):
-            self.first_run_task(status_data, threshold, time, datafile)
+        if not state_store.exists(self.task_name):
+            self.first_run_task(status_data, threshold, time)
 
         else:
-            temp_dict = _load_state_data(datafile)
-            if not isinstance(temp_dict, dict):
-                logger.warning(f"状态文件格式异常，使用默认状态: {datafile}")
-                temp_dict = {}
+            temp_dict = _load_state_data(self.task_name)
             self.last_alert_time = temp_dict.get("last_alert_time", {})
             self.last_resp_time = temp_dict.get("last_resp_time")
-            # 保留时间数目
-            histroy_day = (
-                datetime.datetime.now()
-                + datetime.timedelta(days=-config.history_datat_day)
-            ).strftime("%Y-%m-%d")
-            # 插入的key是当天时间
-            key = str(time.split()[0])
-            if key in temp_dict:
-                # 取出当天数据
-                today_list = temp_dict[time.split()[0]]
-                # print(today_list)
-
-                # 响应时间告警：1次超限就告警（与其他告警类型一致）
-                if status_data[self.task_name]["stat_delay"] == 1:
-                    print(
-                        "{} 响应时间超过阈值{}ms".format(
-                            self.task_name,
-                            status_data[self.task_name]["delay"],
-                        )
-                    )
-                    self.now_alarm["delay_warm"] = 1
 
-                # temp_dict 之前保存的所有数据
-                temp_dict[key].append(status_data)
-                # print(temp_dict)
+            # 响应时间告警：1次超限就告警（与其他告警类型一致）
+            if status_data[self.task_name]["stat_delay"] == 1:
+                logger.debug(
+                    "%s 响应时间超过阈值%sms",
+                    self.task_name,
+                    status_data[self.task_name]["delay"],
+                )
+                self.now_alarm["delay_warm"] = 1
 
-            # key不在现有的字典
-            else:
-                # 响应时间告警：1次超限就告警
-                if status_data[self.task_name]["stat_delay"] == 1:
-                    print(
-                        "{} 响应时间超过阈值{}ms".format(
-                            self.task_name,
-                            status_data[self.task_name]["delay"],
-                        )
-                    )
-                    self.now_alarm["delay_warm"] = 1
-                # 设置今天的第一个字典为空
-                temp_dict[key] = []
-                temp_dict[key].append(status_data)
+            # 追加当天历史记录（过期分段在新的一天首次写入时清理）
+            _append_history(self.task_name, time, status_data[self.task_name])
 
             if status_data[self.task_name]["stat_code"] == 1:
-                print(
-                    "{} stat_code is wrong 不是第一次运行   {}".format(
-                        self.task_name, code
-                    )
-                )
+                logger.debug("%s stat_code is wrong 不是第一次运行 %s", self.task_name, code)
                 self.now_alarm["code_warm"] = 1
 
             if status_data[self.task_name]["timeout"] == 1:
-                print("{} is timeout".format(self.task_name))
+                logger.debug("%s is timeout", self.task_name)
                 self.now_alarm["timeout_warm"] = 1
 
             if status_data[self.task_name]["stat_math_str"] == 1:
-                print(
-                    "{} 不存在 {}这个字段".format(self.task_name, threshold["math_str"])
+                logger.debug(
+                    "%s 不存在 %s这个字段", self.task_name, threshold["math_str"]
                 )
                 self.now_alarm["math_warm"] = 1
 
@@ -1043,7 +1062,7 @@ class cherker:
             # enable_alerts = False: 仅收集 Prometheus 指标（通过 Alertmanager 告警）
             # 先保存上次的响应时间（在更新之前）
             self._prev_resp_time = self.last_resp_time
-            self.last_resp_time = status_data[self.task_name].get("delay", rs_time)
+            self.last_resp_time = self._delay_value
 
             # 仅使用“已发送状态”做故障/恢复边沿判断，避免抑制导致的伪恢复
             notified_alarm = temp_dict.get(
@@ -1068,47 +1087,29 @@ class cherker:
                 )
             else:
                 logger.debug("告警通知已禁用（enable_alerts=False），跳过 send_warm")
-            if histroy_day in temp_dict:
-                # 根据配置文件删除历史数据保留天数
-                del temp_dict[histroy_day]
             temp_dict["last_alert_time"] = self.last_alert_time
             temp_dict["last_resp_time"] = self.last_resp_time
+            check_log.log_state_change(
+                self.task_name, temp_dict.get("alarm") or {}, self.now_alarm
+            )
             temp_dict["alarm"] = self.now_alarm
             temp_dict["alarm_notified"] = notified_alarm
-            print(
-                "第二次写入, last_alert_time=",
+            temp_dict["last_check_time"] = time
+            logger.debug(
+                "第二次写入 %s, last_alert_time=%s alarm=%s",
+                self.task_name,
                 self.last_alert_time,
-                "alarm=",
                 self.now_alarm,
             )
-            # print(temp_dict)
-            _save_state_data(datafile, temp_dict)
+            _save_state_data(self.task_name, temp_dict)
 
         # 判定后告警状态指标（1=告警，0=正常）
-        url_check_status_code_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(status_data[self.task_name].get("stat_code", 0))
-        url_check_timeout_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(status_data[self.task_name].get("timeout", 0))
-        url_check_content_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(status_data[self.task_name].get("stat_math_str", 0))
-        url_check_json_path_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(status_data[self.task_name].get("json_warm", 0))
-        url_check_ssl_expiry_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(status_data[self.task_name].get("ssl_warm", 0))
-        url_check_delay_alert.labels(
-            task_name=self.task_name,
-            method=method,
-        ).set(status_data[self.task_name].get("stat_delay", 0))
+        metrics(url_check_status_code_alert).set(status_data[self.task_name].get("stat_code", 0))
+        metrics(url_check_timeout_alert).set(status_data[self.task_name].get("timeout", 0))
+        metrics(url_check_content_alert).set(status_data[self.task_name].get("stat_math_str", 0))
+        metrics(url_check_json_path_alert).set(status_data[self.task_name].get("json_warm", 0))
+        metrics(url_check_ssl_expiry_alert).set(status_data[self.task_name].get("ssl_warm", 0))
+        metrics(url_check_delay_alert).set(status_data[self.task_name].get("stat_delay", 0))
 
         status_warm = status_data[self.task_name].get("stat_code", 0)
         timeout_warm = status_data[self.task_name].get("timeout", 0)
@@ -1132,33 +1133,28 @@ class cherker:
             failed_reasons.append("ssl_expiry")
 
         result = "success" if not failed_reasons else "failed"
-        url_check_task_checks_total.labels(
-            task_name=self.task_name,
-            method=method,
-            result=result,
-        ).inc()
+        check_log.log_result(
+            self.task_name, method, failed_reasons, code, rs_time, content, time
+        )
+        get_rollups().record_check(
+            self.task_name,
+            failed=bool(failed_reasons),
+            # 可用率只看目标是否按预期响应，响应慢与证书临期不算不可用
+            error=bool(status_warm or timeout_warm or content_warm or json_warm),
+            latency_ms=rs_time if code >= 0 and rs_time else None,
+        )
+        metrics(url_check_task_checks_total, result=result).inc()
         for reason in failed_reasons:
-            url_check_task_failures_total.labels(
-                task_name=self.task_name,
-                method=method,
-                reason=reason,
-            ).inc()
+            metrics(url_check_task_failures_total, reason=reason).inc()
 
         # ==========================================================================
         # 更新 Prometheus 聚合指标（兼容旧版）
         # ==========================================================================
 
         if self.timeout == 1:
-            url_check_timeout_total.labels(
-                task_name=self.task_name, method=method
-            ).inc()
+            metrics(url_check_timeout_total).inc()
         else:
-            status_code = str(code)
-            url_check_success_total.labels(
-                task_name=self.task_name, status_code=status_code, method=method
-            ).inc()
+            metrics(url_check_success_total, status_code=str(code)).inc()
 
             if isinstance(rs_time, (int, float)):
-                url_check_response_time_seconds.labels(
-                    task_name=self.task_name, method=method
-                ).observe(rs_time / 1000.0)
+                metrics(url_check_response_time_seconds).observe(rs_time / 1000.0)
@@ -2,7 +2,8 @@ import requests
 from conf import config
 
 
-def ding_sender(title="OMG", msg="message"):
+def ding_sender(title="OMG", msg="message", raise_errors=False):
+    """发送告警到钉钉；raise_errors=True 时发送失败抛出异常（供通知分发器重试）"""
     print("title is:", title)
     print("message is:", msg)
     message = "## " + title + "  \n" + msg
@@ -19,8 +20,13 @@ def ding_sender(title="OMG", msg="message"):
         r.encoding = "utf-8"
         content = r.text
         print("钉钉发送结果:", r.status_code, content)
+        r.raise_for_status()
+        if r.json().get("errcode", 0) != 0:
+            raise RuntimeError("钉钉返回错误: {}".format(content))
     except Exception as e:
         print("钉钉发送失败:", e)
+        if raise_errors:
+            raise
     return "dingding return code status {}".format("success")
 
 
@@ -0,0 +1,390 @@
+"""
+进程内 DNS 解析缓存
+
+功能：
+    - 按 (主机, 端口, 地址族) 缓存 getaddrinfo 结果，过期后重新解析
+    - 同一主机的并发解析合并为一次（single-flight），其余检查等待同一结果
+    - 解析失败短时间负缓存，避免故障域名持续冲击集群 DNS
+    - 线程引擎：urllib3 连接类的 _new_conn 使用缓存结果建连（TLS SNI / Host 头仍为原主机名）
+    - asyncio 引擎：aiohttp 使用同一缓存（view/async_engine.py）
+    - SSL 证书独立探测使用同一缓存
+    - 导出解析耗时与缓存命中率，便于区分 DNS 问题与目标问题
+
+解析顺序与 TTL：
+    getaddrinfo 不返回记录 TTL。dnspython 是可选依赖（不在 requirements.txt 中）：
+    - 先查 hosts 文件（/etc/hosts，含 k8s hostAliases），命中时与系统解析器结果一致，
+      使用 URL_CHECK_DNS_CACHE_TTL
+    - 安装 dnspython 时用 dnspython 解析，地址与 TTL 取自同一次应答，按记录 TTL 缓存
+      （不超过 URL_CHECK_DNS_CACHE_MAX_TTL）
+    - 未安装或 dnspython 解析失败时回退到 getaddrinfo，使用 URL_CHECK_DNS_CACHE_TTL
+      （应不大于实际记录 TTL）
+
+配置：
+    URL_CHECK_DNS_CACHE_ENABLED: 是否启用（默认 true）
+    URL_CHECK_DNS_CACHE_TTL: 缓存秒数（未安装 dnspython 或回退到 getaddrinfo 时）
+    URL_CHECK_DNS_CACHE_MAX_TTL: 按记录 TTL 缓存时的上限（秒）
+    URL_CHECK_DNS_NEGATIVE_TTL: 解析失败结果缓存秒数（0 不缓存）
+"""
+
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection as urllib3_connection
+
+from conf import config
+
+try:
+    import dns.resolver
+except ImportError:  # pragma: no cover - 可选依赖
+    dns = None
+
+logger = logging.getLogger(__name__)
+
+# 缓存条目上限，超出时先清理过期条目，再淘汰最早写入的条目
+MAX_ENTRIES = 10000
+# dnspython 单次解析的总超时（秒）
+DNS_LIFETIME = 2
+# 系统 hosts 文件（k8s hostAliases 也写在这里）
+HOSTS_PATH = "/etc/hosts"
+
+url_check_dns_lookup_seconds = Histogram(
+    "url_check_dns_lookup_seconds",
+    "DNS resolution latency for cache misses",
+    ["result"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+url_check_dns_cache_total = Counter(
+    "url_check_dns_cache_total",
+    "DNS cache lookups by result (hit/miss/shared/negative)",
+    ["result"],
+)
+
+
+def enabled():
+    return bool(getattr(config, "dns_cache_enabled", True))
+
+
+def is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+_hosts = {"mtime": None, "names": {}}
+_hosts_lock = threading.Lock()
+
+
+def _hosts_entries():
+    """解析 hosts 文件（主机名小写 -> 地址列表），文件修改后重新读取"""
+    try:
+        mtime = os.stat(HOSTS_PATH).st_mtime
+    except OSError:
+        return {}
+    with _hosts_lock:
+        if _hosts["mtime"] == mtime:
+            return _hosts["names"]
+        names = {}
+        try:
+            with open(HOSTS_PATH, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    fields = line.split("#", 1)[0].split()
+                    if len(fields) < 2 or not is_ip(fields[0]):
+                        continue
+                    for name in fields[1:]:
+                        names.setdefault(name.lower(), []).append(fields[0])
+        except OSError:
+            return {}
+        _hosts["mtime"], _hosts["names"] = mtime, names
+        return names
+
+
+def _hosts_lookup(host, port, family):
+    """在 hosts 文件中查找主机，返回 getaddrinfo 格式的结果列表；未找到时返回 None"""
+    infos = []
+    for address in _hosts_entries().get(host.lower().rstrip("."), ()):
+        if ":" in address:
+            if family in (socket.AF_UNSPEC, socket.AF_INET6):
+                infos.append((socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, "",
+                              (address, port, 0, 0)))
+        elif family in (socket.AF_UNSPEC, socket.AF_INET):
+            infos.append((socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "",
+                          (address, port)))
+    return infos or None
+
+
+def _dns_lookup(host, port, family):
+    """
+    通过 dnspython 解析，地址与记录 TTL 取自同一次应答
+
+    AF_UNSPEC 先查 A 记录，没有 A 记录时再查 AAAA。
+
+    Returns:
+        tuple | None: (getaddrinfo 格式的结果列表, 记录 TTL)；未安装或解析失败时返回 None
+    """
+    if dns is None:
+        return None
+    if family == socket.AF_INET:
+        rdtypes = ("A",)
+    elif family == socket.AF_INET6:
+        rdtypes = ("AAAA",)
+    else:
+        rdtypes = ("A", "AAAA")
+    for rdtype in rdtypes:
+        try:
+            answer = dns.resolver.resolve(host, rdtype, search=True, lifetime=DNS_LIFETIME)
+        except Exception:
+            continue
+        if rdtype == "A":
+            infos = [
+                (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (r.address, port))
+                for r in answer
+            ]
+        else:
+            infos = [
+                (socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, "",
+                 (r.address, port, 0, 0))
+                for r in answer
+            ]
+        if infos:
+            return infos, answer.rrset.ttl
+    return None
+
+
+class _Flight:
+    """一次进行中的解析，供并发的同主机请求等待"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class DnsCache:
+    """
+    带 TTL 的 getaddrinfo 缓存
+
+    属性：
+        ttl: 默认缓存秒数
+        max_ttl: 按记录 TTL 缓存时的上限
+        negative_ttl: 解析失败缓存秒数
+    """
+
+    def __init__(self, ttl=None, max_ttl=None, negative_ttl=None, max_entries=MAX_ENTRIES):
+        self.ttl = getattr(config, "dns_cache_ttl", 30) if ttl is None else ttl
+        self.max_ttl = getattr(config, "dns_cache_max_ttl", 300) if max_ttl is None else max_ttl
+        if negative_ttl is None:
+            negative_ttl = getattr(config, "dns_negative_ttl", 5)
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, addrinfo 列表或异常)
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._lookups = 0
+
+    def hit_ratio(self):
+        with self._lock:
+            return self._hits / self._lookups if self._lookups else 0.0
+
+    def _count(self, result):
+        url_check_dns_cache_total.labels(result=result).inc()
+        with self._lock:
+            self._lookups += 1
+            if result != "miss":
+                self._hits += 1
+
+    def _store(self, key, expires_at, value):
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            for k in [k for k, v in self._entries.items() if v[0] <= now]:
+                del self._entries[k]
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (expires_at, value)
+
+    def cached(self, host, port=0, family=socket.AF_UNSPEC):
+        """只查缓存，不解析（供事件循环上使用）；未命中返回 None"""
+        key = (host.lower(), port, family)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic() or isinstance(entry[1], Exception):
+            return None
+        self._count("hit")
+        return entry[1]
+
+    def resolve(self, host, port=0, family=socket.AF_UNSPEC):
+        """
+        解析主机名，返回 getaddrinfo 结果列表
+
+        Raises:
+            socket.gaierror: 解析失败（含负缓存命中）
+        """
+        key = (host.lower(), port, family)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            flight = None
+            leader = False
+            if entry is None or entry[0] <= now:
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _Flight()
+                    leader = True
+
+        if flight is None:
+            if isinstance(entry[1], Exception):
+                self._count("negative")
+                raise socket.gaierror(*entry[1].args)
+            self._count("hit")
+            return entry[1]
+
+        if not leader:
+            self._count("shared")
+            flight.event.wait()
+            if flight.error is not None:
+                raise socket.gaierror(*flight.error.args)
+            return flight.result
+
+        self._count("miss")
+        start = time.perf_counter()
+        try:
+            # hosts 文件优先，与系统解析器（nsswitch 默认 files dns）顺序一致
+            result = _hosts_lookup(host, port, family)
+            looked_up = None if result is not None else _dns_lookup(host, port, family)
+            if looked_up is not None:
+                result, record_ttl = looked_up
+                ttl = max(1, min(record_ttl, self.max_ttl))
+            else:
+                if result is None:
+                    result = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+                ttl = self.ttl
+        except OSError as e:
+            url_check_dns_lookup_seconds.labels(result="error").observe(
+                time.perf_counter() - start
+            )
+            flight.error = e
+            if self.negative_ttl > 0:
+                with self._lock:
+                    self._store(key, time.monotonic() + self.negative_ttl, e)
+            raise
+        else:
+            url_check_dns_lookup_seconds.labels(result="ok").observe(time.perf_counter() - start)
+            flight.result = result
+            with self._lock:
+                self._store(key, time.monotonic() + ttl, result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, host):
+        """删除主机的全部缓存（缓存地址连接失败时调用，下次重新解析）"""
+        host = host.lower()
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == host]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = DnsCache()
+
+url_check_dns_cache_hit_ratio = Gauge(
+    "url_check_dns_cache_hit_ratio",
+    "Share of DNS lookups answered from the in-process cache",
+)
+url_check_dns_cache_hit_ratio.set_function(_cache.hit_ratio)
+
+
+def get_cache():
+    return _cache
+
+
+def create_connection(address, timeout, source_address=None, socket_options=None):
+    """
+    使用缓存的解析结果建立 TCP 连接，依次尝试各个地址
+
+    缓存地址全部连接失败时清除该主机缓存，下次重新解析。
+    """
+    host, port = address
+    return connect_addresses(host, port, _cache.resolve(host, port), timeout,
+                             source_address, socket_options)
+
+
+def connect_addresses(host, port, infos, timeout, source_address=None, socket_options=None):
+    """依次连接 getaddrinfo 结果中的地址，全部失败时清除该主机缓存"""
+    last_error = None
+    for _family, _type, _proto, _canonname, sockaddr in infos:
+        try:
+            return urllib3_connection.create_connection(
+                (sockaddr[0], port),
+                timeout,
+                source_address=source_address,
+                socket_options=socket_options,
+            )
+        except OSError as e:
+            last_error = e
+    _cache.invalidate(host)
+    if last_error is None:
+        raise OSError(f"getaddrinfo returned no address for {host}")
+    raise last_error
+
+
+class _CachedDnsConnectionMixin:
+    """
+    urllib3 连接：建连时使用 DNS 缓存，其余行为（SNI、Host 头、证书校验）不变
+
+    解析耗时记录在 self._dns_ms，供分阶段计时使用（view/phase_timing.py）。
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        if not enabled() or is_ip(host):
+            return super()._new_conn()
+        try:
+            start = time.perf_counter()
+            infos = _cache.resolve(host, self.port)
+            self._dns_ms = (time.perf_counter() - start) * 1000
+            return connect_addresses(
+                host,
+                self.port,
+                infos,
+                self.timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options,
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self,
+                f"Connection to {self.host} timed out. (connect timeout={self.timeout})",
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(
+                self, f"Failed to establish a new connection: {e}"
+            ) from e
+
+
+class CachedDnsHTTPConnection(_CachedDnsConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedDnsHTTPSConnection(_CachedDnsConnectionMixin, HTTPSConnection):
+    pass
@@ -0,0 +1,173 @@
+"""
+检查历史查询
+
+功能：
+    - 按时间范围读取任务检查记录：只打开范围内的日期分段，首个分段按稀疏索引定位起始偏移
+    - 分辨率：raw（原始记录）或 1m/5m/1h 时间桶
+    - 时间桶统计：检查数、失败数、响应时间 min/avg/max/p95
+    - 结果逐行生成（JSON Lines），原始记录不在内存中累积；时间桶只保留固定大小的聚合
+
+失败口径与滚动统计一致：状态码/超时/关键字/JSON 校验失败计为失败，响应慢与证书临期不计。
+p95 按响应时间直方图（桶边界同 url_check_http_response_time_ms）插值估算。
+"""
+
+import datetime
+import json
+
+from view.state_store import state_store
+from view.task_rollup import LATENCY_BOUNDS_MS, latency_bucket, quantile
+
+RESOLUTIONS = {"raw": 0, "1m": 60, "5m": 300, "1h": 3600}
+
+# 单次查询最多返回的时间桶数量
+MAX_BUCKETS = 10000
+
+_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+_FAILURE_FIELDS = ("stat_code", "timeout", "stat_math_str", "json_warm")
+
+
+def parse_time(value):
+    """
+    解析查询时间：epoch 秒或 "YYYY-MM-DD HH:MM:SS"
+
+    Raises:
+        ValueError: 格式不支持，或 epoch 超出可表示范围（含 nan/inf）
+    """
+    value = str(value).strip()
+    try:
+        epoch = float(value)
+    except ValueError:
+        return datetime.datetime.strptime(value, _TIME_FMT)
+    try:
+        return datetime.datetime.fromtimestamp(epoch)
+    except (OverflowError, OSError, ValueError) as e:
+        raise ValueError(f"时间超出范围: {value}") from e
+
+
+def validate(task_name, start, end, resolution):
+    """
+    Raises:
+        ValueError: 任务名非法、分辨率不支持、时间范围为空或时间桶过多
+    """
+    if not task_name or task_name in (".", "..") or "/" in task_name or "\\" in task_name:
+        raise ValueError(f"任务名非法: {task_name}")
+    if resolution not in RESOLUTIONS:
+        raise ValueError(
+            "分辨率不支持: {}（可选 {}）".format(resolution, ", ".join(RESOLUTIONS))
+        )
+    if end <= start:
+        raise ValueError("结束时间必须晚于开始时间")
+    step = RESOLUTIONS[resolution]
+    if step and (end - start).total_seconds() / step > MAX_BUCKETS:
+        raise ValueError(f"时间桶超过 {MAX_BUCKETS} 个，请缩小范围或降低分辨率")
+
+
+def iter_range(task_name, start, end, store=None):
+    """
+    逐条返回 start <= time < end 的检查记录
+
+    只打开范围内日期的分段；首个分段从索引偏移开始读。
+    记录在文件中按写入顺序排列（检查时间可能略有先后交错），返回顺序同文件顺序。
+    """
+    store = store or state_store
+    first_day = start.strftime("%Y-%m-%d")
+    last_day = end.strftime("%Y-%m-%d")
+    start_str = start.strftime(_TIME_FMT)
+    end_str = end.strftime(_TIME_FMT)
+    for day in store.days(task_name):
+        if day < first_day or day > last_day:
+            continue
+        offset = store.seek_offset(task_name, day, start.timestamp()) if day == first_day else 0
+        for record in store.iter_records(task_name, day, offset):
+            time_str = record.get("time")
+            if time_str and start_str <= time_str < end_str:
+                yield record
+
+
+def _failed(record):
+    return any(record.get(field) == 1 for field in _FAILURE_FIELDS)
+
+
+def _latency(record):
+    delay = record.get("delay")
+    if record.get("code", -1) >= 0 and isinstance(delay, (int, float)) and delay > 0:
+        return delay
+    return None
+
+
+class _Bucket:
+    """单个时间桶的聚合（固定大小）"""
+
+    __slots__ = ("checks", "failures", "count", "total", "min", "max", "histogram")
+
+    def __init__(self):
+        self.checks = 0
+        self.failures = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+
+    def add(self, record):
+        self.checks += 1
+        if _failed(record):
+            self.failures += 1
+        latency = _latency(record)
+        if latency is None:
+            return
+        self.count += 1
+        self.total += latency
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+        self.histogram[latency_bucket(latency)] += 1
+
+    def to_dict(self, bucket_start):
+        return {
+            "time": bucket_start.strftime(_TIME_FMT),
+            "checks": self.checks,
+            "failures": self.failures,
+            "latency_ms": {
+                "min": round(self.min, 2) if self.min is not None else None,
+                "avg": round(self.total / self.count, 2) if self.count else None,
+                "max": round(self.max, 2) if self.max is not None else None,
+                "p95": quantile(0.95, self.histogram),
+            },
+        }
+
+
+def iter_history(task_name, start, end, resolution="raw", store=None):
+    """
+    按分辨率返回历史数据（字典迭代器）
+
+    raw 逐条返回原始记录；其他分辨率按时间桶聚合后按时间顺序返回（只返回有数据的桶）。
+    """
+    step = RESOLUTIONS[resolution]
+    records = iter_range(task_name, start, end, store)
+    if not step:
+        yield from records
+        return
+
+    # 时间桶按整分钟/整小时对齐
+    origin = start.timestamp() // step * step
+    buckets = {}
+    for record in records:
+        try:
+            moment = datetime.datetime.strptime(record["time"], _TIME_FMT).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        index = int((moment - origin) // step)
+        bucket = buckets.get(index)
+        if bucket is None:
+            bucket = buckets[index] = _Bucket()
+        bucket.add(record)
+    for index in sorted(buckets):
+        bucket_start = datetime.datetime.fromtimestamp(origin + index * step)
+        yield buckets[index].to_dict(bucket_start)
+
+
+def stream_history(task_name, start, end, resolution="raw", store=None):
+    """以 JSON Lines 逐行输出（供 HTTP 流式响应）"""
+    for item in iter_history(task_name, start, end, resolution, store):
+        yield json.dumps(item, ensure_ascii=False) + "\n"
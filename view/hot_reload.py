@@ -2,19 +2,19 @@
 配置文件热重载模块
 
 功能：
-    - 监听 conf/task.ini 文件的变更
+    - 监听 conf/tasks.yaml 与 conf/alerts.yaml 文件的变更
     - 变更时自动重新加载配置（无需重启服务）
     - 支持本地开发环境的热重载
 
 使用场景：
-    - 本地开发：修改 task.ini 后自动生效
+    - 本地开发：修改 tasks.yaml / alerts.yaml 后自动生效
     - K8s 环境：跳过此模块，使用 kubectl rollout restart 更新配置
 
 依赖：
     - watchdog: 文件系统监听库
 """
 
-import threading
+import os
 import time
 import logging
 from watchdog.observers import Observer
@@ -59,10 +59,10 @@ class ConfigFileHandler(FileSystemEventHandler):
         Args:
             event: watchdog 事件对象
         """
-        if event.src_path != self.config_path:
-            return
         if event.is_directory:
             return
+        if os.path.abspath(event.src_path) != os.path.abspath(self.config_path):
+            return
 
         current_time = time.time()
         if current_time - self.last_modified < self.debounce_seconds:
@@ -80,38 +80,57 @@ class ConfigFileHandler(FileSystemEventHandler):
             logger.error(f"🔥 配置热重载异常: {e}")
 
 
-def start_config_watcher():
+def _tasks_reloader(get_instance):
+    """
+    tasks.yaml 变更回调：对当前正在运行的调度实例做差异重载
+
+    调度实例可能随选主切换而替换或为空（备用实例），因此每次变更时重新获取。
+    """
+
+    def reload_tasks():
+        instance = get_instance()
+        if instance is None:
+            logger.info("当前实例未运行调度器，跳过任务重载（成为主实例时会加载最新配置）")
+            return True
+        return instance.safe_reload_config()
+
+    return reload_tasks
+
+
+def start_config_watcher(get_instance):
     """
     启动配置文件监听器
 
     功能：
-        1. 获取 load_config 单例实例
-        2. 创建 Observer 并注册事件处理器
+        1. tasks.yaml 变更时对正在运行的 load_config 实例做差异重载
+        2. 创建 Observer，分别为 tasks.yaml 和 alerts.yaml 注册事件处理器
         3. 启动守护线程持续监听
 
     注意：
         - 在 K8s 环境中会跳过启动（由 reload operator 处理）
         - 监听器以 daemon 线程运行，主进程退出时自动终止
 
+    Args:
+        get_instance: 返回当前调度实例（load_config）的函数，未运行调度器时返回 None
+
     Returns:
         None
     """
-    from view.make_check_instan import load_config
-
     config_path = config.tasks_yaml
-    reload_callback = None
+    reload_callback = _tasks_reloader(get_instance)
 
-    try:
-        instance = load_config()
-        reload_callback = lambda: instance.safe_reload_config()
-    except Exception as e:
-        logger.error(f"获取 load_config 实例失败: {e}")
-        return
+    from conf.alerts_config import ALERTS_YAML, reload_alerts_config
 
-    event_handler = ConfigFileHandler(config_path, reload_callback)
     observer = Observer()
-    observer.schedule(event_handler, path=".", recursive=False)
+    for path, callback in (
+        (config_path, reload_callback),
+        (ALERTS_YAML, reload_alerts_config),
+    ):
+        watch_dir = os.path.dirname(os.path.abspath(path))
+        observer.schedule(
+            ConfigFileHandler(path, callback), path=watch_dir, recursive=False
+        )
     observer.daemon = True
     observer.start()
 
-    logger.info(f"✅ 配置监听器已启动: {config_path}")
+    logger.info(f"✅ 配置监听器已启动: {config_path}, {ALERTS_YAML}")
@@ -0,0 +1,278 @@
+"""
+HTTP 会话与连接池管理（线程引擎）
+
+功能：
+    - 每个代理一个 requests.Session（直连共用一个），代理配置在会话上，不再逐请求传入
+    - 连接池大小可配置：每个会话缓存的主机连接池数量、每个主机保留的 keep-alive 连接数
+    - 空闲超过 URL_CHECK_HTTP_IDLE_SECONDS 的主机连接池被关闭回收，长时间未使用的代理会话一并关闭
+    - 按主机统计请求数与新建连接数，导出连接复用率
+    - 建连时使用进程内 DNS 缓存（view/dns_cache.py）
+    - 连接记录分阶段耗时（view/phase_timing.py）
+
+配置：
+    URL_CHECK_HTTP_POOL_HOSTS: 每个会话缓存的主机连接池数量（超出时淘汰最久未用的主机）
+    URL_CHECK_HTTP_POOL_MAXSIZE: 每个主机保留的 keep-alive 连接数
+    URL_CHECK_HTTP_IDLE_SECONDS: 连接池空闲回收时间（秒，0 不回收）
+
+说明：
+    经 HTTP 代理访问 http:// 地址时连接建立在代理上，指标中的 host 为代理主机；
+    https:// 地址经代理隧道访问，host 为目标主机。
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from prometheus_client import Counter, Gauge
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from conf import config
+from view.dns_cache import CachedDnsHTTPConnection, CachedDnsHTTPSConnection
+from view.phase_timing import TimedConnectionMixin
+
+logger = logging.getLogger(__name__)
+
+url_check_http_requests_total = Counter(
+    "url_check_http_requests_total",
+    "Total number of HTTP requests sent through the shared connection pools",
+    ["host"],
+)
+
+url_check_http_new_connections_total = Counter(
+    "url_check_http_new_connections_total",
+    "Total number of new TCP connections opened by the shared connection pools",
+    ["host"],
+)
+
+url_check_http_pools_closed_total = Counter(
+    "url_check_http_pools_closed_total",
+    "Total number of per-host connection pools closed (reason: evicted/idle)",
+    ["reason"],
+)
+
+url_check_http_sessions = Gauge(
+    "url_check_http_sessions",
+    "Number of open HTTP sessions (one per proxy plus direct)",
+)
+
+
+class _ReuseStats:
+    """进程内请求数与新建连接数，用于计算连接复用率"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def add(self, request_count=0, new_connections=0):
+        with self._lock:
+            self.requests += request_count
+            self.new_connections += new_connections
+
+    def ratio(self):
+        with self._lock:
+            if not self.requests:
+                return 0.0
+            return max(1.0 - self.new_connections / self.requests, 0.0)
+
+
+_stats = _ReuseStats()
+
+url_check_http_connection_reuse_ratio = Gauge(
+    "url_check_http_connection_reuse_ratio",
+    "Share of HTTP requests served on an existing keep-alive connection",
+)
+url_check_http_connection_reuse_ratio.set_function(_stats.ratio)
+
+
+class _CountingPoolMixin:
+    """统计每个主机的请求数与新建连接数，并记录最近使用时间"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_used = time.monotonic()
+
+    def _new_conn(self):
+        url_check_http_new_connections_total.labels(host=self.host).inc()
+        _stats.add(new_connections=1)
+        return super()._new_conn()
+
+    def urlopen(self, method, url, *args, **kwargs):
+        self.last_used = time.monotonic()
+        url_check_http_requests_total.labels(host=self.host).inc()
+        _stats.add(request_count=1)
+        return super().urlopen(method, url, *args, **kwargs)
+
+
+class TimedHTTPConnection(TimedConnectionMixin, CachedDnsHTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, CachedDnsHTTPSConnection):
+    pass
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+POOL_CLASSES = {
+    "http": CountingHTTPConnectionPool,
+    "https": CountingHTTPSConnectionPool,
+}
+
+
+def _close_evicted(pool):
+    url_check_http_pools_closed_total.labels(reason="evicted").inc()
+    pool.close()
+
+
+def _instrument(manager):
+    manager.pool_classes_by_scheme = POOL_CLASSES
+    manager.pools.dispose_func = _close_evicted
+    return manager
+
+
+class PooledAdapter(HTTPAdapter):
+    """使用计数连接池的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        _instrument(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        new = proxy not in self.proxy_manager
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        # SOCKS 代理使用 urllib3 自带的连接池类
+        if new and not proxy.lower().startswith("socks"):
+            _instrument(manager)
+        return manager
+
+    def managers(self):
+        return [self.poolmanager] + list(self.proxy_manager.values())
+
+
+def reap_idle_pools(manager, idle_seconds, now=None):
+    """关闭 manager 中空闲超过 idle_seconds 的主机连接池，返回关闭数量"""
+    now = time.monotonic() if now is None else now
+    pools = manager.pools
+    with pools.lock:
+        idle = [
+            key
+            for key, pool in pools._container.items()
+            if now - getattr(pool, "last_used", now) >= idle_seconds
+        ]
+        closed = [pools._container.pop(key) for key in idle]
+    for pool in closed:
+        pool.close()
+    if closed:
+        url_check_http_pools_closed_total.labels(reason="idle").inc(len(closed))
+    return len(closed)
+
+
+class SessionRegistry:
+    """
+    按代理划分的 requests.Session 集合
+
+    属性：
+        pool_hosts: 每个会话缓存的主机连接池数量
+        pool_maxsize: 每个主机保留的连接数
+        idle_seconds: 空闲回收时间（秒，0 不回收）
+    """
+
+    def __init__(self, pool_hosts=None, pool_maxsize=None, idle_seconds=None):
+        self.pool_hosts = pool_hosts or getattr(config, "http_pool_hosts", 200)
+        self.pool_maxsize = pool_maxsize or getattr(config, "http_pool_maxsize", 10)
+        if idle_seconds is None:
+            idle_seconds = getattr(config, "http_idle_seconds", 300)
+        self.idle_seconds = idle_seconds
+        # proxy -> [session, adapter, last_used]
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._next_reap = time.monotonic() + self.idle_seconds
+
+    def _create(self, proxy):
+        session = requests.Session()
+        adapter = PooledAdapter(
+            pool_connections=self.pool_hosts, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if proxy:
+            # 仅用于标识；实际代理由每次请求的 proxies 参数指定（见 probe_spec._request），
+            # 会话级设置在存在 HTTP(S)_PROXY 环境变量时会被覆盖
+            session.proxies.update({"http": proxy, "https": proxy})
+        return [session, adapter, time.monotonic()]
+
+    def get(self, proxy=None):
+        """返回代理对应的会话（proxy 为空时返回直连会话）"""
+        self.maybe_reap()
+        with self._lock:
+            entry = self._sessions.get(proxy)
+            if entry is None:
+                entry = self._sessions[proxy] = self._create(proxy)
+                url_check_http_sessions.set(len(self._sessions))
+            entry[2] = time.monotonic()
+            return entry[0]
+
+    def maybe_reap(self):
+        """到了回收周期时回收空闲连接池（在检查线程中顺带执行，不需要额外线程）"""
+        if self.idle_seconds <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_reap:
+            return
+        self._next_reap = now + self.idle_seconds
+        try:
+            self.reap(now)
+        except Exception as e:
+            logger.error(f"回收空闲连接失败: {e}")
+
+    def reap(self, now=None):
+        """
+        关闭空闲的主机连接池与长时间未使用的代理会话
+
+        Returns:
+            int: 关闭的主机连接池数量
+        """
+        now = time.monotonic() if now is None else now
+        closed = 0
+        with self._lock:
+            entries = list(self._sessions.items())
+        for proxy, entry in entries:
+            session, adapter = entry[0], entry[1]
+            if proxy:
+                with self._lock:
+                    # 在锁内复查，避免关闭刚被取用的会话
+                    expired = now - entry[2] >= self.idle_seconds
+                    if expired:
+                        self._sessions.pop(proxy, None)
+                        url_check_http_sessions.set(len(self._sessions))
+                if expired:
+                    session.close()
+                    continue
+            for manager in adapter.managers():
+                closed += reap_idle_pools(manager, self.idle_seconds, now)
+        return closed
+
+    def close(self):
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+            url_check_http_sessions.set(0)
+        for session, _, _ in entries:
+            session.close()
+
+
+_registry = SessionRegistry()
+
+
+def get_session(proxy=None):
+    """线程引擎使用的会话（按代理复用）"""
+    return _registry.get(proxy)
@@ -0,0 +1,417 @@
+"""
+调度器 Leader 选举模块
+
+功能：
+    - 保证多个 gunicorn worker / 多个 Pod 中只有一个实例运行检查调度器
+    - 其余实例作为 standby，不执行检查；任务操作与进程内统计请求转发给 leader
+      （见 view/leader_forward.py）
+    - Leader 退出或失联后，standby 在一个重试周期内接管
+
+后端：
+    file: 本机文件锁（fcntl.flock），适用于同一主机/Pod 内多个 worker
+    k8s:  coordination.k8s.io/v1 Lease，适用于多副本部署（需要 RBAC，见 k8s/rbac.yaml）
+    off:  不选举，每个进程都运行调度器（旧版行为）
+
+配置：
+    URL_CHECK_LEADER_ELECTION: off/file/k8s（默认 file）
+    URL_CHECK_LEADER_LOCK_FILE: 文件锁路径（默认 data/scheduler.lock）
+    URL_CHECK_LEADER_LEASE_NAME: Lease 名称（默认 url-check-scheduler）
+    URL_CHECK_LEADER_LEASE_SECONDS: Lease 有效期（秒）
+    URL_CHECK_LEADER_RETRY_SECONDS: 续约/抢占间隔（秒）
+"""
+
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+
+import requests
+from prometheus_client import Counter, Gauge
+
+from conf import config
+from view import sharding
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 非 POSIX 平台
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SA_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+# Lease 注解：leader 转发端口地址（POD_IP:端口）
+ADDRESS_ANNOTATION = "url-check/leader-address"
+
+url_check_leader = Gauge(
+    "url_check_leader",
+    "Whether this process runs the check scheduler (1=leader, 0=standby)",
+    multiprocess_mode="livemax",
+)
+
+url_check_leader_transitions_total = Counter(
+    "url_check_leader_transitions_total",
+    "Total number of leadership transitions of this process",
+    ["event"],
+)
+
+
+def _identity():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FileLeaderLock:
+    """
+    本机文件锁
+
+    锁与打开的文件描述符绑定，进程退出（包括崩溃）时由内核自动释放。
+    必须在 fork 之后获取，否则父子进程共享同一把锁。
+    """
+
+    lease_seconds = None
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{_identity()}\n".encode("utf-8"))
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class K8sLeaseLock:
+    """
+    Kubernetes Lease 锁（直接调用 API Server REST 接口）
+
+    使用 resourceVersion 乐观并发控制：同时抢占时只有一个 PUT/POST 成功，其余返回 409。
+    """
+
+    def __init__(self, name, lease_seconds=15, namespace=None, identity=None, advertise=None):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.identity = identity or _identity()
+        # 本实例成为 leader 时公布的转发地址；leader_address 为最近一次读到的 leader 地址
+        self.advertise = advertise
+        self.leader_address = None
+        self.namespace = namespace or self._read_sa_file(
+            "namespace", os.getenv("POD_NAMESPACE", "default")
+        )
+        host = os.getenv("KUBERNETES_SERVICE_HOST", "kubernetes.default.svc")
+        port = os.getenv("KUBERNETES_SERVICE_PORT", "443")
+        self.base_url = (
+            f"https://{host}:{port}/apis/coordination.k8s.io/v1"
+            f"/namespaces/{self.namespace}/leases"
+        )
+        self.session = requests.Session()
+        ca_path = os.path.join(SA_DIR, "ca.crt")
+        self.session.verify = ca_path if os.path.exists(ca_path) else True
+
+    @staticmethod
+    def _read_sa_file(name, default=None):
+        try:
+            with open(os.path.join(SA_DIR, name), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return default
+
+    def _headers(self):
+        # token 会被 kubelet 定期轮换，每次请求重新读取
+        token = self._read_sa_file("token", "")
+        return {"Authorization": f"Bearer {token}"}
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    @staticmethod
+    def _format_time(value):
+        return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    @staticmethod
+    def _parse_time(value):
+        if not value:
+            return None
+        for fmt in ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ"):
+            try:
+                return datetime.datetime.strptime(value, fmt).replace(
+                    tzinfo=datetime.timezone.utc
+                )
+            except ValueError:
+                continue
+        return None
+
+    def _expired(self, spec, now):
+        renew_time = self._parse_time(spec.get("renewTime"))
+        duration = spec.get("leaseDurationSeconds") or self.lease_seconds
+        return renew_time is None or renew_time + datetime.timedelta(seconds=duration) < now
+
+    def try_acquire(self):
+        """抢占或续约 Lease，返回是否持有；API 不可达时抛出异常"""
+        now = self._now()
+        url = f"{self.base_url}/{self.name}"
+        resp = self.session.get(url, headers=self._headers(), timeout=5)
+
+        if resp.status_code == 404:
+            body = {
+                "apiVersion": "coordination.k8s.io/v1",
+                "kind": "Lease",
+                "metadata": {
+                    "name": self.name,
+                    "annotations": {ADDRESS_ANNOTATION: self.advertise or ""},
+                },
+                "spec": {
+                    "holderIdentity": self.identity,
+                    "leaseDurationSeconds": self.lease_seconds,
+                    "acquireTime": self._format_time(now),
+                    "renewTime": self._format_time(now),
+                    "leaseTransitions": 0,
+                },
+            }
+            resp = self.session.post(
+                self.base_url, headers=self._headers(), json=body, timeout=5
+            )
+            if resp.status_code == 409:
+                return False
+            resp.raise_for_status()
+            self.leader_address = self.advertise
+            return True
+
+        resp.raise_for_status()
+        lease = resp.json()
+        spec = lease.setdefault("spec", {})
+        annotations = lease.setdefault("metadata", {}).get("annotations") or {}
+        holder = spec.get("holderIdentity")
+        if holder and holder != self.identity and not self._expired(spec, now):
+            self.leader_address = annotations.get(ADDRESS_ANNOTATION) or None
+            return False
+
+        if holder != self.identity:
+            spec["holderIdentity"] = self.identity
+            spec["acquireTime"] = self._format_time(now)
+            spec["leaseTransitions"] = (spec.get("leaseTransitions") or 0) + 1
+        spec["leaseDurationSeconds"] = self.lease_seconds
+        spec["renewTime"] = self._format_time(now)
+        lease["metadata"]["annotations"] = dict(
+            annotations, **{ADDRESS_ANNOTATION: self.advertise or ""}
+        )
+
+        resp = self.session.put(url, headers=self._headers(), json=lease, timeout=5)
+        if resp.status_code == 409:
+            return False
+        resp.raise_for_status()
+        self.leader_address = self.advertise
+        return True
+
+    def release(self):
+        """主动释放 Lease，standby 无需等待过期即可接管"""
+        url = f"{self.base_url}/{self.name}"
+        try:
+            resp = self.session.get(url, headers=self._headers(), timeout=5)
+            resp.raise_for_status()
+            lease = resp.json()
+            spec = lease.get("spec", {})
+            if spec.get("holderIdentity") != self.identity:
+                return
+            spec["holderIdentity"] = None
+            spec["leaseDurationSeconds"] = 1
+            self.session.put(url, headers=self._headers(), json=lease, timeout=5)
+        except Exception as e:
+            logger.warning(f"释放 Lease 失败: {e}")
+
+
+class LeaderElector:
+    """
+    Leader 选举循环
+
+    属性：
+        lock: FileLeaderLock / K8sLeaseLock
+        retry_seconds: 续约/抢占间隔
+        on_started_leading: 成为 leader 时回调（启动调度器）
+        on_stopped_leading: 失去 leader 时回调（停止调度器）
+    """
+
+    def __init__(self, lock, retry_seconds=5, on_started_leading=None, on_stopped_leading=None):
+        self.lock = lock
+        self.retry_seconds = retry_seconds
+        self.on_started_leading = on_started_leading
+        self.on_stopped_leading = on_stopped_leading
+        self._leader = False
+        self._last_renew = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def is_leader(self):
+        return self._leader
+
+    def _attempt(self):
+        try:
+            held = self.lock.try_acquire()
+        except Exception as e:
+            logger.warning(f"Leader 选举请求失败: {e}")
+            # 续约失败但 Lease 尚未过期时继续保持，避免 API 抖动导致调度器反复启停
+            lease_seconds = getattr(self.lock, "lease_seconds", None)
+            held = (
+                self._leader
+                and lease_seconds is not None
+                and time.monotonic() - self._last_renew < lease_seconds - self.retry_seconds
+            )
+
+        if held:
+            if self._leader:
+                self._last_renew = time.monotonic()
+                return
+            self._last_renew = time.monotonic()
+            self._leader = True
+            url_check_leader.set(1)
+            url_check_leader_transitions_total.labels(event="acquired").inc()
+            logger.info("成为调度 leader，启动检查调度器")
+            if self.on_started_leading:
+                try:
+                    self.on_started_leading()
+                except Exception as e:
+                    logger.error(f"启动调度器失败，释放 leader: {e}")
+                    self._step_down()
+        elif self._leader:
+            logger.warning("失去调度 leader，停止检查调度器")
+            self._step_down()
+
+    def _step_down(self):
+        self._leader = False
+        url_check_leader.set(0)
+        url_check_leader_transitions_total.labels(event="lost").inc()
+        if self.on_stopped_leading:
+            try:
+                self.on_stopped_leading()
+            except Exception as e:
+                logger.error(f"停止调度器失败: {e}")
+        try:
+            self.lock.release()
+        except Exception as e:
+            logger.warning(f"释放 leader 锁失败: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.retry_seconds):
+            self._attempt()
+
+    def start(self):
+        """首次抢占同步执行，之后在后台线程中续约/抢占"""
+        if self._thread is not None:
+            return
+        url_check_leader.set(0)
+        self._attempt()
+        self._thread = threading.Thread(
+            target=self._loop, name="url-check-leader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._leader:
+            self._step_down()
+
+
+def election_mode():
+    mode = str(getattr(config, "leader_election", "file") or "off").lower()
+    if mode == "file" and fcntl is None:
+        return "off"
+    return mode
+
+
+def forward_port():
+    """leader 转发端口（0 表示不转发）"""
+    return int(getattr(config, "leader_forward_port", 4001) or 0)
+
+
+def advertise_address():
+    """k8s 模式下写入 Lease 注解的转发地址；没有 POD_IP 时不公布"""
+    pod_ip = os.getenv("POD_IP")
+    port = forward_port()
+    if not pod_ip or not port:
+        return None
+    return f"{pod_ip}:{port}"
+
+
+def build_lock(mode=None):
+    mode = mode or election_mode()
+    # 分片部署时每个分片独立选举，锁名带分片序号
+    index, count = sharding.shard_config()
+    suffix = f"-{index}" if count > 1 else ""
+    if mode == "file":
+        path = getattr(config, "leader_lock_file", "data/scheduler.lock")
+        return FileLeaderLock(path + suffix)
+    if mode == "k8s":
+        return K8sLeaseLock(
+            getattr(config, "leader_lease_name", "url-check-scheduler") + suffix,
+            lease_seconds=getattr(config, "leader_lease_seconds", 15),
+            advertise=advertise_address(),
+        )
+    return None
+
+
+_elector = None
+_elector_pid = None
+_elector_lock = threading.Lock()
+
+
+def start_election(on_started_leading, on_stopped_leading=None):
+    """
+    启动当前进程的 leader 选举（每个进程只启动一次）
+
+    Returns:
+        LeaderElector: 选举器；URL_CHECK_LEADER_ELECTION=off 时返回 None
+    """
+    global _elector, _elector_pid
+    with _elector_lock:
+        # fork 出的子进程不继承父进程的选举线程与锁
+        if _elector is not None and _elector_pid == os.getpid():
+            return _elector
+        lock = build_lock()
+        if lock is None:
+            return None
+        _elector = LeaderElector(
+            lock,
+            retry_seconds=getattr(config, "leader_retry_seconds", 5),
+            on_started_leading=on_started_leading,
+            on_stopped_leading=on_stopped_leading,
+        )
+        _elector_pid = os.getpid()
+        _elector.start()
+    return _elector
+
+
+def get_elector():
+    if _elector is not None and _elector_pid == os.getpid():
+        return _elector
+    return None
+
+
+def role():
+    """当前进程角色：leader / standby / disabled"""
+    elector = get_elector()
+    if elector is None:
+        return "disabled" if election_mode() == "off" else "standby"
+    return "leader" if elector.is_leader() else "standby"
@@ -0,0 +1,165 @@
+"""
+standby -> leader 请求转发
+
+任务操作（/job/opt）与进程内统计（/scheduler/concurrency、/tasks/<name>/stats）只有
+运行调度器的 leader 进程能处理。多 worker / 多副本共用一个 Service 端口时，请求会落到
+任意进程上，standby 收到后转发给 leader，而不是直接返回 409。
+
+功能：
+    - leader 进程额外监听转发端口（URL_CHECK_LEADER_FORWARD_PORT，默认 4001），
+      失去 leader 时关闭；gunicorn 多 worker 共用业务端口，无法指定某个 worker，因此单独监听
+    - file 模式（同一主机多 worker）：监听 127.0.0.1，standby 转发到本机转发端口
+    - k8s 模式：监听 0.0.0.0，leader 把 POD_IP:端口 写入 Lease 注解，standby 续约/抢占时读取
+    - 转发的请求带 X-Url-Check-Forwarded 头，接收方不会再次转发，避免循环
+
+配置：
+    URL_CHECK_LEADER_FORWARD_PORT: 转发端口（0 关闭转发，standby 返回 409）
+    URL_CHECK_LEADER_FORWARD_TIMEOUT: 转发超时（秒）
+    POD_IP: k8s 模式下 leader 对外公布的地址（Downward API 注入）
+"""
+
+import logging
+import threading
+
+import requests
+from prometheus_client import Counter
+
+from conf import config
+from view import leader
+
+logger = logging.getLogger(__name__)
+
+FORWARD_HEADER = "X-Url-Check-Forwarded"
+
+# 转发时不透传的逐跳头
+_HOP_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "transfer-encoding",
+}
+
+url_check_leader_forward_total = Counter(
+    "url_check_leader_forward_total",
+    "Total number of requests forwarded from standby to the leader",
+    ["result"],
+)
+
+
+def leader_url():
+    """当前 leader 转发端口的 URL，无法确定时返回 None"""
+    port = leader.forward_port()
+    if not port:
+        return None
+    mode = leader.election_mode()
+    if mode == "file":
+        return f"http://127.0.0.1:{port}"
+    if mode == "k8s":
+        elector = leader.get_elector()
+        address = getattr(getattr(elector, "lock", None), "leader_address", None)
+        return f"http://{address}" if address else None
+    return None
+
+
+def is_forwarded(request):
+    return bool(request.headers.get(FORWARD_HEADER))
+
+
+def forward(request):
+    """
+    把当前 Flask 请求转发给 leader
+
+    Returns:
+        tuple | None: (body, status, headers)；无法转发（已是转发请求、未启用、找不到
+            leader）时返回 None，由调用方返回 409
+    """
+    if is_forwarded(request):
+        return None
+    base = leader_url()
+    if base is None:
+        return None
+    headers = {
+        key: value
+        for key, value in request.headers.items()
+        if key.lower() not in _HOP_HEADERS and key.lower() != "host"
+    }
+    headers[FORWARD_HEADER] = "1"
+    try:
+        resp = requests.request(
+            request.method,
+            base + request.full_path.rstrip("?"),
+            data=request.get_data(),
+            headers=headers,
+            timeout=getattr(config, "leader_forward_timeout", 10),
+            # 只在集群内部转发，不走环境变量中的代理
+            proxies={"http": None, "https": None},
+        )
+    except requests.RequestException as e:
+        url_check_leader_forward_total.labels(result="error").inc()
+        logger.warning(f"转发请求到 leader 失败 {base}: {e}")
+        return (
+            {"role": leader.role(), "error": f"转发到调度 leader 失败: {e}"},
+            503,
+            {},
+        )
+    url_check_leader_forward_total.labels(result="ok").inc()
+    response_headers = {
+        key: value
+        for key, value in resp.headers.items()
+        if key.lower() not in _HOP_HEADERS
+    }
+    return resp.content, resp.status_code, response_headers
+
+
+class ForwardServer:
+    """leader 进程上的转发端口监听（werkzeug 多线程服务）"""
+
+    def __init__(self):
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, app, host, port):
+        from werkzeug.serving import make_server
+
+        with self._lock:
+            if self._server is not None:
+                return True
+            try:
+                server = make_server(host, port, app, threaded=True)
+            except OSError as e:
+                logger.error(f"leader 转发端口监听失败 {host}:{port}: {e}")
+                return False
+            self._server = server
+            self._thread = threading.Thread(
+                target=server.serve_forever, name="url-check-leader-forward", daemon=True
+            )
+            self._thread.start()
+            logger.info(f"leader 转发端口已监听 {host}:{port}")
+            return True
+
+    def stop(self):
+        with self._lock:
+            server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+_server = ForwardServer()
+
+
+def serve(app):
+    """成为 leader 后调用：开始监听转发端口（未选举或关闭转发时不监听）"""
+    port = leader.forward_port()
+    mode = leader.election_mode()
+    if not port or mode not in ("file", "k8s"):
+        return False
+    host = "127.0.0.1" if mode == "file" else "0.0.0.0"
+    return _server.start(app, host, port)
+
+
+def shutdown():
+    """失去 leader 后调用：关闭转发端口"""
+    _server.stop()
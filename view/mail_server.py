@@ -27,6 +27,7 @@ def mailconf(tos,subject,content):
         s.set_debuglevel(1)
         s.login(smtp_username, smtp_password)
         s.sendmail(smtp_username,tos, msg.as_string())
+        s.quit()
 
         return True
     except  ValueError as e:
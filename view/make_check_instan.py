@@ -3,38 +3,44 @@
 # =============================================================================
 # 功能：
 #   - 解析配置文件 (conf/tasks.yaml)
-#   - 创建 GET/POST 检查任务
+#   - 编译 GET/POST/HEAD/PUT 检查任务为 ProbeSpec（view/probe_spec.py）
 #   - 使用 APScheduler 实现定时调度
 #   - 支持运行时动态添加/删除任务
 #
 # 优化特性：
-#   - 连接池复用：全局 requests.Session 减少 TCP 握手开销
-#   - 响应大小限制：避免大响应耗尽资源
-#   - 重试机制：网络异常时自动重试
+#   - 连接池复用：按代理复用会话，连接池大小可配置，空闲连接回收（view/http_sessions.py）
+#   - 证书复用：SSL 到期天数直接读取检查连接上的证书，不再额外握手
+#   - 响应大小限制：分块读取正文，超限即停，避免大响应耗尽内存
+#   - 重试机制：网络异常时按指数退避注册一次性延迟重试，不阻塞工作线程（view/retry.py）
+#   - 可选 asyncio 引擎：URL_CHECK_ENGINE=asyncio 时由 view/async_engine.py 执行检查
+#   - 调度打散：同周期任务按任务名哈希错开触发时刻（view/schedule_spread.py）
+#   - 线程池自动伸缩：按 Little 定律与排队等待调整线程数（view/pool_autosize.py）
+#   - 可选分片：URL_CHECK_SHARD_COUNT>1 时按一致性哈希只调度本分片任务（view/sharding.py）
 #
 # 任务生命周期：
 #   1. load_config 读取配置文件
-#   2. loading_task() 遍历所有任务，创建检查任务
-#   3. BackgroundScheduler 按 interval 执行检查
+#   2. loading_task() 遍历所有任务，每个任务编译一次为不可变 ProbeSpec
+#   3. BackgroundScheduler 按 interval 执行 run_probe(spec)
 #   4. 检查结果传递给 cherker 处理
 # =============================================================================
 
 from apscheduler.schedulers.background import BackgroundScheduler
 import yaml
-import requests
-from requests import exceptions
-from requests.exceptions import HTTPError
 from conf import config
 import datetime
-from view.checke_control import cherker
+import hashlib
+import json
+import logging
 import time
-import ssl
-import socket
-from urllib.parse import urlparse
-from prometheus_client import Counter, Gauge
-
-# 全局 Session 用于连接池复用
-http_session = requests.Session()
+from prometheus_client import Counter, Gauge, Histogram
+from view.checke_control import remove_task_metrics
+from view.probe_spec import ProbeSpec, run_probe
+from view import sharding
+from view.schedule_spread import concurrency_profile, jitter_seconds, start_date_for
+from view.sched_metrics import attach_listeners
+from view.pool_autosize import AdaptiveThreadPoolExecutor
+from view import retry
+from view.task_rollup import get_registry as get_rollups
 
 url_check_config_reload_total = Counter(
     "url_check_config_reload_total",
@@ -47,418 +53,36 @@ url_check_config_tasks_total = Gauge(
     "Current configured task count after latest load/reload",
 )
 
+url_check_config_reload_tasks = Gauge(
+    "url_check_config_reload_tasks",
+    "Tasks touched by the latest config reload (change: added/changed/removed/unchanged)",
+    ["change"],
+)
 
-def get_ssl_cert_expiry_days(url, verify=True):
-    """
-    直接获取SSL证书剩余天数
-
-    Args:
-        url: 完整URL（如 https://example.com）
-        verify: 是否验证证书（如果为False则跳过检查）
-
-    Returns:
-        int: 剩余天数，获取失败或verify=False时返回 None
-    """
-    # 如果跳过证书验证，则不检查过期时间
-    if not verify:
-        return None
-
-    try:
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        port = parsed.port or 443
-
-        context = ssl.create_default_context()
-
-        with socket.create_connection((hostname, port), timeout=5) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                cert = ssock.getpeercert()
-                if cert and "notAfter" in cert:
-                    not_after_str = cert["notAfter"]
-                    not_after = datetime.datetime.strptime(
-                        not_after_str, "%b %d %H:%M:%S %Y %Z"
-                    )
-                    days = (not_after - datetime.datetime.now()).days
-                    return days
-    except Exception:
-        pass
-    return None
-
-
-class get_method:
-    """
-    GET 请求检查任务
-    """
+url_check_config_reload_duration_seconds = Histogram(
+    "url_check_config_reload_duration_seconds",
+    "Time spent applying a config reload",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
 
-    def __init__(
-        self,
-        task_name,
-        url,
-        headers=None,
-        cookies=None,
-        payload=None,
-        timeout=10,
-        threshold=None,
-        max_response_size=None,
-        retry_count=0,
-        retry_delay=1,
-        proxy=None,
-        ssl_verify=True,
-        ssl_warning_days=30,
-        expect_json=False,
-        json_path=None,
-        json_path_value=None,
-    ):
-        """
-        初始化 GET 检查任务
-        """
-        self.task_name = task_name
-        self.url = url
-        self.header = headers
-        self.payload = payload
-        self.timeout = timeout
-        self.cookies = cookies
-        self.threshold = threshold
-        self.max_response_size = max_response_size
-        self.retry_count = retry_count
-        self.retry_delay = retry_delay
-        self.proxy = proxy
-        self.ssl_verify = ssl_verify
-        self.ssl_warning_days = ssl_warning_days
-        self.expect_json = expect_json
-        self.json_path = json_path
-        self.json_path_value = json_path_value
-
-    def get_instan(self):
-        """
-        执行 GET 请求检查
-        """
-        last_error = None
-        for attempt in range(self.retry_count + 1):
-            try:
-                data = {}
-                now_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                # 处理 proxy 配置，支持 __HOST__ 关键字
-                proxy = self.proxy
-                if proxy:
-                    from conf import config
-
-                    host_ip = getattr(config, "HOST_IP", "host.docker.internal")
-                    proxy = proxy.replace("__HOST__", host_ip)
-
-                proxies = {"http": proxy, "https": proxy} if proxy else None
-
-                # SSL 验证配置
-                verify = self.ssl_verify
-
-                r = http_session.get(
-                    self.url,
-                    headers=self.header,
-                    cookies=self.cookies,
-                    data=self.payload,
-                    timeout=self.timeout,
-                    stream=True,
-                    proxies=proxies,
-                    verify=verify,
-                )
-                r.raise_for_status()
-                r.encoding = "utf-8"
-
-                # SSL 证书有效期检查（使用独立函数）
-                ssl_expiry_days = get_ssl_cert_expiry_days(self.url, verify=verify)
-                if ssl_expiry_days is not None:
-                    print(f"SSL 证书剩余 {ssl_expiry_days} 天")
-
-                    # 更新 Prometheus 指标
-                    from view.checke_control import url_check_ssl_expiry_days
-
-                    url_check_ssl_expiry_days.labels(
-                        task_name=self.task_name, method="get"
-                    ).set(ssl_expiry_days)
-
-                    # 证书即将过期告警
-                    if ssl_expiry_days < self.ssl_warning_days:
-                        print(
-                            f"警告: {self.task_name} SSL 证书将在 {ssl_expiry_days} 天后过期"
-                        )
-
-                # 更新 SSL 验证状态指标
-                from view.checke_control import url_check_ssl_verified
-
-                url_check_ssl_verified.labels(
-                    task_name=self.task_name, method="get", verified=str(verify).lower()
-                ).inc()
-
-                content = ""
-                if self.max_response_size:
-                    content_len = len(r.content)
-                    if content_len > self.max_response_size:
-                        print(
-                            f"警告: {self.task_name} 响应大小 {content_len} 字节超过限制 {self.max_response_size}，跳过内容解析"
-                        )
-                        content = ""
-                    else:
-                        content = r.text
-                else:
-                    content = r.text
-
-                retime = r.elapsed.total_seconds() * 1000
-                statuscode = r.status_code
-                data = {
-                    "url_name": self.task_name,
-                    "url": self.url,
-                    "stat_code": statuscode,
-                    "timeout": 0,
-                    "resp_time": retime,
-                    "contents": content,
-                    "time": now_time,
-                    "threshold": self.threshold,
-                    "expect_json": self.expect_json,
-                    "json_path": self.json_path,
-                    "json_path_value": self.json_path_value,
-                    "ssl_expiry_days": ssl_expiry_days,
-                    "ssl_warning_days": self.ssl_warning_days,
-                }
-                print(data)
-                ck = cherker(method="get")
-                ck.make_data(data)
-                return
-
-            except HTTPError as e:
-                last_error = e
-                # 修复：使用 is not None 而不是依赖布尔值判断
-                # 因为 Response 对象的 __bool__ 方法在 HTTP 错误时返回 False
-                status_code = e.response.status_code if e.response is not None else 0
-                print(f"警告: {self.task_name} HTTP错误: {status_code} {e}")
-                data = {
-                    "url_name": self.task_name,
-                    "url": self.url,
-                    "stat_code": status_code,
-                    "timeout": 0,
-                    "resp_time": 0,
-                    "contents": str(e),
-                    "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "threshold": self.threshold,
-                    "expect_json": self.expect_json,
-                    "json_path": self.json_path,
-                    "json_path_value": self.json_path_value,
-                    "ssl_expiry_days": None,
-                    "ssl_warning_days": self.ssl_warning_days,
-                }
-                print(data)
-                ck = cherker(method="get")
-                ck.make_data(data)
-                return
+url_check_report_generate_seconds = Histogram(
+    "url_check_report_generate_seconds",
+    "Time spent generating the periodic summary report",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
 
-            except Exception as e:
-                last_error = e
-                if attempt < self.retry_count:
-                    print(
-                        f"第 {attempt + 1} 次请求失败，{self.retry_delay} 秒后重试: {e}"
-                    )
-                    time.sleep(self.retry_delay)
-
-        print(f"警告: {self.task_name} 重试 {self.retry_count} 次均失败: {last_error}")
-        data = {
-            "url_name": self.task_name,
-            "url": self.url,
-            "threshold": self.threshold,
-            "timeout": 1,
-            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "expect_json": self.expect_json,
-            "json_path": self.json_path,
-            "json_path_value": self.json_path_value,
-        }
-        print(data)
-        ck = cherker(method="get")
-        ck.make_data(data)
+logger = logging.getLogger(__name__)
 
 
-class post_method:
-    """
-    POST 请求检查任务
+def task_fingerprint(task):
     """
+    任务定义指纹：去掉值为空的字段后按键排序序列化，再取摘要
 
-    def __init__(
-        self,
-        task_name,
-        url,
-        headers=None,
-        cookies=None,
-        payload=None,
-        timeout=None,
-        threshold=None,
-        max_response_size=None,
-        retry_count=0,
-        retry_delay=1,
-        proxy=None,
-        ssl_verify=True,
-        ssl_warning_days=30,
-        expect_json=False,
-        json_path=None,
-        json_path_value=None,
-    ):
-        """
-        初始化 POST 检查任务
-        """
-        self.task_name = task_name
-        self.url = url
-        self.header = headers
-        self.payload = payload
-        self.timeout = timeout
-        self.cookies = cookies
-        self.threshold = threshold
-        self.max_response_size = max_response_size
-        self.retry_count = retry_count
-        self.retry_delay = retry_delay
-        self.proxy = proxy
-        self.ssl_verify = ssl_verify
-        self.ssl_warning_days = ssl_warning_days
-        self.expect_json = expect_json
-        self.json_path = json_path
-        self.json_path_value = json_path_value
-
-    def post_instan(self):
-        """
-        执行 POST 请求检查
-        """
-        last_error = None
-        for attempt in range(self.retry_count + 1):
-            try:
-                data = {}
-
-                # 处理 proxy 配置，支持 __HOST__ 关键字
-                proxy = self.proxy
-                if proxy:
-                    from conf import config
-
-                    host_ip = getattr(config, "HOST_IP", "host.docker.internal")
-                    proxy = proxy.replace("__HOST__", host_ip)
-
-                proxies = {"http": proxy, "https": proxy} if proxy else None
-                r = http_session.post(
-                    self.url,
-                    headers=self.header,
-                    cookies=self.cookies,
-                    data=self.payload,
-                    timeout=self.timeout,
-                    stream=True,
-                    proxies=proxies,
-                    verify=self.ssl_verify,
-                )
-                r.raise_for_status()
-                r.encoding = "utf-8"
-
-                # SSL 证书有效期检查（使用独立函数）
-                ssl_expiry_days = get_ssl_cert_expiry_days(
-                    self.url, verify=self.ssl_verify
-                )
-                if ssl_expiry_days is not None:
-                    print(f"SSL 证书剩余 {ssl_expiry_days} 天")
-
-                    from view.checke_control import url_check_ssl_expiry_days
-
-                    url_check_ssl_expiry_days.labels(
-                        task_name=self.task_name, method="post"
-                    ).set(ssl_expiry_days)
-
-                    if ssl_expiry_days < self.ssl_warning_days:
-                        print(
-                            f"警告: {self.task_name} SSL 证书将在 {ssl_expiry_days} 天后过期"
-                        )
-
-                # 更新 SSL 验证状态指标
-                from view.checke_control import url_check_ssl_verified
-
-                url_check_ssl_verified.labels(
-                    task_name=self.task_name,
-                    method="post",
-                    verified=str(self.ssl_verify).lower(),
-                ).inc()
-
-                content = ""
-                if self.max_response_size:
-                    content_len = len(r.content)
-                    if content_len > self.max_response_size:
-                        print(
-                            f"警告: {self.task_name} 响应大小 {content_len} 字节超过限制 {self.max_response_size}，跳过内容解析"
-                        )
-                        content = ""
-                    else:
-                        content = r.text
-                else:
-                    content = r.text
-
-                retime = r.elapsed.total_seconds() * 1000
-                statuscode = r.status_code
-                data = {
-                    "url_name": self.task_name,
-                    "url": self.url,
-                    "stat_code": statuscode,
-                    "timeout": 0,
-                    "resp_time": retime,
-                    "contents": content,
-                    "threshold": self.threshold,
-                    "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "expect_json": self.expect_json,
-                    "json_path": self.json_path,
-                    "json_path_value": self.json_path_value,
-                    "ssl_expiry_days": ssl_expiry_days,
-                    "ssl_warning_days": self.ssl_warning_days,
-                }
-                print(data)
-                ck = cherker(method="post")
-                ck.make_data(data)
-                return
-
-            except HTTPError as e:
-                last_error = e
-                # 修复：使用 is not None 而不是依赖布尔值判断
-                status_code = e.response.status_code if e.response is not None else 0
-                print(f"警告: {self.task_name} HTTP错误: {status_code} {e}")
-                data = {
-                    "url_name": self.task_name,
-                    "url": self.url,
-                    "stat_code": status_code,
-                    "timeout": 0,
-                    "resp_time": 0,
-                    "contents": str(e),
-                    "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "threshold": self.threshold,
-                    "expect_json": self.expect_json,
-                    "json_path": self.json_path,
-                    "json_path_value": self.json_path_value,
-                    "ssl_expiry_days": None,
-                    "ssl_warning_days": self.ssl_warning_days,
-                }
-                print(data)
-                ck = cherker(method="post")
-                ck.make_data(data)
-                return
-
-            except Exception as e:
-                last_error = e
-                if attempt < self.retry_count:
-                    print(
-                        f"第 {attempt + 1} 次请求失败，{self.retry_delay} 秒后重试: {e}"
-                    )
-                    time.sleep(self.retry_delay)
-
-        print(f"警告: {self.task_name} 重试 {self.retry_count} 次均失败: {last_error}")
-        data = {
-            "url_name": self.task_name,
-            "url": self.url,
-            "threshold": self.threshold,
-            "timeout": 1,
-            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "expect_json": self.expect_json,
-            "json_path": self.json_path,
-            "json_path_value": self.json_path_value,
-        }
-        print(data)
-        ck = cherker(method="post")
-        ck.make_data(data)
+    字段顺序、空字段不同但含义相同的定义得到相同指纹；重载时只有指纹变化的任务才重建。
+    """
+    normalized = {k: v for k, v in task.items() if v is not None}
+    raw = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 
 class load_config:
@@ -471,156 +95,108 @@ class load_config:
             self.tasks = yaml.safe_load(f)
         url_check_config_tasks_total.set(len(self.tasks.get("tasks", [])))
 
-        from apscheduler.executors.pool import ThreadPoolExecutor
-
-        executors = {"default": ThreadPoolExecutor(max_workers=5)}
+        # 线程池按任务量与检查耗时自动伸缩（view/pool_autosize.py），
+        # 线程池与事件监听带饱和度/延迟指标（view/sched_metrics.py）
+        executors = {"default": AdaptiveThreadPoolExecutor()}
         job_defaults = {"coalesce": False, "max_instances": 3, "misfire_grace_time": 60}
         self.sched = BackgroundScheduler(executors=executors, job_defaults=job_defaults)
+        attach_listeners(self.sched)
+        # 失败重试注册到独立的 retry jobstore
+        retry.bind_scheduler(self.sched)
+        # 已调度任务的定义指纹（任务名 -> 指纹），重载时据此计算差异
+        self._fingerprints = {}
 
-    def config_set(self, task):
+    def _job_func(self, spec):
         """
-        解析单个任务的配置
+        选择检查执行方式
+
+        - thread 引擎：直接在调度线程中执行 run_probe(spec)
+        - asyncio 引擎：调度线程只投递到事件循环，立即返回
         """
-        url = task.get("url")
-        threshold = task.get("threshold", {})
-        timeout = task.get("timeout", 10)
-        interval = task.get("interval", 10)
-        headers = task.get("headers")
-        cookies = task.get("cookies")
-        payload = task.get("payload")
-        max_response_size = task.get("max_response_size")
-        retry = task.get("retry", {})
-        retry_count = retry.get("count", 0)
-        retry_delay = retry.get("delay", 1)
-        proxy = task.get("proxy")
-
-        # SSL 配置
-        ssl = task.get("ssl", {})
-        ssl_verify = ssl.get("verify", True)
-        ssl_warning_days = ssl.get("warning_days", 30)
-
-        # JSON 验证配置
-        expect_json = task.get("expect_json", False)
-        json_path = task.get("json_path")
-        json_path_value = task.get("json_path_value")
-
-        if "stat_code" not in threshold:
-            threshold["stat_code"] = 200
-
-        return {
-            "Url": url,
-            "Headers": headers,
-            "Cookies": cookies,
-            "Payload": payload,
-            "Interval": interval,
-            "Timeout": timeout,
-            "threshold": threshold,
-            "max_response_size": max_response_size,
-            "retry_count": retry_count,
-            "retry_delay": retry_delay,
-            "proxy": proxy,
-            "ssl_verify": ssl_verify,
-            "ssl_warning_days": ssl_warning_days,
-            "expect_json": expect_json,
-            "json_path": json_path,
-            "json_path_value": json_path_value,
-        }
+        if getattr(config, "check_engine", "thread") == "asyncio":
+            from view.async_engine import get_engine
 
-    def add_task(self, task):
+            engine = get_engine()
+            if engine is not None:
+                return engine.submit, [spec, spec.method]
+            print("未安装 aiohttp，asyncio 引擎不可用，回退到线程引擎")
+        return run_probe, [spec]
+
+    def _schedule(self, task_name, func, args, interval):
         """
-        添加单个检查任务到调度器
+        按 interval 注册检查任务
+
+        首次触发时间按任务名哈希打散到周期内，避免同周期任务在同一秒触发；
+        可选随机抖动见 view/schedule_spread.py。
         """
-        task_name = task.get("name")
-        method = task.get("method", "get")
-
-        if method == "post":
-            print("task {} post method".format(task_name))
-            conf = self.config_set(task)
-
-            task_obj = post_method(
-                task_name=task_name,
-                url=conf["Url"],
-                headers=conf["Headers"],
-                cookies=conf["Cookies"],
-                payload=conf["Payload"],
-                timeout=conf["Timeout"],
-                threshold=conf["threshold"],
-                max_response_size=conf["max_response_size"],
-                retry_count=conf["retry_count"],
-                retry_delay=conf["retry_delay"],
-                proxy=conf["proxy"],
-                ssl_verify=conf["ssl_verify"],
-                ssl_warning_days=conf["ssl_warning_days"],
-                expect_json=conf["expect_json"],
-                json_path=conf["json_path"],
-                json_path_value=conf["json_path_value"],
-            )
-            self.sched.add_job(
-                task_obj.post_instan,
-                "interval",
-                seconds=conf["Interval"],
-                id=task_name,
-                max_instances=10,
-                replace_existing=True,
-            )
+        self.sched.add_job(
+            func,
+            "interval",
+            args=args,
+            seconds=interval,
+            start_date=start_date_for(task_name, interval),
+            jitter=jitter_seconds(interval),
+            id=task_name,
+            max_instances=getattr(config, "job_max_instances", 10),
+            replace_existing=True,
+        )
+
+    def concurrency_profile(self, window=None):
+        """未来窗口内每秒预计启动的检查数（不含汇总报告任务），以及线程池状态"""
+        jobs = [
+            job for job in self.sched.get_jobs(jobstore="default") if job.id != "report_task"
+        ]
+        profile = concurrency_profile(jobs, window=window)
+        executor = self.sched._lookup_executor("default")
+        if hasattr(executor, "snapshot"):
+            profile["pool"] = executor.snapshot()
+        return profile
 
-        elif method == "get":
-            print("task {} get method".format(task_name))
-            conf = self.config_set(task)
-
-            task_obj = get_method(
-                task_name=task_name,
-                url=conf["Url"],
-                headers=conf["Headers"],
-                cookies=conf["Cookies"],
-                payload=conf["Payload"],
-                timeout=conf["Timeout"],
-                threshold=conf["threshold"],
-                max_response_size=conf["max_response_size"],
-                retry_count=conf["retry_count"],
-                retry_delay=conf["retry_delay"],
-                proxy=conf["proxy"],
-                ssl_verify=conf["ssl_verify"],
-                ssl_warning_days=conf["ssl_warning_days"],
-                expect_json=conf["expect_json"],
-                json_path=conf["json_path"],
-                json_path_value=conf["json_path_value"],
-            )
-            self.sched.add_job(
-                task_obj.get_instan,
-                "interval",
-                seconds=conf["Interval"],
-                id=task_name,
-                max_instances=10,
-                replace_existing=True,
-            )
+    def add_task(self, task):
+        """
+        编译单个任务为 ProbeSpec 并添加到调度器
 
-        else:
-            print(
-                "{}........配置文件错误:请检查你的的请求方法，method = post ,method = get".format(
-                    task_name
-                )
-            )
+        Raises:
+            ValueError: 请求方法不支持或配置非法
+        """
+        fingerprint = task_fingerprint(task)
+        spec = ProbeSpec.from_task(task)
+        print("task {} {} method".format(spec.task_name, spec.method))
+        func, args = self._job_func(spec)
+        self._schedule(spec.task_name, func, args, spec.interval)
+        self._fingerprints[spec.task_name] = fingerprint
+        get_rollups().register(spec.task_name, spec.interval)
 
     def loading_task(self):
         """
         加载所有配置并启动调度器
         """
         task_list = self.tasks.get("tasks", [])
-        for task in task_list:
-            self.add_task(task=task)
+        # 分片部署时只调度本分片负责的任务
+        for task in sharding.filter_tasks(task_list):
+            try:
+                self.add_task(task=task)
+            except Exception as e:
+                print("{}........配置文件错误: {}".format(task.get("name"), e))
+                if getattr(config, "strict_config", False):
+                    raise
+        # 重新成为 leader 时丢弃上一轮调度中已不存在的任务汇总
+        get_rollups().retain(self._fingerprints)
         self.sched.start()
         url_check_config_tasks_total.set(len(task_list))
         print("start")
 
     def get_jobs(self):
         job_list = []
-        for instan in self.sched.get_jobs():
+        for instan in self.sched.get_jobs(jobstore="default"):
             job_list.append(instan.id)
         return job_list
 
     def remove_job(self, task_name):
         self.sched.remove_job(task_name)
+        retry.cancel_retry(self.sched, task_name)
+        self._fingerprints.pop(task_name, None)
+        get_rollups().unregister(task_name)
 
     def stop_job(self, task_name):
         self.sched.pause_job(job_id=task_name)
@@ -641,6 +217,9 @@ class load_config:
         job_list = self.get_jobs()
         print(job_list)
         task_name = task_info.get("section")
+        if not sharding.owns(task_name):
+            logger.debug("%s 不属于本分片 %s", task_name, sharding.shard_label())
+            return False
         if task_name not in job_list:
             task = {
                 "name": task_name,
@@ -663,11 +242,13 @@ class load_config:
 
     def safe_reload_config(self):
         """
-        安全重新加载配置文件
-        """
-        import logging
+        安全重新加载配置文件（按差异更新）
 
-        logger = logging.getLogger(__name__)
+        按任务定义指纹比较新旧配置，只处理新增、修改、删除的任务；
+        未变化的任务不重建，保持原有触发节奏，避免重载后全部任务集中触发。
+        修改后编译失败的任务保留旧配置继续运行。
+        """
+        started = time.perf_counter()
         try:
             with open(config.tasks_yaml, "r", encoding="utf-8") as f:
                 new_tasks = yaml.safe_load(f)
@@ -681,35 +262,59 @@ class load_config:
             url_check_config_reload_total.labels(result="uninitialized").inc()
             return False
 
-        old_task_names = set(t.get("name") for t in self.tasks.get("tasks", []))
-        new_task_names = set(t.get("name") for t in new_tasks.get("tasks", []))
+        # 同名任务以最后一个为准（与逐个 add_task 覆盖的结果一致）
+        owned_tasks = {
+            t.get("name"): t for t in sharding.filter_tasks(new_tasks.get("tasks", []))
+        }
+        counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
 
-        for name in old_task_names - new_task_names:
+        # 已删除或不再属于本分片的任务：移除调度并删除指标序列
+        for name in set(self._fingerprints) - set(owned_tasks):
             try:
-                job = self.sched.get_job(name)
-                if job:
+                if self.sched.get_job(name):
                     self.sched.remove_job(name)
                     logger.info(f"已移除任务: {name}")
+                retry.cancel_retry(self.sched, name)
+                remove_task_metrics(name)
+                get_rollups().unregister(name)
+                del self._fingerprints[name]
+                counts["removed"] += 1
             except Exception as e:
                 logger.error(f"移除任务 {name} 失败: {e}")
                 url_check_config_reload_total.labels(result="remove_error").inc()
 
-        for task in new_tasks.get("tasks", []):
+        for name, task in owned_tasks.items():
+            old = self._fingerprints.get(name)
+            if old is not None and old == task_fingerprint(task):
+                counts["unchanged"] += 1
+                continue
             try:
-                name = task.get("name")
-                job = self.sched.get_job(name)
-                if job:
-                    self.sched.remove_job(name)
+                # replace_existing 替换旧任务；编译失败时旧任务不受影响
                 self.add_task(task)
-                logger.info(f"已更新任务: {name}")
             except Exception as e:
                 logger.error(f"任务 {name} 加载失败: {e}")
                 url_check_config_reload_total.labels(result="task_error").inc()
                 continue
+            if old is None:
+                counts["added"] += 1
+                logger.info(f"已新增任务: {name}")
+            else:
+                # 待执行的重试仍引用旧配置，一并取消
+                retry.cancel_retry(self.sched, name)
+                counts["changed"] += 1
+                logger.info(f"已更新任务: {name}")
 
         self.tasks = new_tasks
+        for change, count in counts.items():
+            url_check_config_reload_tasks.labels(change=change).set(count)
         url_check_config_tasks_total.set(len(new_tasks.get("tasks", [])))
         url_check_config_reload_total.labels(result="ok").inc()
+        url_check_config_reload_duration_seconds.observe(time.perf_counter() - started)
+        logger.info(
+            "配置重载完成: 新增 {added}, 修改 {changed}, 删除 {removed}, 未变 {unchanged}".format(
+                **counts
+            )
+        )
         return True
 
     def start_sched(self):
@@ -742,90 +347,59 @@ class ReportTask:
         return labels
 
     @staticmethod
-    def _extract_latest_time(data, task_name):
-        """从持久化数据中提取任务最近一次检查时间"""
-        latest = None
-        for key, records in data.items():
-            if key in {"alarm", "alarm_notified", "last_alert_time", "last_resp_time"}:
-                continue
-            if not isinstance(records, list):
-                continue
-
-            for item in records:
-                if not isinstance(item, dict):
-                    continue
-                task_block = item.get(task_name)
-                if not isinstance(task_block, dict):
-                    continue
-                time_str = task_block.get("time")
-                if not time_str:
-                    continue
-                try:
-                    dt = datetime.datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    continue
-                if latest is None or dt > latest:
-                    latest = dt
-        return latest
+    def _parse_time(time_str):
+        if not time_str:
+            return None
+        try:
+            return datetime.datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
+        except Exception:
+            return None
 
     def generate_report(self):
-        """生成汇总报告"""
-        import pickle
-        import os
+        """
+        生成汇总报告
 
+        数据来自进程内任务汇总（view/task_rollup.py），只遍历一次调度中的任务，
+        不读取 tasks.yaml 与状态文件。
+        """
+        started = time.perf_counter()
         report_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.datetime.now()
 
-        data_dir = "data"
         normal_tasks = []
         current_alert_tasks = []
         notified_alert_tasks = []
         no_data_tasks = []
         stale_tasks = []
-        failed_tasks = []
-
-        configured_tasks = []
-        task_intervals = {}
-        try:
-            with open(config.tasks_yaml, "r", encoding="utf-8") as f:
-                task_conf = yaml.safe_load(f) or {}
-            configured_tasks = task_conf.get("tasks", [])
-            for task in configured_tasks:
-                name = task.get("name")
-                if name:
-                    task_intervals[name] = int(task.get("interval", 10))
-        except Exception as e:
-            return (
-                "📊 URL监控汇总报告",
-                f"汇总时间: {report_time}\n读取任务配置失败: {e}",
-            )
-
-        total_tasks = len([t for t in configured_tasks if t.get("name")])
-
-        for task in configured_tasks:
-            task_name = task.get("name")
-            if not task_name:
-                continue
-
-            filepath = os.path.join(data_dir, f"{task_name}.pkl")
-            if not os.path.exists(filepath):
+        degraded_tasks = []
+        total_checks = 0
+        total_failures = 0
+        day_checks = 0
+        day_errors = 0
+        now_ts = time.time()
+
+        # 调度器只登记本分片负责的任务
+        rollups = get_rollups().snapshot()
+        total_tasks = len(rollups)
+
+        for task_name, rollup in rollups:
+            total_checks += rollup.checks
+            total_failures += rollup.failures
+            day = rollup.window("24h").summary(now_ts)
+            day_checks += day["checks"]
+            day_errors += day["errors"]
+            latest_time = self._parse_time(rollup.last_check_time)
+            if latest_time is None:
                 no_data_tasks.append(f"- {task_name}")
                 continue
 
-            try:
-                with open(filepath, "rb") as f:
-                    data = pickle.load(f)
-            except Exception as e:
-                failed_tasks.append(f"- {task_name}: {e}")
-                continue
-
-            current_alerts = self._parse_alerts(data.get("alarm", {}))
-            notified_alerts = self._parse_alerts(
-                data.get("alarm_notified", data.get("alarm", {}))
-            )
+            current_alerts = self._parse_alerts(rollup.alarm)
+            notified_alerts = self._parse_alerts(rollup.alarm_notified)
 
             if current_alerts:
                 current_alert_tasks.append(
                     f"- {task_name}: {', '.join(current_alerts)}"
+                    f"（失败 {rollup.failures}/{rollup.checks}）"
                 )
             else:
                 normal_tasks.append(f"- {task_name}")
@@ -835,50 +409,47 @@ class ReportTask:
                     f"- {task_name}: {', '.join(notified_alerts)}"
                 )
 
-            latest_time = self._extract_latest_time(data, task_name)
-            if latest_time is None:
-                stale_tasks.append(f"- {task_name}: 无有效检查时间")
-            else:
-                interval = task_intervals.get(task_name, 10)
-                stale_seconds = max(interval * 3, 180)
-                age = (datetime.datetime.now() - latest_time).total_seconds()
-                if age > stale_seconds:
-                    stale_tasks.append(
-                        f"- {task_name}: 最后检查 {latest_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                    )
-
-        msg = f"汇总时间: {report_time}\n"
-        msg += f"监控周期: {self.interval_hours}小时\n"
-        msg += f"配置任务总数: {total_tasks}个\n"
-        msg += f"有状态文件: {total_tasks - len(no_data_tasks)}个\n"
-        msg += f"无状态文件: {len(no_data_tasks)}个\n\n"
-
-        msg += f"✅ 当前正常: {len(normal_tasks)}个\n"
-        for task_line in normal_tasks:
-            msg += task_line + "\n"
-
-        msg += f"\n⚠️ 当前异常(按 alarm): {len(current_alert_tasks)}个\n"
-        for task_line in current_alert_tasks:
-            msg += task_line + "\n"
-
-        msg += f"\n📣 已通知异常(按 alarm_notified): {len(notified_alert_tasks)}个\n"
-        for task_line in notified_alert_tasks:
-            msg += task_line + "\n"
-
-        msg += f"\n❓ 无状态文件: {len(no_data_tasks)}个\n"
-        for task_line in no_data_tasks:
-            msg += task_line + "\n"
-
-        msg += f"\n🕒 数据过期/无时间: {len(stale_tasks)}个\n"
-        for task_line in stale_tasks:
-            msg += task_line + "\n"
-
-        if failed_tasks:
-            msg += f"\n⛔ 读取失败: {len(failed_tasks)}个\n"
-            for task_line in failed_tasks:
-                msg += task_line + "\n"
-
-        return "📊 URL监控汇总报告", msg
+            hour = rollup.window("1h").summary(now_ts)
+            if hour["errors"]:
+                p95 = hour["latency_ms"]["p95"]
+                degraded_tasks.append(
+                    f"- {task_name}: {hour['availability'] * 100:.2f}%"
+                    f"（错误 {hour['errors']}/{hour['checks']}"
+                    + (f"，P95 {p95}ms）" if p95 is not None else "）")
+                )
+
+            stale_seconds = max(rollup.interval * 3, 180)
+            if (now - latest_time).total_seconds() > stale_seconds:
+                stale_tasks.append(
+                    f"- {task_name}: 最后检查 {latest_time.strftime('%Y-%m-%d %H:%M:%S')}"
+                )
+
+        lines = [
+            f"汇总时间: {report_time}",
+            f"监控周期: {self.interval_hours}小时",
+            f"调度任务总数: {total_tasks}个",
+            f"有检查数据: {total_tasks - len(no_data_tasks)}个",
+            f"尚无检查数据: {len(no_data_tasks)}个",
+            f"累计检查: {total_checks}次, 失败: {total_failures}次",
+            "近24小时可用率: {}".format(
+                f"{(1 - day_errors / day_checks) * 100:.2f}%" if day_checks else "-"
+            ),
+        ]
+        for title, task_lines in (
+            ("✅ 当前正常", normal_tasks),
+            ("⚠️ 当前异常(按 alarm)", current_alert_tasks),
+            ("📣 已通知异常(按 alarm_notified)", notified_alert_tasks),
+            ("📉 近1小时可用率低于100%", degraded_tasks),
+            ("❓ 尚无检查数据", no_data_tasks),
+            ("🕒 数据过期", stale_tasks),
+        ):
+            lines.append("")
+            lines.append(f"{title}: {len(task_lines)}个")
+            lines.extend(task_lines)
+        msg = "\n".join(lines) + "\n"
+
+        url_check_report_generate_seconds.observe(time.perf_counter() - started)
+        return f"📊 URL监控汇总报告{sharding.shard_label()}", msg
 
     def send_report(self):
         """发送汇总报告"""
@@ -0,0 +1,226 @@
+"""
+告警通知异步分发模块
+
+功能：
+    - 检查线程只把通知放入有界队列，立即返回，不再等待钉钉/SMTP
+    - 后台分发线程逐条发送，失败后按指数退避（带抖动）延迟重试
+    - 队列满或重试耗尽时丢弃并计数
+    - 暴露队列深度、发送耗时、发送结果与丢弃指标
+
+配置：
+    URL_CHECK_NOTIFY_ASYNC: 是否异步发送（默认 true，false 时在检查线程内同步发送）
+    URL_CHECK_NOTIFY_QUEUE_SIZE: 队列容量
+    URL_CHECK_NOTIFY_MAX_RETRIES: 最大重试次数
+    URL_CHECK_NOTIFY_RETRY_BASE_SECONDS: 首次重试等待时间（秒），之后每次翻倍
+"""
+
+import heapq
+import itertools
+import logging
+import queue
+import random
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from conf import config
+from view.dingding import ding_sender
+from view.mail_server import mailconf
+
+logger = logging.getLogger(__name__)
+
+# 单次重试等待上限（秒）
+RETRY_MAX_SECONDS = 300
+
+url_check_notify_queue_depth = Gauge(
+    "url_check_notify_queue_depth",
+    "Notifications waiting to be sent (queued + pending retry)",
+)
+
+url_check_notify_send_seconds = Histogram(
+    "url_check_notify_send_seconds",
+    "Notification send latency in seconds",
+    ["channel"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+
+url_check_notify_sent_total = Counter(
+    "url_check_notify_sent_total",
+    "Total number of notification send attempts by result",
+    ["channel", "result"],
+)
+
+url_check_notify_dropped_total = Counter(
+    "url_check_notify_dropped_total",
+    "Total number of notifications dropped",
+    ["channel", "reason"],
+)
+
+
+def _send_dingding(subject, msg):
+    ding_sender(title=subject, msg=msg, raise_errors=True)
+
+
+def _send_mail(subject, msg):
+    if mailconf(tos=config.send_to, subject=subject, content=msg) is False:
+        raise RuntimeError("邮件发送失败")
+
+
+SENDERS = {
+    "dingding": _send_dingding,
+    "mail": _send_mail,
+}
+
+
+class NotificationDispatcher:
+    """
+    通知分发器
+
+    属性：
+        max_queue: 队列容量
+        max_retries: 最大重试次数
+        retry_base: 首次重试等待时间（秒）
+        senders: 渠道名 -> 发送函数(subject, msg)，发送失败时抛出异常
+    """
+
+    def __init__(self, max_queue=1000, max_retries=3, retry_base=2.0, senders=None):
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.senders = senders or SENDERS
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._retry_heap = []
+        self._seq = itertools.count()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._idle_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def depth(self):
+        return self._queue.qsize() + len(self._retry_heap)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="url-check-notify", daemon=True
+                )
+                self._thread.start()
+
+    def enqueue(self, channel, subject, msg):
+        """
+        投递一条通知（检查线程调用，不阻塞）
+
+        Returns:
+            bool: 是否成功入队
+        """
+        self.start()
+        try:
+            with self._idle_lock:
+                self._idle.clear()
+                self._queue.put_nowait((channel, subject, msg, 0))
+            return True
+        except queue.Full:
+            url_check_notify_dropped_total.labels(
+                channel=channel, reason="queue_full"
+            ).inc()
+            logger.warning(f"通知队列已满，丢弃通知: {channel} {subject}")
+            return False
+
+    def flush(self, timeout=None):
+        """等待队列中所有通知发送完成（含重试），返回是否在超时前完成"""
+        return self._idle.wait(timeout)
+
+    def _backoff(self, attempt):
+        delay = min(self.retry_base * (2**attempt), RETRY_MAX_SECONDS)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _deliver(self, item):
+        channel, subject, msg, attempt = item
+        sender = self.senders.get(channel)
+        if sender is None:
+            url_check_notify_dropped_total.labels(
+                channel=channel, reason="unknown_channel"
+            ).inc()
+            return
+
+        start = time.perf_counter()
+        try:
+            sender(subject, msg)
+            url_check_notify_sent_total.labels(channel=channel, result="ok").inc()
+            return
+        except Exception as e:
+            url_check_notify_sent_total.labels(channel=channel, result="error").inc()
+            logger.warning(f"通知发送失败 {channel} (第 {attempt + 1} 次): {e}")
+        finally:
+            url_check_notify_send_seconds.labels(channel=channel).observe(
+                time.perf_counter() - start
+            )
+
+        if attempt < self.max_retries:
+            ready_at = time.monotonic() + self._backoff(attempt)
+            heapq.heappush(
+                self._retry_heap,
+                (ready_at, next(self._seq), (channel, subject, msg, attempt + 1)),
+            )
+        else:
+            url_check_notify_dropped_total.labels(
+                channel=channel, reason="retries_exhausted"
+            ).inc()
+            logger.error(f"通知重试 {self.max_retries} 次仍失败，已丢弃: {channel} {subject}")
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._retry_heap:
+                timeout = max(0.0, self._retry_heap[0][0] - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                self._deliver(item)
+
+            while self._retry_heap and self._retry_heap[0][0] <= time.monotonic():
+                _, _, retry_item = heapq.heappop(self._retry_heap)
+                self._deliver(retry_item)
+
+            with self._idle_lock:
+                if self._queue.empty() and not self._retry_heap:
+                    self._idle.set()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """获取进程内唯一的通知分发器"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(
+                max_queue=getattr(config, "notify_queue_size", 1000),
+                max_retries=getattr(config, "notify_max_retries", 3),
+                retry_base=getattr(config, "notify_retry_base_seconds", 2),
+            )
+            url_check_notify_queue_depth.set_function(_dispatcher.depth)
+    return _dispatcher
+
+
+def notify(channel, subject, msg):
+    """
+    发送一条告警通知
+
+    异步模式（默认）下只入队；URL_CHECK_NOTIFY_ASYNC=false 时同步发送（兼容旧行为）。
+    """
+    if getattr(config, "notify_async", True):
+        return get_dispatcher().enqueue(channel, subject, msg)
+
+    try:
+        SENDERS[channel](subject, msg)
+        return True
+    except Exception as e:
+        logger.warning(f"通知发送失败 {channel}: {e}")
+        return False
@@ -0,0 +1,104 @@
+"""
+检查分阶段耗时
+
+阶段（毫秒）：
+    dns:      域名解析（命中 DNS 缓存时接近 0）
+    connect:  TCP 建连（未启用 DNS 缓存时包含解析时间）
+    tls:      TLS 握手（asyncio 引擎无法单独区分，计入 connect，该引擎不能按 tls 配置 delay_phase）
+    ttfb:     请求发出到收到响应头
+    download: 读取响应正文
+
+复用 keep-alive 连接的检查 dns/connect/tls 为 0。
+各阶段导出为 url_check_http_phase_time_ms，并随检查结果写入状态记录（phases 字段）；
+任务阈值 delay_phase 可以让响应时间告警只比较某一个阶段。
+"""
+
+import time
+
+from prometheus_client import Histogram
+from urllib3.connection import HTTPSConnection
+
+PHASES = ("dns", "connect", "tls", "ttfb", "download")
+
+url_check_http_phase_time_ms = Histogram(
+    "url_check_http_phase_time_ms",
+    "HTTP check time per phase in milliseconds (dns/connect/tls/ttfb/download)",
+    ["task_name", "method", "phase"],
+    buckets=(1, 5, 10, 25, 50, 100, 200, 300, 500, 1000, 2000, 5000),
+)
+
+
+def observe(metrics, phases):
+    """
+    记录一次检查的各阶段耗时
+
+    Args:
+        metrics: 任务指标子序列缓存（checke_control.task_metrics）
+        phases: 各阶段耗时（毫秒）
+    """
+    for phase in PHASES:
+        value = phases.get(phase)
+        if value is not None:
+            metrics(url_check_http_phase_time_ms, phase=phase).observe(value)
+
+
+def _ms_since(start):
+    return (time.perf_counter() - start) * 1000
+
+
+class TimedConnectionMixin:
+    """
+    urllib3 连接：记录 dns/connect/tls/ttfb
+
+    DNS 耗时由 DNS 缓存连接类写入 self._dns_ms（见 view/dns_cache.py）。
+    """
+
+    _phases = None
+    _ttfb_ms = None
+
+    def _new_conn(self):
+        self._dns_ms = 0.0
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        total = _ms_since(start)
+        self._phases = {"dns": self._dns_ms, "connect": max(total - self._dns_ms, 0.0)}
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        total = _ms_since(start)
+        if self._phases is not None:
+            tls = total - self._phases["dns"] - self._phases["connect"]
+            self._phases["tls"] = max(tls, 0.0) if isinstance(self, HTTPSConnection) else 0.0
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().getresponse(*args, **kwargs)
+        self._ttfb_ms = _ms_since(start)
+        return response
+
+    def pop_phases(self):
+        """取出本次请求的阶段耗时；复用连接时 dns/connect/tls 为 0"""
+        phases = self._phases or {"dns": 0.0, "connect": 0.0, "tls": 0.0}
+        phases.setdefault("tls", 0.0)
+        phases["ttfb"] = self._ttfb_ms
+        self._phases = None
+        self._ttfb_ms = None
+        return phases
+
+
+def connection_phases(response):
+    """从 requests 响应（stream=True，正文未读取）对应的连接中取出阶段耗时"""
+    try:
+        conn = response.raw.connection
+    except Exception:
+        return None
+    if conn is None or not hasattr(conn, "pop_phases"):
+        return None
+    return conn.pop_phases()
+
+
+def rounded(phases):
+    """保留两位小数，写入状态记录"""
+    return {k: round(v, 2) for k, v in phases.items() if v is not None}
@@ -0,0 +1,173 @@
+"""
+调度线程池自动伸缩
+
+功能：
+    - 按 Little 定律估算所需线程数：并发 = 到达率（Σ 1/interval）× 检查耗时 P95
+    - 排队等待 P95 超过阈值时按比例扩容（估算偏小或目标变慢时兜底）
+    - 空闲时缩容，但不低于上个窗口实际观察到的最大并发
+    - 线程数限制在 URL_CHECK_POOL_MIN ~ URL_CHECK_POOL_MAX 之间
+
+伸缩不需要额外线程：调度器每次投递任务时检查是否到了调整周期。
+扩容和缩容都换一个新大小的线程池，后续投递进入新线程池；
+旧线程池执行完已提交的任务后线程自动退出。
+
+配置：
+    URL_CHECK_POOL_AUTOSIZE: 是否自动伸缩（默认 true，false 时固定为 URL_CHECK_POOL_MIN）
+    URL_CHECK_POOL_MIN / URL_CHECK_POOL_MAX: 线程数上下限
+    URL_CHECK_POOL_RESIZE_SECONDS: 调整周期（秒）
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from prometheus_client import Counter
+
+from conf import config
+from view.sched_metrics import (
+    InstrumentedThreadPoolExecutor,
+    url_check_scheduler_executor_max_workers,
+)
+
+logger = logging.getLogger(__name__)
+
+# 估算值之上的余量，避免线程池长期跑满
+HEADROOM = 1.25
+# 样本不足时假定的单次检查耗时（秒）
+DEFAULT_DURATION = 1.0
+MIN_SAMPLES = 20
+# 排队等待 P95 超过该值（秒）时扩容
+GROW_WAIT_SECONDS = 1.0
+GROW_FACTOR = 1.5
+
+url_check_scheduler_pool_resize_total = Counter(
+    "url_check_scheduler_pool_resize_total",
+    "Total number of scheduler pool resizes",
+    ["direction"],
+)
+
+
+def _p95(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+
+def pool_bounds():
+    """线程数上下限 (min, max)"""
+    low = max(1, int(getattr(config, "pool_min", 5) or 1))
+    high = max(low, int(getattr(config, "pool_max", 50) or low))
+    return low, high
+
+
+class AdaptiveThreadPoolExecutor(InstrumentedThreadPoolExecutor):
+    """
+    按观察到的并发自动伸缩的 APScheduler 线程池执行器
+
+    属性：
+        min_workers / max_limit: 线程数上下限
+        resize_seconds: 调整周期（秒）
+    """
+
+    def __init__(self, min_workers=None, max_limit=None, resize_seconds=None, pool_kwargs=None):
+        low, high = pool_bounds()
+        self.min_workers = low if min_workers is None else min_workers
+        self.max_limit = high if max_limit is None else max_limit
+        if resize_seconds is None:
+            resize_seconds = getattr(config, "pool_resize_seconds", 30)
+        self.resize_seconds = resize_seconds
+        self.autosize = getattr(config, "pool_autosize", True)
+        super().__init__(max_workers=self.min_workers, pool_kwargs=pool_kwargs)
+        self._durations = deque(maxlen=500)
+        self._waits = deque(maxlen=500)
+        self._peak_busy = 0
+        self._next_resize = 0.0
+        self._resize_lock = threading.Lock()
+
+    def _adjust(self, busy=0, queued=0):
+        super()._adjust(busy=busy, queued=queued)
+        if self._busy > self._peak_busy:
+            self._peak_busy = self._busy
+
+    def _observe(self, wait, duration):
+        self._durations.append(duration)
+        if wait is not None:
+            self._waits.append(wait)
+
+    def arrival_rate(self):
+        """调度器中 interval 任务每秒的平均触发次数"""
+        scheduler = getattr(self, "_scheduler", None)
+        if scheduler is None:
+            return 0.0
+        rate = 0.0
+        for job in scheduler.get_jobs(jobstore="default"):
+            interval = getattr(job.trigger, "interval", None)
+            if interval is not None and interval.total_seconds() > 0:
+                rate += 1.0 / interval.total_seconds()
+        return rate
+
+    def recommended_size(self):
+        """Little 定律：线程数 = 到达率 × 检查耗时 P95 × 余量"""
+        durations = list(self._durations)
+        duration = _p95(durations) if len(durations) >= MIN_SAMPLES else DEFAULT_DURATION
+        return math.ceil(self.arrival_rate() * duration * HEADROOM)
+
+    def target_size(self):
+        """结合 Little 估算、排队等待与上个窗口的峰值并发，计算目标线程数"""
+        target = self.recommended_size()
+        wait_p95 = _p95(list(self._waits))
+        if wait_p95 is not None and wait_p95 > GROW_WAIT_SECONDS:
+            target = max(target, math.ceil(self.max_workers * GROW_FACTOR))
+        elif target < self.max_workers:
+            # 缩容不低于实际观察到的并发
+            target = max(target, self._peak_busy)
+        return min(max(target, self.min_workers), self.max_limit)
+
+    def resize(self, size):
+        """调整线程数"""
+        with self._resize_lock:
+            current = self.max_workers
+            if size == current:
+                return
+            old, self._pool = self._pool, self._new_pool(size)
+            old.shutdown(wait=False)
+            self.max_workers = size
+        url_check_scheduler_executor_max_workers.set(size)
+        url_check_scheduler_pool_resize_total.labels(
+            direction="up" if size > current else "down"
+        ).inc()
+        logger.info(f"调度线程池 {current} -> {size}")
+
+    def maybe_resize(self):
+        """到了调整周期时按目标线程数伸缩"""
+        now = time.monotonic()
+        if not self.autosize or now < self._next_resize:
+            return
+        self._next_resize = now + self.resize_seconds
+        target = self.target_size()
+        self._waits.clear()
+        self._peak_busy = self._busy
+        self.resize(target)
+
+    def _do_submit_job(self, job, run_times):
+        try:
+            self.maybe_resize()
+        except Exception as e:
+            logger.error(f"调度线程池调整失败: {e}")
+        super()._do_submit_job(job, run_times)
+
+    def snapshot(self):
+        """当前线程池状态，供 /scheduler/concurrency 展示"""
+        return {
+            "autosize": bool(self.autosize),
+            "max_workers": self.max_workers,
+            "min_workers": self.min_workers,
+            "max_limit": self.max_limit,
+            "busy": self._busy,
+            "queued": self._queued,
+            "arrival_rate": round(self.arrival_rate(), 3),
+            "recommended": self.recommended_size(),
+        }
@@ -0,0 +1,319 @@
+"""
+检查任务规格（ProbeSpec）与统一执行路径
+
+功能：
+    - 任务在加载/重载时编译一次为不可变的 ProbeSpec（__slots__，无 __dict__）
+    - 请求方法、请求头、已解析的代理（__HOST__ 已替换）、阈值、JSON Path 校验器都在编译期准备好
+    - 每次检查不再重新解析代理、导入配置，只构建一次结果字典
+    - GET/POST/HEAD/PUT 共用同一个执行函数 run_probe，新增方法只需加入 SUPPORTED_METHODS
+    - 失败重试不阻塞工作线程：按退避时间注册一次性延迟执行（view/retry.py）
+
+线程引擎由调度线程直接调用 run_probe(spec)；asyncio 引擎见 view/async_engine.py。
+"""
+
+import datetime
+import logging
+import sys
+import time
+
+from requests.exceptions import HTTPError
+
+from conf import config
+from view.checke_control import (
+    cherker,
+    compile_json_path,
+    task_metrics,
+    url_check_ssl_expiry_days,
+    url_check_ssl_verified,
+)
+from view import retry
+from view.http_sessions import get_session
+from view.phase_timing import PHASES, connection_phases
+from view.response_body import read_response_body
+from view.ssl_expiry import get_ssl_cert_expiry_days, peer_cert_from_response
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_METHODS = ("get", "post", "head", "put")
+
+# 没有响应正文的方法，不能配置内容类校验
+BODYLESS_METHODS = ("head",)
+
+
+def _now_str():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def resolve_proxy(proxy):
+    """处理 proxy 配置，支持 __HOST__ 关键字"""
+    if not proxy:
+        return None
+    host_ip = getattr(config, "HOST_IP", "host.docker.internal")
+    return proxy.replace("__HOST__", host_ip)
+
+
+class ProbeSpec:
+    """
+    编译后的检查任务（创建后不可修改）
+
+    属性：
+        task_name / method / url: 任务名、请求方法（小写）、URL
+        headers / cookies / payload: 请求参数
+        timeout / interval / deadline: 超时、调度间隔、单次检查整体截止时间（秒）
+        retry_count / retry_delay: 重试次数与间隔
+        proxy: 已解析的代理地址（线程引擎按代理选择会话）
+        threshold: 阈值（stat_code 默认 200）
+        max_response_size: 正文读取上限
+        ssl_verify / ssl_warning_days: 证书校验与到期预警天数
+        expect_json / json_path / json_path_value / json_path_matcher: JSON 校验配置
+    """
+
+    __slots__ = (
+        "task_name",
+        "method",
+        "url",
+        "headers",
+        "cookies",
+        "payload",
+        "timeout",
+        "interval",
+        "deadline",
+        "retry_count",
+        "retry_delay",
+        "proxy",
+        "threshold",
+        "max_response_size",
+        "ssl_verify",
+        "ssl_warning_days",
+        "expect_json",
+        "json_path",
+        "json_path_value",
+        "json_path_matcher",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ProbeSpec 不可修改: {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"ProbeSpec 不可修改: {name}")
+
+    def __repr__(self):
+        return f"ProbeSpec({self.task_name!r}, {self.method!r}, {self.url!r})"
+
+    @classmethod
+    def from_task(cls, task):
+        """
+        从 tasks.yaml 中的单个任务配置编译 ProbeSpec
+
+        Raises:
+            ValueError: 请求方法不支持、JSON Path 表达式非法或配置冲突
+        """
+        task_name = task.get("name")
+        method = str(task.get("method", "get")).lower()
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(
+                "请求方法不支持: method = {}（可选 {}）".format(
+                    method, ", ".join(SUPPORTED_METHODS)
+                )
+            )
+        # 使用常量字符串，所有任务共享同一个对象
+        method = SUPPORTED_METHODS[SUPPORTED_METHODS.index(method)]
+
+        threshold = task.get("threshold") or {}
+        if "stat_code" not in threshold:
+            threshold["stat_code"] = 200
+        expect_json = task.get("expect_json", False)
+        if method in BODYLESS_METHODS and (threshold.get("math_str") or expect_json):
+            raise ValueError(f"{method.upper()} 请求没有响应正文，不能配置 math_str/expect_json")
+        delay_phase = threshold.get("delay_phase")
+        if delay_phase is not None and delay_phase not in PHASES:
+            raise ValueError(
+                "耗时阶段不支持: delay_phase = {}（可选 {}）".format(
+                    delay_phase, ", ".join(PHASES)
+                )
+            )
+        if delay_phase == "tls" and getattr(config, "check_engine", "thread") == "asyncio":
+            # aiohttp 不单独报告 TLS 握手，该阶段永远缺失，告警会静默回退为总响应时间
+            raise ValueError("asyncio 引擎的 TLS 握手计入 connect，不能配置 delay_phase = tls（改用 connect）")
+
+        json_path = task.get("json_path")
+        retry = task.get("retry") or {}
+        ssl_conf = task.get("ssl") or {}
+        proxy = resolve_proxy(task.get("proxy"))
+        if proxy:
+            # 同一代理的任务共享同一个字符串对象
+            proxy = sys.intern(proxy)
+
+        return cls(
+            task_name=task_name,
+            method=method,
+            url=task.get("url"),
+            headers=task.get("headers"),
+            cookies=task.get("cookies"),
+            payload=task.get("payload"),
+            timeout=task.get("timeout", 10),
+            interval=task.get("interval", 10),
+            deadline=task.get("deadline"),
+            retry_count=retry.get("count", 0),
+            retry_delay=retry.get("delay", 1),
+            proxy=proxy,
+            threshold=threshold,
+            max_response_size=task.get("max_response_size"),
+            ssl_verify=ssl_conf.get("verify", True),
+            ssl_warning_days=ssl_conf.get("warning_days", 30),
+            expect_json=expect_json,
+            json_path=json_path,
+            json_path_value=task.get("json_path_value"),
+            # 表达式非法时在加载阶段直接报错，而不是每次检查时失败
+            json_path_matcher=compile_json_path(json_path),
+        )
+
+    def result_data(self, stat_code, resp_time, contents, now_time, ssl_expiry_days, phases=None):
+        """拿到 HTTP 响应时交给 cherker.make_data 的数据"""
+        return {
+            "url_name": self.task_name,
+            "url": self.url,
+            "stat_code": stat_code,
+            "timeout": 0,
+            "resp_time": resp_time,
+            "contents": contents,
+            "time": now_time,
+            "threshold": self.threshold,
+            "expect_json": self.expect_json,
+            "json_path": self.json_path,
+            "json_path_value": self.json_path_value,
+            "json_path_matcher": self.json_path_matcher,
+            "ssl_expiry_days": ssl_expiry_days,
+            "ssl_warning_days": self.ssl_warning_days,
+            "phases": phases,
+        }
+
+    def failure_data(self):
+        """请求失败（超时/连接错误，重试耗尽）时交给 cherker.make_data 的数据"""
+        return {
+            "url_name": self.task_name,
+            "url": self.url,
+            "threshold": self.threshold,
+            "timeout": 1,
+            "time": _now_str(),
+            "expect_json": self.expect_json,
+            "json_path": self.json_path,
+            "json_path_value": self.json_path_value,
+        }
+
+
+def _request(spec, timeout):
+    """
+    执行一次 HTTP 请求
+
+    拿到响应（包括 4xx/5xx）时返回结果字典；超时、连接错误等网络异常向上抛出。
+    """
+    phases = None
+    try:
+        now_time = _now_str()
+        # 代理按请求传入：会话级 proxies 会被环境变量 HTTP(S)_PROXY 覆盖，请求级的不会
+        proxies = {"http": spec.proxy, "https": spec.proxy} if spec.proxy else None
+        r = get_session(spec.proxy).request(
+            spec.method.upper(),
+            spec.url,
+            headers=spec.headers,
+            cookies=spec.cookies,
+            data=spec.payload,
+            proxies=proxies,
+            timeout=timeout,
+            stream=True,
+            verify=spec.ssl_verify,
+        )
+        phases = connection_phases(r)
+        r.raise_for_status()
+        r.encoding = "utf-8"
+
+        # SSL 证书有效期检查（优先读取本次连接上的证书，正文读取前连接仍被占用）
+        ssl_expiry_days = get_ssl_cert_expiry_days(
+            spec.url, verify=spec.ssl_verify, peer_cert=peer_cert_from_response(r)
+        )
+        if ssl_expiry_days is not None:
+            logger.debug("%s SSL 证书剩余 %s 天", spec.task_name, ssl_expiry_days)
+            task_metrics(spec.task_name, spec.method)(url_check_ssl_expiry_days).set(
+                ssl_expiry_days
+            )
+
+            # 证书即将过期告警
+            if ssl_expiry_days < spec.ssl_warning_days:
+                logger.debug("%s SSL 证书将在 %s 天后过期", spec.task_name, ssl_expiry_days)
+
+        # 更新 SSL 验证状态指标
+        task_metrics(spec.task_name, spec.method)(
+            url_check_ssl_verified, verified=str(spec.ssl_verify).lower()
+        ).inc()
+
+        # 分块读取正文：超限即停，找到关键字即停
+        download_start = time.perf_counter()
+        content = read_response_body(
+            r,
+            spec.task_name,
+            spec.method,
+            max_response_size=spec.max_response_size,
+            threshold=spec.threshold,
+            expect_json=spec.expect_json,
+        )
+        if phases is not None:
+            phases["download"] = (time.perf_counter() - download_start) * 1000
+
+        return spec.result_data(
+            r.status_code,
+            r.elapsed.total_seconds() * 1000,
+            content,
+            now_time,
+            ssl_expiry_days,
+            phases,
+        )
+
+    except HTTPError as e:
+        # 修复：使用 is not None 而不是依赖布尔值判断
+        # 因为 Response 对象的 __bool__ 方法在 HTTP 错误时返回 False
+        status_code = e.response.status_code if e.response is not None else 0
+        if e.response is not None:
+            e.response.close()
+        logger.debug("%s HTTP错误: %s %s", spec.task_name, status_code, e)
+        return spec.result_data(status_code, 0, str(e), _now_str(), None, phases)
+
+
+def run_probe(spec, attempt=0, started=None):
+    """
+    执行一次检查尝试，结果交给 cherker.make_data
+
+    所有请求方法共用此路径。网络异常时不在当前线程等待，而是通过 view/retry.py
+    注册一次性的延迟重试（attempt + 1），当前线程立即返回。
+
+    Args:
+        spec: ProbeSpec
+        attempt: 尝试序号（0 为首次，重试时由调度器传入）
+        started: 首次尝试开始时间（time.monotonic），用于整体截止时间
+    """
+    if started is None:
+        started = time.monotonic()
+    # 单次请求超时不超过剩余的整体截止时间
+    remaining = retry.task_deadline(spec) - (time.monotonic() - started)
+    timeout = min(float(spec.timeout or 10), max(remaining, 0.1))
+    try:
+        data = _request(spec, timeout)
+    except Exception as e:
+        delay = retry.next_delay(spec, attempt, time.monotonic() - started)
+        if delay is not None:
+            logger.info(
+                "%s 第 %d 次请求失败，%.1f 秒后重试: %s", spec.task_name, attempt + 1, delay, e
+            )
+            retry.schedule_retry(
+                spec.task_name, run_probe, [spec, attempt + 1, started], delay, started
+            )
+            return
+        logger.warning("%s 第 %d 次请求失败，不再重试: %s", spec.task_name, attempt + 1, e)
+        data = spec.failure_data()
+
+    ck = cherker(method=spec.method)
+    ck.make_data(data)
@@ -0,0 +1,197 @@
+"""
+响应正文读取模块
+
+功能：
+    - 分块增量读取响应正文，超过大小限制立即停止，不再整体下载到内存
+    - 先检查 Content-Length，已知超限时完全不读取正文
+    - 配置了关键字（math_str）且不需要完整正文时，找到关键字即停止读取
+    - 找到关键字后剩余正文不超过 DRAIN_MAX_BYTES 时读完并丢弃，连接可以放回连接池复用
+    - 上报每次检查实际读取的字节数
+
+大小限制：
+    任务 max_response_size 优先；未配置时使用 URL_CHECK_MAX_RESPONSE_SIZE（默认 0，不限制）
+"""
+
+import logging
+
+from prometheus_client import Counter, Histogram
+
+from conf import config
+from view.checke_control import task_metrics
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 16 * 1024
+# 提前停止后最多继续读取并丢弃的字节数；剩余正文更大时直接关闭连接
+DRAIN_MAX_BYTES = 64 * 1024
+
+url_check_http_response_bytes = Histogram(
+    "url_check_http_response_bytes",
+    "Response body bytes read per check",
+    ["task_name", "method"],
+    buckets=(1024, 10240, 102400, 1048576, 10485760),
+)
+
+url_check_http_response_truncated_total = Counter(
+    "url_check_http_response_truncated_total",
+    "Total number of response bodies not fully read, by reason",
+    ["task_name", "method", "reason"],
+)
+
+
+def effective_max_size(max_response_size):
+    """任务未配置 max_response_size 时使用全局默认上限（0 表示不限制）"""
+    if max_response_size:
+        return max_response_size
+    return getattr(config, "max_response_size", 0) or None
+
+
+class BodyReader:
+    """
+    增量正文读取器
+
+    属性：
+        max_size: 最大读取字节数（None 表示不限制）
+        content_length: 响应头声明的正文长度（未声明或非法时为 None）
+        oversize: 是否超过大小限制（超限时丢弃已读内容）
+        matched: 是否已找到关键字并提前停止
+        bytes_read: 实际读取字节数
+    """
+
+    def __init__(self, max_size=None, content_length=None, math_str=None, stop_on_match=False):
+        self.max_size = max_size
+        self.bytes_read = 0
+        self.oversize = False
+        self.matched = False
+        self._chunks = bytearray()
+        self._keyword = math_str.encode("utf-8") if stop_on_match and math_str else None
+
+        try:
+            declared = int(content_length) if content_length is not None else None
+        except (TypeError, ValueError):
+            declared = None
+        self.content_length = declared
+        if max_size and declared is not None and declared > max_size:
+            self.oversize = True
+
+    @property
+    def done(self):
+        return self.oversize or self.matched
+
+    def feed(self, chunk):
+        """
+        追加一个数据块
+
+        Returns:
+            bool: True 表示应停止读取
+        """
+        if self.done:
+            return True
+        if not chunk:
+            return False
+
+        start = max(0, len(self._chunks) - len(self._keyword) + 1) if self._keyword else 0
+        self.bytes_read += len(chunk)
+        if self.max_size and self.bytes_read > self.max_size:
+            self.oversize = True
+            self._chunks = bytearray()
+            return True
+
+        self._chunks += chunk
+        if self._keyword and self._chunks.find(self._keyword, start) != -1:
+            self.matched = True
+            return True
+        return False
+
+    def drain_limit(self):
+        """
+        提前停止后为复用连接继续读取并丢弃的字节上限
+
+        只有找到关键字提前停止时才需要；已知剩余正文超过 DRAIN_MAX_BYTES 时返回 0，直接关闭连接。
+        """
+        if not self.matched:
+            return 0
+        if self.content_length is not None and (
+            self.content_length - self.bytes_read > DRAIN_MAX_BYTES
+        ):
+            return 0
+        return DRAIN_MAX_BYTES
+
+    def text(self):
+        """返回已读取正文（超限时返回空字符串）"""
+        if self.oversize:
+            return ""
+        return self._chunks.decode("utf-8", errors="replace")
+
+    def report(self, task_name, method):
+        """上报读取字节数与提前停止原因"""
+        metrics = task_metrics(task_name, method)
+        metrics(url_check_http_response_bytes).observe(self.bytes_read)
+        if self.oversize:
+            metrics(url_check_http_response_truncated_total, reason="oversize").inc()
+            logger.warning(
+                "%s 响应大小超过限制 %s 字节，跳过内容解析", task_name, self.max_size
+            )
+        elif self.matched:
+            metrics(url_check_http_response_truncated_total, reason="matched").inc()
+
+
+def _reader_for(headers, max_response_size, threshold, expect_json):
+    math_str = (threshold or {}).get("math_str")
+    return BodyReader(
+        max_size=effective_max_size(max_response_size),
+        content_length=headers.get("Content-Length"),
+        math_str=math_str,
+        # 关键字匹配时只有 JSON 校验需要完整正文
+        stop_on_match=bool(math_str) and not expect_json,
+    )
+
+
+def read_response_body(
+    response, task_name, method, max_response_size=None, threshold=None, expect_json=False
+):
+    """
+    读取 requests 响应正文（要求 stream=True）
+
+    Returns:
+        str: 正文文本；超限时为空字符串
+    """
+    reader = _reader_for(response.headers, max_response_size, threshold, expect_json)
+    try:
+        if not reader.done:
+            chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+            for chunk in chunks:
+                if reader.feed(chunk):
+                    break
+            # 读到结尾后 urllib3 把连接放回连接池；未读完时 close 会关闭连接
+            limit = reader.drain_limit()
+            if limit:
+                for chunk in chunks:
+                    limit -= len(chunk)
+                    if limit < 0:
+                        break
+    finally:
+        response.close()
+    reader.report(task_name, method)
+    return reader.text()
+
+
+async def read_response_body_async(
+    resp, task_name, method, max_response_size=None, threshold=None, expect_json=False
+):
+    """读取 aiohttp 响应正文，语义同 read_response_body"""
+    reader = _reader_for(resp.headers, max_response_size, threshold, expect_json)
+    if not reader.done:
+        chunks = resp.content.iter_chunked(CHUNK_SIZE)
+        async for chunk in chunks:
+            if reader.feed(chunk):
+                break
+        # 正文读完的连接释放后可复用，未读完的连接会被关闭
+        limit = reader.drain_limit()
+        if limit:
+            async for chunk in chunks:
+                limit -= len(chunk)
+                if limit < 0:
+                    break
+    reader.report(task_name, method)
+    return reader.text()
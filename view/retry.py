@@ -0,0 +1,166 @@
+"""
+检查重试模块
+
+功能：
+    - 请求失败后不在工作线程内 sleep，而是注册一次性的延迟执行（APScheduler date 任务），
+      工作线程立即释放给其他检查
+    - 重试间隔按指数退避：retry.delay * 2^n（上限 URL_CHECK_RETRY_MAX_DELAY_SECONDS），
+      再乘以 0.5~1.0 的随机抖动，避免同一故障下的大量任务同时重试
+    - 每次检查（含全部重试）有整体截止时间，下一次尝试无法在截止前完成时不再重试
+    - 每次检查的重试使用独立的任务 ID（带首次尝试时间），退避时间长于调度间隔时，
+      下一次调度不会覆盖上一次检查尚未执行的重试
+    - 暴露重试次数、重试等待时间与放弃重试原因指标
+
+asyncio 引擎同样使用 next_delay 计算退避，在事件循环上 await 等待，不占用线程。
+"""
+
+import datetime
+import logging
+import random
+import threading
+
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from prometheus_client import Counter, Histogram
+
+from conf import config
+from view.checke_control import task_metrics
+from view.sched_metrics import RETRY_ID_MARKER
+
+logger = logging.getLogger(__name__)
+
+# 重试任务使用独立的 jobstore，不出现在任务列表中
+RETRY_JOBSTORE = "retry"
+
+url_check_retry_attempts_total = Counter(
+    "url_check_retry_attempts_total",
+    "Total number of scheduled check retries",
+    ["task_name", "method"],
+)
+
+url_check_retry_wait_seconds = Histogram(
+    "url_check_retry_wait_seconds",
+    "Backoff delay before a check retry",
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+url_check_retry_exhausted_total = Counter(
+    "url_check_retry_exhausted_total",
+    "Total number of checks that gave up retrying (reason: count/deadline)",
+    ["task_name", "method", "reason"],
+)
+
+
+def _max_delay():
+    return max(float(getattr(config, "retry_max_delay_seconds", 60) or 60), 0.0)
+
+
+def backoff_base(retry_delay, attempt):
+    """第 attempt 次失败（0 起）后的退避时间上限（秒），不含抖动"""
+    return min(float(retry_delay or 0) * (2**attempt), _max_delay())
+
+
+def task_deadline(spec):
+    """
+    单次检查（含全部重试）的整体截止时间（秒）
+
+    优先使用任务配置的 deadline，否则按 timeout * (重试次数 + 1) + 各次退避上限之和估算。
+    """
+    if spec.deadline:
+        return float(spec.deadline)
+    timeout = float(spec.timeout or 10)
+    retry_count = spec.retry_count or 0
+    backoff = sum(backoff_base(spec.retry_delay, i) for i in range(retry_count))
+    return timeout * (retry_count + 1) + backoff
+
+
+def next_delay(spec, attempt, elapsed):
+    """
+    计算下一次重试前的等待时间，并记录重试指标
+
+    Args:
+        spec: ProbeSpec
+        attempt: 刚失败的尝试序号（0 为首次）
+        elapsed: 距首次尝试开始已过去的秒数
+
+    Returns:
+        float: 等待秒数；重试次数用尽或下一次尝试会超过截止时间时返回 None
+    """
+    metrics = task_metrics(spec.task_name, spec.method)
+    retry_count = spec.retry_count or 0
+    if attempt >= retry_count:
+        if retry_count:
+            metrics(url_check_retry_exhausted_total, reason="count").inc()
+        return None
+
+    delay = backoff_base(spec.retry_delay, attempt) * random.uniform(0.5, 1.0)
+    if elapsed + delay + float(spec.timeout or 10) > task_deadline(spec):
+        metrics(url_check_retry_exhausted_total, reason="deadline").inc()
+        return None
+
+    metrics(url_check_retry_attempts_total).inc()
+    url_check_retry_wait_seconds.observe(delay)
+    return delay
+
+
+_scheduler = None
+
+
+def bind_scheduler(sched):
+    """指定承载延迟重试的调度器（为其添加独立的 retry jobstore）"""
+    global _scheduler
+    try:
+        sched.add_jobstore(MemoryJobStore(), RETRY_JOBSTORE)
+    except ValueError:
+        # 已添加过
+        pass
+    _scheduler = sched
+
+
+def retry_job_id(task_name, started):
+    """某次检查（按首次尝试时间 started 区分）的重试任务 ID"""
+    return f"{task_name}{RETRY_ID_MARKER}{started:.6f}"
+
+
+def schedule_retry(task_name, func, args, delay, started):
+    """
+    delay 秒后执行一次 func(*args)
+
+    调度器运行中时注册为一次性 date 任务，每次检查（started）一个任务 ID，
+    同一次检查的下一次重试替换上一次；否则（调度器未绑定或已停止）使用后台定时器。
+    """
+    sched = _scheduler
+    if sched is not None and sched.running:
+        sched.add_job(
+            func,
+            "date",
+            args=args,
+            run_date=datetime.datetime.now() + datetime.timedelta(seconds=delay),
+            id=retry_job_id(task_name, started),
+            jobstore=RETRY_JOBSTORE,
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+        return
+    timer = threading.Timer(delay, func, args)
+    timer.daemon = True
+    timer.start()
+
+
+def cancel_retry(sched, task_name):
+    """取消任务所有尚未执行的重试（任务被删除或重载时调用），返回是否取消了重试"""
+    prefix = f"{task_name}{RETRY_ID_MARKER}"
+    try:
+        jobs = sched.get_jobs(jobstore=RETRY_JOBSTORE)
+    except KeyError:
+        return False
+    cancelled = False
+    for job in jobs:
+        if not job.id.startswith(prefix):
+            continue
+        try:
+            sched.remove_job(job.id, jobstore=RETRY_JOBSTORE)
+            cancelled = True
+        except JobLookupError:
+            pass
+    return cancelled
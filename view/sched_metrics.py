@@ -0,0 +1,177 @@
+"""
+调度器饱和度与延迟指标
+
+功能：
+    - 错过执行（misfire）、达到 max_instances 被跳过、执行异常计数（APScheduler 事件监听）
+    - 排队等待时间：计划触发时刻到线程池真正开始执行的间隔
+    - 每个任务的执行耗时分布
+    - 线程池忙碌线程数、排队任务数、最大线程数
+
+用途：
+    - 判断线程池是否饱和（busy == max_workers 且 queued 持续 > 0）
+    - 发现静默的检查缺口（missed / max_instances 增长说明有检查没有执行）
+"""
+
+import concurrent.futures
+import datetime
+import threading
+import time
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+from apscheduler.executors.base import run_job
+from apscheduler.executors.pool import BasePoolExecutor, ThreadPoolExecutor
+from prometheus_client import Counter, Gauge, Histogram
+
+url_check_scheduler_job_missed_total = Counter(
+    "url_check_scheduler_job_missed_total",
+    "Total number of job runs skipped because they missed misfire_grace_time",
+    ["task_name"],
+)
+
+url_check_scheduler_max_instances_total = Counter(
+    "url_check_scheduler_max_instances_total",
+    "Total number of job runs skipped because max_instances was reached",
+    ["task_name"],
+)
+
+url_check_scheduler_job_errors_total = Counter(
+    "url_check_scheduler_job_errors_total",
+    "Total number of job runs that raised an exception",
+    ["task_name"],
+)
+
+url_check_scheduler_queue_wait_seconds = Histogram(
+    "url_check_scheduler_queue_wait_seconds",
+    "Delay between scheduled fire time and actual job start",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+url_check_scheduler_job_duration_seconds = Histogram(
+    "url_check_scheduler_job_duration_seconds",
+    "Job execution time in the scheduler thread pool",
+    ["task_name"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# 重试任务 ID 为 "<任务名>@retry:<首次尝试时间>"（见 view/retry.py）
+RETRY_ID_MARKER = "@retry:"
+
+
+def task_label(job_id):
+    """调度任务 ID 对应的 task_name 标签：重试任务记在原任务名下"""
+    return job_id.split(RETRY_ID_MARKER, 1)[0]
+
+
+# 按任务名记录的指标，任务移除时由 checke_control.remove_task_metrics 删除
+TASK_FAMILIES = (
+    url_check_scheduler_job_missed_total,
+    url_check_scheduler_max_instances_total,
+    url_check_scheduler_job_errors_total,
+    url_check_scheduler_job_duration_seconds,
+)
+
+url_check_scheduler_executor_busy_threads = Gauge(
+    "url_check_scheduler_executor_busy_threads",
+    "Number of scheduler pool threads currently running a job",
+)
+
+url_check_scheduler_executor_queued_jobs = Gauge(
+    "url_check_scheduler_executor_queued_jobs",
+    "Number of submitted job runs waiting for a free pool thread",
+)
+
+url_check_scheduler_executor_max_workers = Gauge(
+    "url_check_scheduler_executor_max_workers",
+    "Configured size of the scheduler thread pool",
+)
+
+
+class _InstrumentedPool(concurrent.futures.ThreadPoolExecutor):
+    """
+    提交 APScheduler run_job 时包装为带指标的执行，其余提交原样执行
+
+    只替换执行器底层的线程池，执行器的 _do_submit_job（含上游的异常恢复）保持原样。
+    """
+
+    def __init__(self, max_workers=None, owner=None, **kwargs):
+        super().__init__(max_workers, **kwargs)
+        self._owner = owner
+
+    def submit(self, fn, /, *args, **kwargs):
+        owner = self._owner
+        if owner is None or fn is not run_job:
+            return super().submit(fn, *args, **kwargs)
+        owner._adjust(queued=1)
+        try:
+            return super().submit(owner._run_instrumented, fn, *args, **kwargs)
+        except Exception:
+            owner._adjust(queued=-1)
+            raise
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    带指标的 APScheduler 线程池执行器
+
+    在任务真正开始执行时记录排队等待时间，结束时记录执行耗时，
+    并维护忙碌线程数与排队任务数。
+    """
+
+    def __init__(self, max_workers=10, pool_kwargs=None):
+        self.max_workers = int(max_workers)
+        self._pool_kwargs = pool_kwargs or {}
+        self._busy = 0
+        self._queued = 0
+        self._count_lock = threading.Lock()
+        BasePoolExecutor.__init__(self, self._new_pool(self.max_workers))
+        url_check_scheduler_executor_max_workers.set(self.max_workers)
+
+    def _new_pool(self, size):
+        """创建带指标的底层线程池"""
+        return _InstrumentedPool(size, owner=self, **self._pool_kwargs)
+
+    def _adjust(self, busy=0, queued=0):
+        with self._count_lock:
+            self._busy += busy
+            self._queued += queued
+            url_check_scheduler_executor_busy_threads.set(self._busy)
+            url_check_scheduler_executor_queued_jobs.set(self._queued)
+
+    def _observe(self, wait, duration):
+        """每次执行结束时调用，子类可据此调整线程池（见 view/pool_autosize.py）"""
+
+    def _run_instrumented(self, fn, job, jobstore_alias, run_times, logger_name):
+        self._adjust(busy=1, queued=-1)
+        wait = None
+        if run_times:
+            now = datetime.datetime.now(run_times[0].tzinfo)
+            wait = max((now - run_times[0]).total_seconds(), 0.0)
+            url_check_scheduler_queue_wait_seconds.observe(wait)
+        start = time.perf_counter()
+        try:
+            return fn(job, jobstore_alias, run_times, logger_name)
+        finally:
+            duration = time.perf_counter() - start
+            url_check_scheduler_job_duration_seconds.labels(
+                task_name=task_label(job.id)
+            ).observe(duration)
+            self._adjust(busy=-1)
+            self._observe(wait, duration)
+
+
+def _on_job_event(event):
+    if event.code == EVENT_JOB_MISSED:
+        url_check_scheduler_job_missed_total.labels(task_name=task_label(event.job_id)).inc()
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        url_check_scheduler_max_instances_total.labels(
+            task_name=task_label(event.job_id)
+        ).inc()
+    elif event.code == EVENT_JOB_ERROR:
+        url_check_scheduler_job_errors_total.labels(task_name=task_label(event.job_id)).inc()
+
+
+def attach_listeners(sched):
+    """给调度器注册 missed/max_instances/error 事件监听"""
+    sched.add_listener(
+        _on_job_event, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_ERROR
+    )
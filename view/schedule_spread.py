@@ -0,0 +1,125 @@
+"""
+调度时间打散模块
+
+功能：
+    - 按任务名哈希为每个任务计算固定的相位偏移（interval 内），同周期任务不再同一秒触发
+    - 偏移以 Unix 纪元对齐，重启/重载后触发时刻不变，多实例之间也一致
+    - 可选随机抖动（APScheduler jitter），进一步平滑突发
+    - 统计调度器未来一段时间内每秒预计启动的检查数，便于观察并发峰值
+
+配置：
+    URL_CHECK_SCHEDULE_SPREAD: 是否按哈希打散首次触发时间（默认 true）
+    URL_CHECK_SCHEDULE_JITTER_SECONDS: 每次触发的随机抖动上限（秒，默认 0 不抖动）
+"""
+
+import datetime
+import math
+import time
+import zlib
+from collections import Counter
+
+from conf import config
+
+
+def phase_offset(task_name, interval):
+    """
+    任务在周期内的固定偏移（秒，毫秒精度）
+
+    Args:
+        task_name: 任务名称
+        interval: 调度间隔（秒）
+    """
+    period_ms = max(int(interval * 1000), 1)
+    return (zlib.crc32(task_name.encode("utf-8")) % period_ms) / 1000.0
+
+
+def start_date_for(task_name, interval, now=None):
+    """
+    计算 interval 触发器的 start_date
+
+    返回不晚于当前时间的对齐时刻，APScheduler 从它开始按 interval 推算下一次触发，
+    因此触发时刻满足 (t - offset) % interval == 0。
+    """
+    if not getattr(config, "schedule_spread", True):
+        return None
+    now = time.time() if now is None else now
+    base = math.floor(now / interval) * interval + phase_offset(task_name, interval)
+    if base > now:
+        base -= interval
+    return datetime.datetime.fromtimestamp(base)
+
+
+def jitter_seconds(interval):
+    """随机抖动上限，不超过半个周期"""
+    jitter = getattr(config, "schedule_jitter_seconds", 0) or 0
+    if jitter <= 0:
+        return None
+    return min(jitter, max(int(interval / 2), 1))
+
+
+# 并发统计窗口上限（秒），按秒展开计数，窗口过大会长时间占用 worker
+MAX_WINDOW_SECONDS = 3600
+
+
+def concurrency_profile(jobs, window=None, now=None, top=10):
+    """
+    统计未来窗口内每秒预计启动的检查数
+
+    Args:
+        jobs: APScheduler Job 列表（只统计 interval 触发器）
+        window: 统计窗口（秒），默认取最大周期；不论是否传入都限制在 1 ~ MAX_WINDOW_SECONDS
+        now: 统计起点（datetime，默认当前时间）
+        top: 返回的峰值秒数
+
+    Returns:
+        dict: 窗口、任务数、每秒最大/平均启动数、峰值时刻、分布
+    """
+    entries = []
+    for job in jobs:
+        interval = getattr(job.trigger, "interval", None)
+        next_run = getattr(job, "next_run_time", None)
+        if interval is None or next_run is None:
+            continue
+        entries.append((next_run.timestamp(), interval.total_seconds()))
+
+    if now is None:
+        now_ts = time.time()
+    else:
+        now_ts = now.timestamp()
+    if window is None:
+        window = max((e[1] for e in entries), default=60)
+    window = min(max(int(window), 1), MAX_WINDOW_SECONDS)
+
+    per_second = Counter()
+    for next_ts, interval in entries:
+        if interval <= 0:
+            continue
+        t = next_ts
+        while t < now_ts:
+            t += interval
+        while t < now_ts + window:
+            per_second[int(t - now_ts)] += 1
+            t += interval
+
+    starts = sum(per_second.values())
+    distribution = Counter(per_second.get(s, 0) for s in range(window))
+    peaks = sorted(per_second.items(), key=lambda x: (-x[1], x[0]))[:top]
+    return {
+        "window_seconds": window,
+        "jobs": len(entries),
+        "starts": starts,
+        "max_per_second": max(per_second.values(), default=0),
+        "avg_per_second": round(starts / window, 3) if window else 0,
+        "peak_seconds": [
+            {
+                "offset": offset,
+                "time": datetime.datetime.fromtimestamp(now_ts + offset).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+                "starts": count,
+            }
+            for offset, count in peaks
+        ],
+        # {每秒启动数: 秒数}
+        "distribution": {str(k): v for k, v in sorted(distribution.items())},
+    }
@@ -0,0 +1,145 @@
+"""
+任务分片模块
+
+功能：
+    - 多个检查实例按一致性哈希（任务名）各自认领一部分任务
+    - 分片数变化时只有约 1/N 的任务迁移，其余任务留在原实例
+    - 任务迁出本分片时删除其指标序列（checke_control.remove_task_metrics），
+      保证各分片指标合并后每个任务只有一份
+
+配置：
+    URL_CHECK_SHARD_COUNT: 分片总数（默认 1，不分片）
+    URL_CHECK_SHARD_INDEX: 本实例分片序号（0 起）；未设置时从主机名末尾序号推导
+                           （StatefulSet Pod 名如 url-check-2 -> 2）
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+import socket
+
+from prometheus_client import Gauge
+
+from conf import config
+
+logger = logging.getLogger(__name__)
+
+# 每个分片在哈希环上的虚拟节点数，越大分布越均匀
+VIRTUAL_NODES = 160
+
+url_check_shard_info = Gauge(
+    "url_check_shard_info",
+    "Shard assignment of this instance",
+    ["shard_index", "shard_count"],
+)
+
+url_check_shard_tasks = Gauge(
+    "url_check_shard_tasks",
+    "Number of tasks owned by this shard",
+)
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    一致性哈希环
+
+    属性：
+        shard_count: 分片总数
+        vnodes: 每个分片的虚拟节点数
+    """
+
+    def __init__(self, shard_count, vnodes=VIRTUAL_NODES):
+        self.shard_count = shard_count
+        self.vnodes = vnodes
+        points = []
+        for shard in range(shard_count):
+            for v in range(vnodes):
+                points.append((_hash(f"shard-{shard}#{v}"), shard))
+        points.sort()
+        self._keys = [p[0] for p in points]
+        self._shards = [p[1] for p in points]
+
+    def owner(self, task_name):
+        """返回任务所属分片序号"""
+        if self.shard_count <= 1:
+            return 0
+        pos = bisect.bisect(self._keys, _hash(task_name)) % len(self._keys)
+        return self._shards[pos]
+
+
+def _ordinal_from_hostname():
+    match = re.search(r"-(\d+)$", os.getenv("HOSTNAME") or socket.gethostname())
+    return int(match.group(1)) if match else 0
+
+
+def shard_config():
+    """
+    读取本实例的分片配置
+
+    Returns:
+        tuple: (shard_index, shard_count)
+    """
+    count = max(1, int(getattr(config, "shard_count", 1) or 1))
+    index = getattr(config, "shard_index", -1)
+    if index is None or index < 0:
+        index = _ordinal_from_hostname() if count > 1 else 0
+    if index >= count:
+        raise ValueError(f"分片序号 {index} 超出分片总数 {count}")
+    return index, count
+
+
+_ring = None
+
+
+def _get_ring(count):
+    global _ring
+    if _ring is None or _ring.shard_count != count:
+        _ring = HashRing(count)
+    return _ring
+
+
+def is_sharded():
+    return shard_config()[1] > 1
+
+
+def owns(task_name):
+    """本实例是否负责该任务"""
+    index, count = shard_config()
+    if count <= 1:
+        return True
+    return _get_ring(count).owner(task_name) == index
+
+
+def filter_tasks(tasks):
+    """
+    过滤出本分片负责的任务，并更新分片指标
+
+    跳过的任务逐个只在 DEBUG 级别输出，INFO 级别每次加载只输出一条汇总。
+    """
+    index, count = shard_config()
+    owned = []
+    for task in tasks:
+        if owns(task.get("name")):
+            owned.append(task)
+        else:
+            logger.debug("%s 不属于本分片 %s/%s，跳过", task.get("name"), index, count)
+    url_check_shard_info.labels(shard_index=str(index), shard_count=str(count)).set(1)
+    url_check_shard_tasks.set(len(owned))
+    if count > 1:
+        logger.info(
+            f"分片 {index}/{count} 负责 {len(owned)}/{len(tasks)} 个任务，"
+            f"跳过 {len(tasks) - len(owned)} 个"
+        )
+    return owned
+
+
+def shard_label():
+    """报告标题等处使用的分片描述，不分片时为空字符串"""
+    index, count = shard_config()
+    return f"[分片 {index}/{count}]" if count > 1 else ""
@@ -0,0 +1,160 @@
+"""
+SSL 证书有效期模块
+
+功能：
+    - 优先从本次检查已建立的 TLS 连接上读取证书（不额外握手）
+    - 拿不到连接证书时，按 host:port 缓存证书到期时间（TTL 可配置）
+    - 缓存未命中才单独建立一次 TLS 连接读取证书（主机解析走进程内 DNS 缓存）
+    - 暴露证书读取来源计数与独立探测耗时指标
+
+配置：
+    URL_CHECK_SSL_CERT_CACHE_TTL: 证书缓存时间（秒），默认 3600
+"""
+
+import datetime
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlparse
+
+from prometheus_client import Counter, Histogram
+
+from conf import config
+from view import dns_cache
+
+url_check_ssl_cert_lookup_total = Counter(
+    "url_check_ssl_cert_lookup_total",
+    "SSL certificate expiry lookups by source (connection/cache/probe/error)",
+    ["source"],
+)
+
+url_check_ssl_cert_probe_seconds = Histogram(
+    "url_check_ssl_cert_probe_seconds",
+    "Time spent on dedicated TLS connections used only to read certificates",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+
+# {(hostname, port): (缓存过期时间 monotonic, 证书 notAfter datetime)}
+_cert_cache = {}
+_cert_cache_lock = threading.Lock()
+
+
+def _cert_not_after(cert):
+    if cert and "notAfter" in cert:
+        return datetime.datetime.strptime(cert["notAfter"], "%b %d %H:%M:%S %Y %Z")
+    return None
+
+
+def _days_left(not_after):
+    return (not_after - datetime.datetime.now()).days
+
+
+def _cache_put(key, not_after):
+    ttl = getattr(config, "ssl_cert_cache_ttl", 3600)
+    if ttl <= 0:
+        return
+    with _cert_cache_lock:
+        _cert_cache[key] = (time.monotonic() + ttl, not_after)
+
+
+def _cache_get(key):
+    with _cert_cache_lock:
+        item = _cert_cache.get(key)
+        if item is None:
+            return None
+        expires_at, not_after = item
+        if expires_at < time.monotonic():
+            del _cert_cache[key]
+            return None
+        return not_after
+
+
+def clear_cert_cache():
+    """清空证书缓存"""
+    with _cert_cache_lock:
+        _cert_cache.clear()
+
+
+def peer_cert_from_response(response):
+    """
+    从 requests 响应（stream=True，正文未读取）对应的连接中读取证书
+
+    Returns:
+        dict: getpeercert() 结果；连接已释放或非 TLS 时返回 None
+    """
+    try:
+        conn = response.raw.connection
+        sock = getattr(conn, "sock", None) if conn is not None else None
+        if sock is not None and hasattr(sock, "getpeercert"):
+            return sock.getpeercert()
+    except Exception:
+        pass
+    return None
+
+
+def _connect(hostname, port, timeout):
+    # 与检查请求共用 DNS 缓存，避免同一主机再解析一次
+    if dns_cache.enabled() and not dns_cache.is_ip(hostname):
+        return dns_cache.create_connection((hostname, port), timeout)
+    return socket.create_connection((hostname, port), timeout=timeout)
+
+
+def _probe_not_after(hostname, port, timeout):
+    context = ssl.create_default_context()
+    start = time.perf_counter()
+    try:
+        with _connect(hostname, port, timeout) as sock:
+            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+                return _cert_not_after(ssock.getpeercert())
+    finally:
+        url_check_ssl_cert_probe_seconds.observe(time.perf_counter() - start)
+
+
+def get_ssl_cert_expiry_days(url, verify=True, peer_cert=None, probe=True, timeout=5):
+    """
+    获取SSL证书剩余天数
+
+    Args:
+        url: 完整URL（如 https://example.com）
+        verify: 是否验证证书（如果为False则跳过检查）
+        peer_cert: 本次检查连接上的证书（getpeercert() 结果），优先使用
+        probe: 缓存未命中时是否单独建立连接读取证书
+        timeout: 单独建立连接时的超时时间（秒）
+
+    Returns:
+        int: 剩余天数，获取失败或verify=False时返回 None
+    """
+    # 如果跳过证书验证，则不检查过期时间
+    if not verify:
+        return None
+
+    try:
+        parsed = urlparse(url)
+        if parsed.scheme != "https":
+            return None
+        key = (parsed.hostname, parsed.port or 443)
+
+        not_after = _cert_not_after(peer_cert) if peer_cert else None
+        if not_after is not None:
+            url_check_ssl_cert_lookup_total.labels(source="connection").inc()
+            _cache_put(key, not_after)
+            return _days_left(not_after)
+
+        not_after = _cache_get(key)
+        if not_after is not None:
+            url_check_ssl_cert_lookup_total.labels(source="cache").inc()
+            return _days_left(not_after)
+
+        if not probe:
+            return None
+
+        not_after = _probe_not_after(key[0], key[1], timeout)
+        if not_after is not None:
+            url_check_ssl_cert_lookup_total.labels(source="probe").inc()
+            _cache_put(key, not_after)
+            return _days_left(not_after)
+    except Exception:
+        pass
+    url_check_ssl_cert_lookup_total.labels(source="error").inc()
+    return None
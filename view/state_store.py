@@ -0,0 +1,331 @@
+"""
+任务状态存储模块
+
+功能：
+    - 告警状态（alarm/alarm_notified/last_alert_time 等）与检查历史分开存储
+    - 告警状态：小 JSON 文件，原子写入（临时文件 + fsync + rename），进程崩溃不会损坏
+    - 检查历史：按天分段的追加日志（JSON Lines），每次检查只追加一行
+    - 历史保留：新的一天第一次写入时删除过期分段，不再整体重写
+    - 稀疏偏移索引：每个分段旁记录"写入分钟 -> 字节偏移"，按时间查询时直接定位，不读整段
+    - 兼容迁移：首次访问时自动把旧版 data/<task>.pkl 迁移为新格式
+
+目录结构：
+    data/<task>.state.json          告警状态
+    data/<task>/<YYYY-MM-DD>.log    当天检查记录（每行一个 JSON）
+    data/<task>/<YYYY-MM-DD>.idx    分段索引（每行 "写入时间的分钟数 字节偏移"，每分钟最多一行）
+    data/<task>.pkl.migrated        已迁移的旧版 pickle（保留备查）
+"""
+
+import datetime
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = "data"
+STATE_SUFFIX = ".state.json"
+SEGMENT_SUFFIX = ".log"
+INDEX_SUFFIX = ".idx"
+LEGACY_SUFFIX = ".pkl"
+
+# 旧版 pickle 中的非历史字段
+STATE_KEYS = ("alarm", "alarm_notified", "last_alert_time", "last_resp_time")
+
+_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def _is_day_key(key):
+    try:
+        datetime.datetime.strptime(key, "%Y-%m-%d")
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _encode_state(state):
+    """datetime 转字符串，便于 JSON 序列化"""
+    encoded = dict(state)
+    alert_times = encoded.get("last_alert_time") or {}
+    encoded["last_alert_time"] = {
+        name: value.strftime(_TIME_FMT)
+        if isinstance(value, datetime.datetime)
+        else value
+        for name, value in alert_times.items()
+    }
+    return encoded
+
+
+def _decode_state(state):
+    alert_times = {}
+    for name, value in (state.get("last_alert_time") or {}).items():
+        try:
+            alert_times[name] = datetime.datetime.strptime(value, _TIME_FMT)
+        except (TypeError, ValueError):
+            continue
+    state["last_alert_time"] = alert_times
+    return state
+
+
+class TaskStateStore:
+    """
+    按任务划分的状态存储
+
+    属性：
+        base_dir: 存储根目录（默认 data）
+    """
+
+    def __init__(self, base_dir=STATE_DIR):
+        self.base_dir = base_dir
+        # 任务名 -> (分段日期, 最近一次写入索引的分钟数)
+        self._indexed = {}
+        self._index_lock = threading.Lock()
+
+    def state_path(self, task_name):
+        return os.path.join(self.base_dir, f"{task_name}{STATE_SUFFIX}")
+
+    def legacy_path(self, task_name):
+        return os.path.join(self.base_dir, f"{task_name}{LEGACY_SUFFIX}")
+
+    def segment_dir(self, task_name):
+        return os.path.join(self.base_dir, task_name)
+
+    def segment_path(self, task_name, day):
+        return os.path.join(self.segment_dir(task_name), f"{day}{SEGMENT_SUFFIX}")
+
+    def index_path(self, task_name, day):
+        return os.path.join(self.segment_dir(task_name), f"{day}{INDEX_SUFFIX}")
+
+    def exists(self, task_name):
+        """任务是否已有状态（存在旧版 pickle 时先迁移）"""
+        if os.path.exists(self.state_path(task_name)):
+            return True
+        if os.path.exists(self.legacy_path(task_name)):
+            return self.migrate_legacy(task_name)
+        return False
+
+    # ------------------------------------------------------------------
+    # 告警状态
+    # ------------------------------------------------------------------
+
+    def load_state(self, task_name):
+        """读取告警状态，失败时返回空字典"""
+        path = self.state_path(task_name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取状态文件失败 {path}: {e}")
+            return {}
+        if not isinstance(state, dict):
+            logger.warning(f"状态文件格式异常 {path}")
+            return {}
+        return _decode_state(state)
+
+    def save_state(self, task_name, state):
+        """原子写入告警状态，失败时仅记录日志"""
+        path = self.state_path(task_name)
+        tmp_path = None
+        try:
+            os.makedirs(self.base_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.base_dir, prefix=f".{task_name}.", suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(_encode_state(state), f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.warning(f"写入状态文件失败 {path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return False
+
+    # ------------------------------------------------------------------
+    # 检查历史
+    # ------------------------------------------------------------------
+
+    def append_record(self, task_name, day, record, keep_days=None):
+        """
+        追加一条检查记录到当天分段
+
+        Args:
+            task_name: 任务名称
+            day: 日期字符串（YYYY-MM-DD）
+            record: 检查记录字典
+            keep_days: 历史保留天数；新分段创建时清理过期分段
+
+        Returns:
+            bool: 是否写入成功
+        """
+        path = self.segment_path(task_name, day)
+        try:
+            os.makedirs(self.segment_dir(task_name), exist_ok=True)
+            new_segment = not os.path.exists(path)
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(path, "ab") as f:
+                self._index(task_name, day, f.tell())
+                f.write(line)
+        except Exception as e:
+            logger.warning(f"写入历史记录失败 {path}: {e}")
+            return False
+
+        if new_segment and keep_days is not None:
+            self.purge_history(task_name, keep_days, today=day)
+        return True
+
+    def _index(self, task_name, day, offset):
+        """
+        写入分段索引：每个写入分钟记录一次该分钟第一条记录之前的文件偏移
+
+        索引按写入时间而不是记录中的检查时间建立。写入时间在文件中单调递增，
+        记录的检查时间不晚于写入时间，所以从索引偏移开始读不会漏掉记录。
+        """
+        minute = int(time.time() // 60)
+        with self._index_lock:
+            if self._indexed.get(task_name) == (day, minute):
+                return
+            self._indexed[task_name] = (day, minute)
+        with open(self.index_path(task_name, day), "a", encoding="utf-8") as f:
+            f.write(f"{minute} {offset}\n")
+
+    def seek_offset(self, task_name, day, since):
+        """
+        分段中可以开始读取的字节偏移：之前的记录写入时间都早于 since（epoch 秒）
+
+        没有索引或索引不可用时返回 0（从头读）。
+        """
+        target = int(since // 60)
+        offset = 0
+        try:
+            with open(self.index_path(task_name, day), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        minute, position = line.split()
+                        minute, position = int(minute), int(position)
+                    except ValueError:
+                        continue
+                    if minute > target:
+                        break
+                    offset = position
+        except FileNotFoundError:
+            return 0
+        return offset
+
+    def days(self, task_name):
+        """返回已有历史分段的日期列表（升序）"""
+        try:
+            names = os.listdir(self.segment_dir(task_name))
+        except FileNotFoundError:
+            return []
+        days = [
+            name[: -len(SEGMENT_SUFFIX)]
+            for name in names
+            if name.endswith(SEGMENT_SUFFIX)
+        ]
+        return sorted(day for day in days if _is_day_key(day))
+
+    def iter_records(self, task_name, day, offset=0):
+        """逐行读取某天的检查记录（跳过崩溃导致的残缺行），可从索引偏移开始"""
+        path = self.segment_path(task_name, day)
+        try:
+            with open(path, "rb") as f:
+                if offset:
+                    f.seek(offset)
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def purge_history(self, task_name, keep_days, today=None):
+        """删除超出保留天数的历史分段"""
+        if keep_days is None or keep_days <= 0:
+            return
+        today = today or datetime.datetime.now().strftime("%Y-%m-%d")
+        cutoff = (
+            datetime.datetime.strptime(today, "%Y-%m-%d")
+            - datetime.timedelta(days=keep_days)
+        ).strftime("%Y-%m-%d")
+        for day in self.days(task_name):
+            if day > cutoff:
+                break
+            try:
+                os.remove(self.segment_path(task_name, day))
+                if os.path.exists(self.index_path(task_name, day)):
+                    os.remove(self.index_path(task_name, day))
+            except OSError as e:
+                logger.warning(f"删除过期历史分段失败 {task_name}/{day}: {e}")
+
+    def remove(self, task_name):
+        """删除任务的全部状态和历史"""
+        for path in (self.state_path(task_name), self.legacy_path(task_name)):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(self.segment_dir(task_name), ignore_errors=True)
+        with self._index_lock:
+            self._indexed.pop(task_name, None)
+
+    # ------------------------------------------------------------------
+    # 旧版 pickle 迁移
+    # ------------------------------------------------------------------
+
+    def migrate_legacy(self, task_name):
+        """
+        将旧版 data/<task>.pkl 一次性迁移为新格式
+
+        迁移成功后原文件重命名为 <task>.pkl.migrated。
+
+        Returns:
+            bool: 是否迁移成功
+        """
+        legacy = self.legacy_path(task_name)
+        try:
+            with open(legacy, "rb") as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"读取旧版状态文件失败 {legacy}: {e}")
+            return False
+        if not isinstance(payload, dict):
+            logger.warning(f"旧版状态文件格式异常 {legacy}")
+            return False
+
+        # 清理上次迁移中断留下的分段，避免重复记录
+        shutil.rmtree(self.segment_dir(task_name), ignore_errors=True)
+
+        state = {key: payload[key] for key in STATE_KEYS if key in payload}
+        last_check_time = None
+        for day in sorted(key for key in payload if _is_day_key(key)):
+            records = payload.get(day)
+            if not isinstance(records, list):
+                continue
+            for item in records:
+                record = item.get(task_name) if isinstance(item, dict) else None
+                if not isinstance(record, dict):
+                    continue
+                self.append_record(task_name, day, record)
+                last_check_time = record.get("time") or last_check_time
+        state["last_check_time"] = last_check_time
+
+        if not self.save_state(task_name, state):
+            return False
+        os.replace(legacy, legacy + ".migrated")
+        logger.info(f"旧版状态文件已迁移: {legacy}")
+        return True
+
+
+state_store = TaskStateStore()
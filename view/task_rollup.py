@@ -0,0 +1,291 @@
+"""
+任务运行汇总（进程内）
+
+功能：
+    - 调度器加载任务时登记任务及检查周期，移除任务时注销
+    - cherker.make_data 每次检查后累加检查次数、失败次数，记录最近检查时间
+    - 写入状态文件时同步记录当前告警状态（alarm）与已通知状态（alarm_notified）
+    - 任务登记时从状态文件恢复最近检查时间与告警状态，重启/切换 leader 后报告不丢失
+    - 汇总报告直接读取内存快照，复杂度 O(任务数)，不再读取 tasks.yaml 与状态文件
+    - 滚动窗口（5m/1h/24h）：可用率、错误数、响应时间分位数，供 /tasks/<name>/stats 与汇总报告使用
+
+滚动窗口：
+    每个窗口是固定数量时间槽组成的环形数组，每个槽记录检查数、错误数与响应时间直方图
+    （桶边界与 url_check_http_response_time_ms 一致）；槽过期后被新时间段复用。
+    每个任务占用固定内存（约 3KB），与检查次数无关。分位数按桶内线性插值估算。
+    窗口按时间槽滚动，实际覆盖范围在 (窗口 - 一个槽, 窗口] 之间。
+
+说明：
+    检查/失败计数与滚动窗口从进程启动（或任务登记）时开始；最近检查时间与告警状态
+    从 data/<task>.state.json 恢复，只有从未检查过的任务显示为"尚无检查数据"。
+"""
+
+import threading
+import time
+from array import array
+
+from view.state_store import state_store
+
+# 响应时间直方图桶上界（毫秒），最后一个桶为 +Inf
+LATENCY_BOUNDS_MS = (10, 50, 100, 200, 300, 500, 1000, 2000, 5000)
+
+# (名称, 窗口秒数, 时间槽数量)
+WINDOWS = (("5m", 300, 5), ("1h", 3600, 12), ("24h", 86400, 24))
+
+# 每个时间槽的计数：检查数、错误数、各响应时间桶
+_CHECKS = 0
+_ERRORS = 1
+_LATENCY = 2
+_SLOT_WIDTH = _LATENCY + len(LATENCY_BOUNDS_MS) + 1
+
+
+def latency_bucket(latency_ms):
+    for i, bound in enumerate(LATENCY_BOUNDS_MS):
+        if latency_ms <= bound:
+            return i
+    return len(LATENCY_BOUNDS_MS)
+
+
+def quantile(q, counts):
+    """按直方图估算分位数（桶内线性插值，落在 +Inf 桶时返回最后一个有限上界）"""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if i >= len(LATENCY_BOUNDS_MS):
+                return float(LATENCY_BOUNDS_MS[-1])
+            lower = LATENCY_BOUNDS_MS[i - 1] if i else 0
+            upper = LATENCY_BOUNDS_MS[i]
+            return round(lower + (upper - lower) * (rank - seen) / count, 2)
+        seen += count
+    return float(LATENCY_BOUNDS_MS[-1])
+
+
+class RollingWindow:
+    """
+    固定槽数的滚动窗口
+
+    属性：
+        seconds: 窗口长度（秒）
+        slots: 时间槽数量
+    """
+
+    __slots__ = ("seconds", "slots", "slot_seconds", "_epochs", "_counts")
+
+    def __init__(self, seconds, slots):
+        self.seconds = seconds
+        self.slots = slots
+        self.slot_seconds = seconds // slots
+        self._epochs = array("q", [-1]) * slots
+        self._counts = array("I", [0]) * (slots * _SLOT_WIDTH)
+
+    def add(self, now, error, latency_ms=None):
+        epoch = int(now // self.slot_seconds)
+        index = epoch % self.slots
+        base = index * _SLOT_WIDTH
+        counts = self._counts
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            for i in range(base, base + _SLOT_WIDTH):
+                counts[i] = 0
+        counts[base + _CHECKS] += 1
+        if error:
+            counts[base + _ERRORS] += 1
+        if latency_ms is not None:
+            counts[base + _LATENCY + latency_bucket(latency_ms)] += 1
+
+    def summary(self, now):
+        """窗口内检查数、错误数、可用率与响应时间分位数"""
+        current = int(now // self.slot_seconds)
+        counts = self._counts
+        rows = [
+            counts[index * _SLOT_WIDTH:(index + 1) * _SLOT_WIDTH]
+            for index, epoch in enumerate(self._epochs)
+            if current - self.slots < epoch <= current
+        ]
+        totals = [sum(column) for column in zip(*rows)] if rows else [0] * _SLOT_WIDTH
+        checks, errors = totals[_CHECKS], totals[_ERRORS]
+        latency = totals[_LATENCY:]
+        return {
+            "checks": checks,
+            "errors": errors,
+            "availability": round(1 - errors / checks, 4) if checks else None,
+            "latency_ms": {
+                "p50": quantile(0.5, latency),
+                "p95": quantile(0.95, latency),
+                "p99": quantile(0.99, latency),
+            },
+        }
+
+
+class TaskRollup:
+    """单个任务的累计数据"""
+
+    __slots__ = (
+        "interval",
+        "checks",
+        "failures",
+        "last_check_time",
+        "alarm",
+        "alarm_notified",
+        "windows",
+    )
+
+    def __init__(self, interval=10, windows=None):
+        self.interval = interval
+        self.checks = 0
+        self.failures = 0
+        self.last_check_time = None
+        self.alarm = None
+        self.alarm_notified = None
+        if windows is None:
+            windows = tuple(RollingWindow(seconds, slots) for _, seconds, slots in WINDOWS)
+        self.windows = windows
+
+    def window(self, name):
+        """按名称（5m/1h/24h）取滚动窗口"""
+        for (window_name, _, _), window in zip(WINDOWS, self.windows):
+            if window_name == name:
+                return window
+        raise KeyError(name)
+
+    def window_stats(self, now=None):
+        """各滚动窗口的汇总：{"5m": {...}, "1h": {...}, "24h": {...}}"""
+        now = time.time() if now is None else now
+        return {
+            name: window.summary(now)
+            for (name, _, _), window in zip(WINDOWS, self.windows)
+        }
+
+
+def _apply_state(rollup, state):
+    alarm = state.get("alarm")
+    notified = state.get("alarm_notified", alarm)
+    rollup.alarm = dict(alarm) if alarm is not None else None
+    rollup.alarm_notified = dict(notified) if notified is not None else None
+    rollup.last_check_time = state.get("last_check_time") or rollup.last_check_time
+
+
+class RollupRegistry:
+    """任务名 -> TaskRollup"""
+
+    def __init__(self, store=None):
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._store = store
+
+    def register(self, task_name, interval=10):
+        """
+        登记（或更新周期）调度中的任务，保留已有计数
+
+        新登记的任务从状态文件恢复最近检查时间与告警状态。
+        """
+        with self._lock:
+            rollup = self._tasks.get(task_name)
+            if rollup is not None:
+                rollup.interval = interval
+                return
+        # 读文件不持有锁
+        state = (self._store or state_store).load_state(task_name)
+        with self._lock:
+            rollup = self._tasks.get(task_name)
+            if rollup is None:
+                rollup = self._tasks[task_name] = TaskRollup(interval)
+                if state:
+                    _apply_state(rollup, state)
+            rollup.interval = interval
+
+    def unregister(self, task_name):
+        with self._lock:
+            self._tasks.pop(task_name, None)
+
+    def retain(self, task_names):
+        """只保留 task_names 中的任务"""
+        with self._lock:
+            for name in [n for n in self._tasks if n not in task_names]:
+                del self._tasks[name]
+
+    def record_check(self, task_name, failed, error=None, latency_ms=None, now=None):
+        """
+        记录一次检查结果（未登记的任务忽略，例如移除后才返回的检查）
+
+        Args:
+            failed: 本次检查是否触发任一告警条件（累计失败次数）
+            error: 是否不可用（状态码/超时/内容/JSON 校验失败，计入滚动窗口错误数），
+                默认同 failed
+            latency_ms: 响应时间（毫秒），没有 HTTP 响应时为 None
+        """
+        error = failed if error is None else error
+        now = time.time() if now is None else now
+        with self._lock:
+            rollup = self._tasks.get(task_name)
+            if rollup is None:
+                return
+            rollup.checks += 1
+            if failed:
+                rollup.failures += 1
+            for window in rollup.windows:
+                window.add(now, error, latency_ms)
+
+    def record_state(self, task_name, state):
+        """记录写入状态文件的告警状态与检查时间"""
+        with self._lock:
+            rollup = self._tasks.get(task_name)
+            if rollup is None:
+                return
+            _apply_state(rollup, state)
+
+    def snapshot(self):
+        """
+        所有任务的当前汇总（按任务名排序）
+
+        Returns:
+            list[tuple[str, TaskRollup]]: 任务名与汇总数据的副本（滚动窗口为共享引用，读取时不加锁）
+        """
+        with self._lock:
+            items = sorted(self._tasks.items())
+            copies = []
+            for name, rollup in items:
+                copy = TaskRollup(rollup.interval, rollup.windows)
+                copy.checks = rollup.checks
+                copy.failures = rollup.failures
+                copy.last_check_time = rollup.last_check_time
+                copy.alarm = rollup.alarm
+                copy.alarm_notified = rollup.alarm_notified
+                copies.append((name, copy))
+        return copies
+
+    def stats(self, task_name, now=None):
+        """
+        单个任务的累计数据与滚动窗口汇总
+
+        Returns:
+            dict: 未登记的任务返回 None
+        """
+        with self._lock:
+            rollup = self._tasks.get(task_name)
+            if rollup is None:
+                return None
+            result = {
+                "task_name": task_name,
+                "interval": rollup.interval,
+                "checks_total": rollup.checks,
+                "failures_total": rollup.failures,
+                "last_check_time": rollup.last_check_time,
+                "windows": rollup.window_stats(now),
+            }
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._tasks.clear()
+
+
+_registry = RollupRegistry()
+
+
+def get_registry():
+    return _registry